@@ -1,10 +1,29 @@
-import requests
-from typing import Dict, Any, Optional
+import asyncio
+import httpx
+import time
+from typing import Dict, Any, Optional, Tuple
+from apis.http_client import http_client_pool
+from apis.resilience import CircuitBreaker, backoff_delay, circuit_breakers
+from metrics.app_metrics import (
+    API_REQUEST_DURATION,
+    API_RETRIES,
+    CIRCUIT_BREAKER_REJECTIONS,
+    normalize_endpoint
+)
 import config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Só métodos idempotentes são repetidos: um POST repetido pode duplicar uma transação
+IDEMPOTENT_METHODS = {'GET', 'HEAD'}
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+# Para os demais métodos, só falhas em que a requisição certamente não foi processada:
+# nem chegou a sair (conexão recusada, sem conexão livre no pool) ou foi recusada de cara
+UNSENT_REQUEST_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+UNPROCESSED_STATUS_CODES = {429, 503}
+
+
 class BaseAPI:
     def __init__(self):
         self.base_url = config.API_BASE_URL
@@ -16,27 +35,78 @@ class BaseAPI:
             endpoint: str,
             data: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
+        endpoint_name = f"{method} {normalize_endpoint(endpoint)}"
+        breaker = circuit_breakers.get(endpoint_name)
+        max_attempts = config.API_RETRY_ATTEMPTS if method in IDEMPOTENT_METHODS else 1
+        started = time.perf_counter()
+        result = None
+
+        for attempt in range(max_attempts):
+            if not breaker.allow_request():
+                if result is not None:
+                    return result
+
+                CIRCUIT_BREAKER_REJECTIONS.inc(endpoint_name)
+                logger.warning(f"🔌 Circuito aberto, requisição {endpoint_name} recusada")
+                return {
+                    'success': False,
+                    'message': "Servidor temporariamente indisponível. Tente novamente em instantes.",
+                    'circuit_open': True,
+                    'retryable': True
+                }
+
+            result, retryable, retry_after = await self._send(method, endpoint, data, breaker)
+            if retryable:
+                # Falha passageira que pode ser repetida sem risco: quem chama pode tentar mais tarde
+                result['retryable'] = True
+
+            if not retryable or attempt == max_attempts - 1:
+                return result
+
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+
+            # Não começa uma tentativa que estouraria o orçamento total da chamada
+            if time.perf_counter() - started + delay + self.timeout > config.API_RETRY_BUDGET:
+                return result
+
+            API_RETRIES.inc(endpoint_name)
+            logger.info(
+                f"🔁 Repetindo {endpoint_name} em {delay:.2f}s "
+                f"(tentativa {attempt + 2}/{max_attempts}): {result['message']}"
+            )
+            await asyncio.sleep(delay)
+
+        return result
+
+    async def _send(
+            self,
+            method: str,
+            endpoint: str,
+            data: Optional[Dict[str, Any]],
+            breaker: CircuitBreaker
+    ) -> Tuple[Dict[str, Any], bool, Optional[float]]:
         url = f"{self.base_url}{endpoint}"
-        headers = {
-            "ngrok-skip-browser-warning": "true",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
+        started = time.perf_counter()
+        status = 'error'
 
         try:
             logger.debug(f"Request {method} to {url} with data: {data}")
 
-            response = requests.request(
-                method,
-                url,
-                json=data,
-                timeout=self.timeout,
-                headers=headers
-            )
+            client = http_client_pool.get_client()
+
+            async with http_client_pool.limit_host(url):
+                response = await client.request(
+                    method,
+                    url,
+                    json=data,
+                    timeout=self.timeout
+                )
+
+            status = str(response.status_code)
 
             try:
                 json_response = response.json()
-            except requests.exceptions.JSONDecodeError:
+            except ValueError:
                 logger.warning(f"Resposta não é JSON válido: {response.text}")
                 json_response = {"detail": response.text}
 
@@ -48,14 +118,14 @@ class BaseAPI:
                 return {
                     'success': True,
                     'data': json_response
-                }
+                }, False, None
 
             elif response.status_code == 404:
                 return {
                     'success': False,
                     'message': "Recurso não encontrado (404)",
                     'status_code': 404
-                }
+                }, False, None
 
             else:
                 error_message = (
@@ -68,23 +138,69 @@ class BaseAPI:
                     'success': False,
                     'message': error_message,
                     'status_code': response.status_code
-                }
+                }, self._can_retry(method, status_code=response.status_code), self._get_retry_after(response)
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException as e:
+            status = 'timeout'
             return {
                 'success': False,
                 'message': "Tempo esgotado ao conectar com o servidor"
-            }
+            }, self._can_retry(method, error=e), None
 
-        except requests.exceptions.ConnectionError:
+        except httpx.TransportError as e:
+            status = 'connection_error'
             return {
                 'success': False,
                 'message': "Não foi possível conectar ao servidor"
-            }
+            }, self._can_retry(method, error=e), None
 
         except Exception as e:
             logger.error(f"Erro inesperado na requisição: {e}", exc_info=True)
             return {
                 'success': False,
                 'message': f"❌ Erro inesperado: {str(e)}"
-            }
\ No newline at end of file
+            }, False, None
+
+        finally:
+            self._record_outcome(breaker, status)
+            API_REQUEST_DURATION.observe(
+                method,
+                normalize_endpoint(endpoint),
+                status,
+                value=time.perf_counter() - started
+            )
+
+    @staticmethod
+    def _can_retry(method: str, error: Exception = None, status_code: int = None) -> bool:
+        if method in IDEMPOTENT_METHODS:
+            return error is not None or status_code in RETRYABLE_STATUS_CODES
+
+        # Um POST que pode ter chegado ao backend (timeout de leitura, conexão caída no meio)
+        # talvez já tenha criado a transação: repetir duplicaria
+        if error is not None:
+            return isinstance(error, UNSENT_REQUEST_ERRORS)
+        return status_code in UNPROCESSED_STATUS_CODES
+
+    @staticmethod
+    def _record_outcome(breaker: CircuitBreaker, status: str):
+        if status in ('timeout', 'connection_error'):
+            breaker.record_failure()
+        elif status.isdigit():
+            # 4xx é resposta legítima de um backend saudável; só 5xx e 429 contam como falha
+            if int(status) >= 500 or int(status) == 429:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        else:
+            breaker.release()
+
+    @staticmethod
+    def _get_retry_after(response: httpx.Response) -> Optional[float]:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is None:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return None
@@ -0,0 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientPool:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+
+        # O cliente fica preso ao loop em que foi criado
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            limits = httpx.Limits(
+                max_connections=config.API_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=config.API_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=config.API_POOL_KEEPALIVE_EXPIRY
+            )
+            self._client = httpx.AsyncClient(
+                limits=limits,
+                timeout=config.API_TIMEOUT,
+                headers={
+                    "ngrok-skip-browser-warning": "true",
+                    "Accept": "application/json"
+                }
+            )
+            self._loop = loop
+            self._host_semaphores.clear()
+            logger.info(
+                f"🔌 Pool HTTP criado (máx. {config.API_POOL_MAX_CONNECTIONS} conexões, "
+                f"{config.API_POOL_MAX_KEEPALIVE} keep-alive)"
+            )
+
+        return self._client
+
+    @asynccontextmanager
+    async def limit_host(self, url: str):
+        host = urlsplit(url).netloc
+
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(config.API_MAX_CONCURRENCY_PER_HOST)
+            self._host_semaphores[host] = semaphore
+
+        async with semaphore:
+            yield
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("🔌 Pool HTTP encerrado")
+
+        self._client = None
+        self._loop = None
+        self._host_semaphores.clear()
+
+
+http_client_pool = HttpClientPool()
@@ -0,0 +1,137 @@
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def backoff_delay(attempt: int) -> float:
+    # "Full jitter": espalha as novas tentativas para não sincronizar os clientes na volta do backend
+    ceiling = min(config.API_RETRY_BACKOFF_MAX, config.API_RETRY_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    def __init__(
+            self,
+            name: str,
+            failure_rate: float = None,
+            min_requests: int = None,
+            window: float = None,
+            open_seconds: float = None,
+            half_open_max_calls: int = None
+    ):
+        self.name = name
+        self.failure_rate = failure_rate or config.CIRCUIT_BREAKER_FAILURE_RATE
+        self.min_requests = min_requests or config.CIRCUIT_BREAKER_MIN_REQUESTS
+        self.window = window or config.CIRCUIT_BREAKER_WINDOW
+        self.open_seconds = open_seconds or config.CIRCUIT_BREAKER_OPEN_SECONDS
+        self.half_open_max_calls = half_open_max_calls or config.CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS
+
+        self._state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info(f"🔌 Circuito '{self.name}' meio aberto: testando o backend")
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+
+        if state == CLOSED:
+            return True
+
+        # Meio aberto: só algumas requisições de teste passam; o resto falha rápido
+        if state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+
+        self._rejected += 1
+        return False
+
+    def record_success(self):
+        if self._state == HALF_OPEN:
+            self._close()
+            return
+
+        self._add_outcome(True)
+
+    def record_failure(self):
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+
+        self._add_outcome(False)
+
+        failures = sum(1 for _, success in self._outcomes if not success)
+        if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def release(self):
+        # Requisição encerrada sem veredito sobre o backend (ex.: cancelada)
+        if self._state == HALF_OPEN and self._half_open_in_flight:
+            self._half_open_in_flight -= 1
+
+    def _add_outcome(self, success: bool):
+        now = time.monotonic()
+        self._outcomes.append((now, success))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._times_opened += 1
+        logger.warning(
+            f"🔌 Circuito '{self.name}' aberto: chamadas falham rápido por {self.open_seconds:.0f}s"
+        )
+
+    def _close(self):
+        self._state = CLOSED
+        self._outcomes.clear()
+        self._half_open_in_flight = 0
+        logger.info(f"🔌 Circuito '{self.name}' fechado: backend respondendo novamente")
+
+    def get_stats(self) -> dict:
+        failures = sum(1 for _, success in self._outcomes if not success)
+        return {
+            'state': self.state,
+            'requests_in_window': len(self._outcomes),
+            'failure_rate': failures / len(self._outcomes) if self._outcomes else 0.0,
+            'rejected': self._rejected,
+            'times_opened': self._times_opened
+        }
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            self._breakers[name] = breaker
+        return breaker
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {name: breaker.get_stats() for name, breaker in self._breakers.items()}
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -1,5 +1,7 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, List, Optional
 from apis.base_api import BaseAPI
+import config
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,34 +12,116 @@ class TransactionAPI(BaseAPI):
     async def create_transaction(
             self,
             telegram_id: str,
-            original_message: str
+            original_message: str,
+            parsed: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         data = {
             "telegram_id": telegram_id,
             "original_message": original_message
         }
 
+        # Transação já estruturada localmente: o backend pode pular a interpretação
+        if parsed:
+            data["parsed"] = parsed
+
         result = await self._request("POST", "/transactions", data)
 
         logger.debug(f"Resultado da API: {result}")
 
         if result['success']:
-            transaction = result['data'].get('transaction', {})
-            category = transaction.get('category', {})
+            return {
+                'success': True,
+                'data': self._parse_transaction(result['data'].get('transaction', {}))
+            }
+
+        return result
+
+    async def create_transactions_bulk(
+            self,
+            telegram_id: str,
+            original_messages: List[str],
+            parsed: Optional[List[Optional[Dict[str, Any]]]] = None
+    ) -> Dict[str, Any]:
+        parsed = parsed or [None] * len(original_messages)
+
+        transactions = []
+        for original_message, parsed_transaction in zip(original_messages, parsed):
+            transaction = {"original_message": original_message}
+            if parsed_transaction:
+                transaction["parsed"] = parsed_transaction
+            transactions.append(transaction)
+
+        if not config.TRANSACTION_BULK_ENDPOINT_ENABLED:
+            return await self._create_transactions_individually(
+                telegram_id, original_messages, parsed
+            )
+
+        data = {
+            "telegram_id": telegram_id,
+            "transactions": transactions
+        }
 
+        result = await self._request("POST", "/transactions/bulk", data)
+
+        logger.debug(f"Resultado da API (lote): {result}")
+
+        if result['success']:
             return {
                 'success': True,
                 'data': {
-                    'transaction_id': transaction.get('id'),
-                    'type': transaction.get('type'),
-                    'category': category.get('title', 'desconhecido'),
-                    'amount': float(transaction.get('amount', 0)),
-                    'description': transaction.get('description', '')
+                    'created': [
+                        self._parse_transaction(transaction)
+                        for transaction in result['data'].get('transactions', [])
+                    ],
+                    'failed': [
+                        {
+                            'original_message': error.get('original_message', ''),
+                            'message': error.get('message', 'erro desconhecido')
+                        }
+                        for error in result['data'].get('errors', [])
+                    ]
                 }
             }
 
+        if result.get('status_code') == 404:
+            # Backend sem o endpoint de lote: envia as transações em paralelo
+            logger.info("Endpoint /transactions/bulk indisponível, enviando individualmente")
+            return await self._create_transactions_individually(
+                telegram_id, original_messages, parsed
+            )
+
         return result
 
+    async def _create_transactions_individually(
+            self,
+            telegram_id: str,
+            original_messages: List[str],
+            parsed: List[Optional[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        results = await asyncio.gather(*[
+            self.create_transaction(telegram_id, original_message, parsed_transaction)
+            for original_message, parsed_transaction in zip(original_messages, parsed)
+        ])
+
+        created = []
+        failed = []
+        for original_message, result in zip(original_messages, results):
+            if result['success']:
+                created.append(result['data'])
+            else:
+                failed.append({
+                    'original_message': original_message,
+                    'message': result['message']
+                })
+
+        return {
+            'success': True,
+            'data': {
+                'created': created,
+                'failed': failed
+            }
+        }
+
     async def get_summary(
             self,
             telegram_id: str,
@@ -53,3 +137,15 @@ class TransactionAPI(BaseAPI):
             }
         
         return result
+
+    @staticmethod
+    def _parse_transaction(transaction: Dict[str, Any]) -> Dict[str, Any]:
+        category = transaction.get('category', {})
+
+        return {
+            'transaction_id': transaction.get('id'),
+            'type': transaction.get('type'),
+            'category': category.get('title', 'desconhecido'),
+            'amount': float(transaction.get('amount', 0)),
+            'description': transaction.get('description', '')
+        }
@@ -1,14 +1,18 @@
 from typing import Dict, Any
 from apis.base_api import BaseAPI
+from caches.single_flight import SingleFlight
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class UserAPI(BaseAPI):
+    # Compartilhado entre instâncias: consultas idênticas simultâneas viram uma só chamada
+    _lookups = SingleFlight()
+
     async def check_user(self, filter_by: str, value: str) -> Dict[str, Any]:
         endpoint = f"/users?{filter_by}={value}"
-        return await self._request("GET", endpoint)
+        return await self._lookups.do(endpoint, lambda: self._request("GET", endpoint))
 
     async def create_user(
             self,
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ['Alimentação', 'Transporte', 'Saúde', 'Moradia', 'Lazer', 'Salário']
+AMOUNT_PATTERN = re.compile(r'\d+(?:[.,]\d{1,2})?')
+SUMMARY_ROUTE_PATTERN = re.compile(r'/summary/\w+')
+
+
+# Imita as rotas /api/users e /api/transactions do backend, com latência e erros configuráveis
+class FakeBackend:
+    def __init__(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            latency_ms: float = 20.0,
+            jitter_ms: float = 10.0,
+            error_rate: float = 0.0,
+            slow_rate: float = 0.0,
+            slow_ms: float = 2000.0,
+            seed: int = 0
+    ):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.requests = Counter()
+        self.errors = Counter()
+        self._rng = random.Random(seed)
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._emails: Set[str] = set()
+        self._next_transaction_id = 1
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def register_user(self, telegram_id: str, name: str = 'Usuário', email: str = None):
+        email = email or f"user{telegram_id}@exemplo.com"
+        self._users[telegram_id] = {
+            'id': len(self._users) + 1,
+            'name': name,
+            'email': email,
+            'telegram_id': telegram_id
+        }
+        self._emails.add(email)
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"🧪 Backend simulado em {self.base_url}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # O httpx reaproveita conexões: atende várias requisições por conexão
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                method, path, body = request
+                status, payload = await self._dispatch(method, path, body)
+                data = json.dumps(payload).encode('utf-8')
+
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Any]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        content_length = 0
+        while True:
+            header = await reader.readline()
+            if header in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = header.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                content_length = int(value.strip())
+
+        raw_body = await reader.readexactly(content_length) if content_length else b''
+        method, path = request_line.decode('latin-1').split()[:2]
+        return method, path, json.loads(raw_body) if raw_body else None
+
+    async def _dispatch(self, method: str, path: str, body: Any) -> Tuple[int, Dict[str, Any]]:
+        url = urlsplit(path)
+        route = url.path.removeprefix('/api')
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        endpoint = f"{method} {SUMMARY_ROUTE_PATTERN.sub('/summary', route)}"
+        self.requests[endpoint] += 1
+
+        delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        if self._rng.random() < self.slow_rate:
+            delay += self.slow_ms / 1000
+        await asyncio.sleep(delay)
+
+        if self._rng.random() < self.error_rate:
+            self.errors[endpoint] += 1
+            return 500, {'message': 'Erro simulado do backend'}
+
+        if route == '/users':
+            return self._handle_users(method, query, body)
+        if route == '/transactions' and method == 'POST':
+            return 201, {'transaction': self._create_transaction(body)}
+        if route == '/transactions/bulk' and method == 'POST':
+            return 201, {
+                'transactions': [self._create_transaction(item) for item in body['transactions']],
+                'errors': []
+            }
+        if route.startswith('/transactions/summary/') and method == 'GET':
+            return 200, {'summary': self._summary(route.rsplit('/', 1)[-1])}
+
+        return 404, {'detail': 'Not found'}
+
+    def _handle_users(self, method: str, query: Dict[str, str], body: Any) -> Tuple[int, Dict[str, Any]]:
+        if method == 'GET':
+            if 'telegram_id' in query:
+                user = self._users.get(query['telegram_id'])
+                return 200, {'users': [user] if user else []}
+            if 'email' in query:
+                users = [user for user in self._users.values() if user['email'] == query['email']]
+                return 200, {'users': users}
+
+        if method == 'POST':
+            if body['email'] in self._emails:
+                return 409, {'message': 'Email já cadastrado'}
+            self.register_user(body['telegram_id'], body['name'], body['email'])
+            return 201, {'user': self._users[body['telegram_id']]}
+
+        if method == 'DELETE':
+            user = self._users.get(query.get('telegram_id'))
+            if user is None or user['email'] != query.get('email'):
+                return 404, {'message': 'Email não corresponde'}
+            del self._users[query['telegram_id']]
+            self._emails.discard(user['email'])
+            return 200, {'message': 'Usuário excluído'}
+
+        return 404, {'detail': 'Not found'}
+
+    def _create_transaction(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        parsed = body.get('parsed')
+        if parsed:
+            amount, transaction_type, description = parsed['amount'], parsed['type'], parsed['description']
+        else:
+            match = AMOUNT_PATTERN.search(body['original_message'])
+            amount = float(match.group().replace(',', '.')) if match else 0.0
+            transaction_type = 'despesa'
+            description = body['original_message'][:40]
+
+        transaction_id = self._next_transaction_id
+        self._next_transaction_id += 1
+
+        return {
+            'id': transaction_id,
+            'type': transaction_type,
+            'category': {'title': self._rng.choice(CATEGORIES)},
+            'amount': amount,
+            'description': description
+        }
+
+    def _summary(self, summary_type: str) -> list:
+        key = 'month' if summary_type == 'month' else 'category'
+        values = ['2024-01', '2024-02', '2024-03'] if key == 'month' else CATEGORIES[:3]
+        return [{key: value, 'total': round(self._rng.uniform(50, 2000), 2), 'count': 5} for value in values]
+
+    def get_stats(self) -> dict:
+        return {
+            'requests': dict(self.requests),
+            'errors': dict(self.errors),
+            'users': len(self._users)
+        }
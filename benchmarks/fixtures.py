@@ -0,0 +1,187 @@
+import io
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import List
+from PIL import Image
+import fitz
+import numpy as np
+
+# Largura de uma bobina de 80mm em pontos de PDF
+RECEIPT_WIDTH = 227
+LINE_HEIGHT = 14
+MARGIN = 12
+
+STORES = [
+    'SUPERMERCADO BOM PRECO LTDA',
+    'FARMACIA SAO JOAO',
+    'POSTO CENTRAL COMBUSTIVEIS',
+    'PADARIA PAO DOURADO',
+    'RESTAURANTE SABOR CASEIRO'
+]
+ITEMS = [
+    'ARROZ TIPO 1 5KG', 'FEIJAO CARIOCA 1KG', 'LEITE INTEGRAL 1L', 'CAFE TORRADO 500G',
+    'PAO FRANCES KG', 'DIPIRONA 500MG', 'GASOLINA COMUM', 'REFRIGERANTE 2L',
+    'PRATO EXECUTIVO', 'SUCO NATURAL', 'DETERGENTE 500ML', 'BANANA PRATA KG'
+]
+PAYMENTS = ['CARTAO DE CREDITO', 'CARTAO DE DEBITO', 'PIX', 'DINHEIRO']
+
+
+@dataclass
+class ReceiptFixture:
+    name: str
+    mime_type: str
+    content: bytes
+    expected_text: str
+    pages: int = 1
+    tags: List[str] = field(default_factory=list)
+
+
+def _format_amount(value: float) -> str:
+    integer, cents = f"{value:.2f}".split('.')
+    return f"{int(integer):,}".replace(',', '.') + f",{cents}"
+
+
+def generate_receipt_lines(rng: random.Random, item_count: int = 6) -> List[str]:
+    purchase_date = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+    items = [(rng.choice(ITEMS), round(rng.uniform(2, 150), 2)) for _ in range(item_count)]
+    total = sum(price for _, price in items)
+
+    lines = [
+        rng.choice(STORES),
+        f"CNPJ {rng.randrange(10, 99)}.{rng.randrange(100, 999)}.{rng.randrange(100, 999)}/0001-{rng.randrange(10, 99)}",
+        f"DATA {purchase_date.strftime('%d/%m/%Y')} {rng.randrange(8, 22):02d}:{rng.randrange(60):02d}",
+        ''
+    ]
+    lines.extend(f"{name:<20} {_format_amount(price):>10}" for name, price in items)
+    lines.extend([
+        '',
+        f"{'TOTAL R$':<20} {_format_amount(total):>10}",
+        rng.choice(PAYMENTS)
+    ])
+    return lines
+
+
+def _draw_page(document: fitz.Document, lines: List[str]) -> fitz.Page:
+    height = MARGIN * 2 + LINE_HEIGHT * len(lines)
+    page = document.new_page(width=RECEIPT_WIDTH, height=height)
+
+    for index, line in enumerate(lines):
+        if line:
+            page.insert_text(
+                (MARGIN, MARGIN + LINE_HEIGHT * (index + 1) - 3),
+                line,
+                fontname='cour',
+                fontsize=9
+            )
+
+    return page
+
+
+def render_receipt_image(
+        lines: List[str],
+        dpi: int = 200,
+        rotation: int = 0,
+        image_format: str = 'JPEG',
+        noise: float = 0.0,
+        seed: int = 0
+) -> bytes:
+    document = fitz.open()
+    page = _draw_page(document, lines)
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csRGB)
+    image = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+    document.close()
+
+    if noise:
+        # Ruído leve imita o grão de uma foto de celular
+        rng = np.random.default_rng(seed)
+        pixels = np.asarray(image, dtype=np.float32)
+        pixels += rng.normal(0, noise * 255, size=pixels.shape[:2])[..., None]
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    if rotation:
+        image = image.rotate(rotation, expand=True, fillcolor='white')
+
+    output = io.BytesIO()
+    save_options = {'quality': 85} if image_format == 'JPEG' else {}
+    image.save(output, format=image_format, **save_options)
+    return output.getvalue()
+
+
+def render_receipt_pdf(pages: List[List[str]], scanned: bool = False, dpi: int = 150) -> bytes:
+    document = fitz.open()
+
+    for lines in pages:
+        if not scanned:
+            _draw_page(document, lines)
+            continue
+
+        # PDF "escaneado": cada página é só uma imagem, sem camada de texto
+        image_bytes = render_receipt_image(lines, dpi=dpi, image_format='PNG')
+        source = _draw_page(fitz.open(), lines)
+        page = document.new_page(width=source.rect.width, height=source.rect.height)
+        page.insert_image(page.rect, stream=image_bytes)
+
+    # Sem datas e IDs novos, o mesmo seed gera sempre os mesmos bytes
+    document.set_metadata({})
+    content = document.tobytes(deflate=True, no_new_id=True)
+    document.close()
+    return content
+
+
+def build_fixtures(seed: int = 42) -> List[ReceiptFixture]:
+    rng = random.Random(seed)
+    fixtures = []
+
+    for dpi, label in ((110, 'low'), (200, 'medium'), (400, 'high')):
+        lines = generate_receipt_lines(rng)
+        fixtures.append(ReceiptFixture(
+            name=f'image_{label}_res',
+            mime_type='image/jpeg',
+            content=render_receipt_image(lines, dpi=dpi),
+            expected_text='\n'.join(lines),
+            tags=['image', f'res:{label}']
+        ))
+
+    for rotation in (90, 180):
+        lines = generate_receipt_lines(rng)
+        fixtures.append(ReceiptFixture(
+            name=f'image_rotated_{rotation}',
+            mime_type='image/jpeg',
+            content=render_receipt_image(lines, dpi=200, rotation=rotation),
+            expected_text='\n'.join(lines),
+            tags=['image', f'rotation:{rotation}']
+        ))
+
+    lines = generate_receipt_lines(rng)
+    fixtures.append(ReceiptFixture(
+        name='image_noisy_png',
+        mime_type='image/png',
+        content=render_receipt_image(lines, dpi=200, image_format='PNG', noise=0.08, seed=seed),
+        expected_text='\n'.join(lines),
+        tags=['image', 'noise']
+    ))
+
+    for page_count in (1, 3):
+        pages = [generate_receipt_lines(rng) for _ in range(page_count)]
+        fixtures.append(ReceiptFixture(
+            name=f'pdf_native_{page_count}p',
+            mime_type='application/pdf',
+            content=render_receipt_pdf(pages),
+            expected_text='\n\n'.join('\n'.join(lines) for lines in pages),
+            pages=page_count,
+            tags=['pdf', 'native']
+        ))
+
+    for page_count in (1, 3):
+        pages = [generate_receipt_lines(rng) for _ in range(page_count)]
+        fixtures.append(ReceiptFixture(
+            name=f'pdf_scanned_{page_count}p',
+            mime_type='application/pdf',
+            content=render_receipt_pdf(pages, scanned=True),
+            expected_text='\n\n'.join('\n'.join(lines) for lines in pages),
+            pages=page_count,
+            tags=['pdf', 'scanned']
+        ))
+
+    return fixtures
@@ -0,0 +1,380 @@
+import argparse
+import asyncio
+import hashlib
+import itertools
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from telegram import Chat, Document, Message, PhotoSize, Update, User
+from benchmarks.fake_backend import FakeBackend
+from benchmarks.fixtures import build_fixtures
+from benchmarks.preprocess_benchmark import percentile
+import config
+
+DEFAULT_MIX = 'text=70,bulk=5,summary=5,start=5,photo=10,pdf=5'
+TEXT_MESSAGES = [
+    'almoço 32,50', 'uber 18', 'mercado 245,90 ontem', 'recebi salário 4.500', 'farmácia 27,80',
+    'paguei conta de luz 189,45', 'gasolina 200 10/03', 'cinema 45', 'padaria 12,30 hoje'
+]
+BULK_MESSAGES = ['café 8,50\nalmoço 35\nuber 22,40', 'aluguel 1.800; internet 99,90']
+ERROR_MARKERS = ('⚠️', '❌', '⏳', '⏱️')
+
+
+class FakeFile:
+    def __init__(self, content: bytes, download_ms: float):
+        self.content = content
+        self.download_ms = download_ms
+        self.file_size = len(content)
+        self.file_path = None
+
+    async def download_as_bytearray(self) -> bytearray:
+        await asyncio.sleep(self.download_ms / 1000)
+        return bytearray(self.content)
+
+
+# Substitui o Bot do Telegram: guarda as respostas e serve os arquivos "enviados"
+class FakeBot:
+    def __init__(self, download_ms: float):
+        self.download_ms = download_ms
+        self.files: Dict[str, bytes] = {}
+        self.replies: Dict[int, List[str]] = defaultdict(list)
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.replies[chat_id].append(text)
+
+    async def get_file(self, file_id: str, **kwargs) -> FakeFile:
+        return FakeFile(self.files[file_id], self.download_ms)
+
+
+class FakeContext:
+    def __init__(self, bot: FakeBot):
+        self.bot = bot
+        self.user_data: Dict = {}
+
+
+# Mesma interface do OCRWorkerPool, com tempo de OCR simulado no lugar do EasyOCR
+class SimulatedOCRPool:
+    def __init__(self, workers: int, queue_size: int, latency_ms: float, texts: Dict[str, str]):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.latency_ms = latency_ms
+        self.pending_jobs = 0
+        self._texts = texts
+        self._slots = asyncio.Semaphore(workers)
+
+    @property
+    def is_ready(self) -> bool:
+        return True
+
+    async def submit(self, source, mime_type: str) -> Dict[str, Any]:
+        from services.ocr_worker_pool import OCRQueueFullError
+
+        if self.pending_jobs >= self.capacity:
+            raise OCRQueueFullError()
+
+        self.pending_jobs += 1
+        try:
+            async with self._slots:
+                await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency_ms / 1000)
+            if isinstance(source, str):
+                with open(source, 'rb') as spooled:
+                    source = spooled.read()
+            return {
+                'text': self._texts.get(hashlib.sha1(source).hexdigest()),
+                'confidence': random.uniform(0.5, 1.0)
+            }
+        finally:
+            self.pending_jobs -= 1
+
+    def shutdown(self):
+        pass
+
+
+class LoadHarness:
+    def __init__(self, controller, scheduler, bot: FakeBot, backend: FakeBackend, args):
+        self.controller = controller
+        self.scheduler = scheduler
+        self.bot = bot
+        self.backend = backend
+        self.args = args
+        self.mix = self._parse_mix(args.mix)
+        self._update_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._fixtures = {
+            'photo': [fixture for fixture in build_fixtures(args.seed) if fixture.mime_type.startswith('image/')],
+            'pdf': [fixture for fixture in build_fixtures(args.seed) if fixture.mime_type == 'application/pdf']
+        }
+        self._handlers = {
+            'start': controller.handle_start,
+            'ajuda': controller.handle_help,
+            'link': controller.handle_link,
+            'resumo': controller.handle_summary,
+            'exclusao': controller.handle_delete_account
+        }
+
+    @staticmethod
+    def _parse_mix(mix: str) -> Dict[str, float]:
+        weights = {}
+        for item in mix.split(','):
+            name, _, weight = item.partition('=')
+            weights[name.strip()] = float(weight)
+        return weights
+
+    def _make_update(self, telegram_id: int, text: str = None, photo=None, document=None) -> Update:
+        user = User(telegram_id, f"Usuário {telegram_id}", False)
+        chat = Chat(telegram_id, Chat.PRIVATE)
+        message = Message(
+            next(self._update_ids),
+            datetime.now(),
+            chat,
+            from_user=user,
+            text=text,
+            photo=photo,
+            document=document
+        )
+        message.set_bot(self.bot)
+        return Update(message.message_id, message=message)
+
+    def _make_file(self, kind: str, rng: random.Random):
+        fixture = rng.choice(self._fixtures[kind])
+        file_id = f"file-{next(self._file_ids)}"
+        self.bot.files[file_id] = fixture.content
+
+        if kind == 'photo':
+            # Duas versões da mesma foto, como o Telegram envia; a maior só é baixada se o OCR escalar
+            return {'photo': tuple(
+                PhotoSize(file_id, f"unique-{file_id}-{side}", side * 3 // 4, side, len(fixture.content))
+                for side in (800, 1280)
+            )}
+
+        return {'document': Document(
+            file_id, f"unique-{file_id}", file_name='comprovante.pdf',
+            mime_type=fixture.mime_type, file_size=len(fixture.content)
+        )}
+
+    def _route(self, update: Update):
+        message = update.message
+        if message.photo:
+            return self.controller.handle_photo
+        if message.document:
+            return self.controller.handle_document
+        if message.text.startswith('/'):
+            return self._handlers.get(message.text[1:].split()[0], self.controller.handle_help)
+        return self.controller.handle_message
+
+    async def _send(self, telegram_id: int, context: FakeContext, kind: str, stats: dict, **message) -> List[str]:
+        update = self._make_update(telegram_id, **message)
+        replies = self.bot.replies[telegram_id]
+        replies.clear()
+
+        started = time.perf_counter()
+        try:
+            await self.scheduler.process_update(update, self._route(update)(update, context))
+        except Exception:
+            stats['exceptions'] += 1
+        latency = time.perf_counter() - started
+
+        stats['latencies'].append(latency)
+        stats['by_kind'][kind].append(latency)
+        if not replies or replies[-1].startswith(ERROR_MARKERS):
+            stats['failed'] += 1
+
+        return list(replies)
+
+    async def _register(self, telegram_id: int, context: FakeContext, stats: dict):
+        await self._send(telegram_id, context, 'register', stats, text='/start')
+        await self._send(telegram_id, context, 'register', stats, text=f"Usuário {telegram_id}")
+        await self._send(telegram_id, context, 'register', stats, text=f"carga{telegram_id}@exemplo.com")
+
+    async def _run_action(self, telegram_id: int, context: FakeContext, action: str, rng: random.Random, stats: dict):
+        if action == 'text':
+            await self._send(telegram_id, context, action, stats, text=rng.choice(TEXT_MESSAGES))
+        elif action == 'bulk':
+            await self._send(telegram_id, context, action, stats, text=rng.choice(BULK_MESSAGES))
+        elif action == 'summary':
+            await self._send(telegram_id, context, action, stats, text='/resumo')
+            await self._send(telegram_id, context, action, stats, text=rng.choice(['1', '2']))
+        elif action == 'start':
+            await self._send(telegram_id, context, action, stats, text='/start')
+        elif action in ('photo', 'pdf'):
+            await self._send(telegram_id, context, action, stats, **self._make_file(action, rng))
+
+    async def _virtual_user(self, telegram_id: int, deadline: float, stats: dict):
+        rng = random.Random(telegram_id)
+        context = FakeContext(self.bot)
+
+        if rng.random() < self.args.registered_ratio:
+            self.backend.register_user(str(telegram_id))
+        else:
+            await self._register(telegram_id, context, stats)
+
+        actions, weights = list(self.mix), list(self.mix.values())
+        while time.perf_counter() < deadline:
+            await self._run_action(telegram_id, context, rng.choices(actions, weights)[0], rng, stats)
+            if self.args.think_ms:
+                await asyncio.sleep(rng.expovariate(1000 / self.args.think_ms))
+
+    async def run_level(self, concurrency: int, first_user_id: int) -> dict:
+        stats = {'latencies': [], 'by_kind': defaultdict(list), 'failed': 0, 'exceptions': 0}
+        started = time.perf_counter()
+        deadline = started + self.args.duration
+
+        # Usuários novos a cada nível: inclui consultas de autenticação frias e cadastros
+        await asyncio.gather(*[
+            self._virtual_user(first_user_id + index, deadline, stats)
+            for index in range(concurrency)
+        ])
+
+        elapsed = time.perf_counter() - started
+        latencies = stats['latencies'] or [0.0]
+        return {
+            'concurrency': concurrency,
+            'updates': len(stats['latencies']),
+            'throughput': len(stats['latencies']) / elapsed,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'error_rate': (stats['failed'] + stats['exceptions']) / max(1, len(stats['latencies'])),
+            'by_kind': {
+                kind: percentile(values, 0.95) * 1000
+                for kind, values in sorted(stats['by_kind'].items())
+            }
+        }
+
+
+def find_saturation(levels: List[dict], min_gain: float, slo_ms: float, max_error_rate: float) -> Optional[dict]:
+    # Saturação: último nível antes de a vazão parar de crescer ou o p95/erros estourarem
+    best = None
+    for level in levels:
+        if level['p95_ms'] > slo_ms or level['error_rate'] > max_error_rate:
+            break
+        if best is not None and level['throughput'] < best['throughput'] * (1 + min_gain):
+            break
+        best = level
+    return best
+
+
+def print_level(level: dict):
+    kinds = ' '.join(f"{kind}={value:.0f}ms" for kind, value in level['by_kind'].items())
+    print(
+        f"{level['concurrency']:>8} {level['updates']:>8} {level['throughput']:>9.1f}/s "
+        f"{level['p50_ms']:>7.0f}ms {level['p95_ms']:>7.0f}ms {level['p99_ms']:>7.0f}ms "
+        f"{level['error_rate'] * 100:>6.1f}%  p95: {kinds}"
+    )
+
+
+async def run(args):
+    backend = FakeBackend(
+        port=args.backend_port,
+        latency_ms=args.backend_latency_ms,
+        jitter_ms=args.backend_jitter_ms,
+        error_rate=args.backend_error_rate,
+        slow_rate=args.backend_slow_rate,
+        slow_ms=args.backend_slow_ms,
+        seed=args.seed
+    )
+    await backend.start()
+
+    # As APIs leem a URL do backend ao serem criadas, então a configuração vem antes dos imports
+    config.API_BASE_URL = f"{backend.base_url}/api"
+    config.RECEIPT_CACHE_ENABLED = False
+    # A latência medida é a do comprovante inteiro, então ele roda dentro do handler, sem a fila
+    config.RECEIPT_QUEUE_ENABLED = False
+    # O backend falso já implementa o endpoint de lote
+    config.TRANSACTION_BULK_ENDPOINT_ENABLED = True
+
+    from apis.http_client import http_client_pool
+    from controllers.bot_controller import BotController
+    from middlewares.update_scheduler import UserOrderedUpdateProcessor
+
+    controller = BotController()
+    scheduler = UserOrderedUpdateProcessor(concurrency_limit=args.update_concurrency)
+
+    if args.ocr == 'simulated':
+        texts = {
+            hashlib.sha1(fixture.content).hexdigest(): fixture.expected_text
+            for fixture in build_fixtures(args.seed)
+        }
+        controller.transaction_service.ocr_pool = SimulatedOCRPool(
+            config.OCR_WORKERS, config.OCR_QUEUE_SIZE, args.ocr_latency_ms, texts
+        )
+    else:
+        controller.transaction_service.ocr_pool.start_warm_up()
+
+    harness = LoadHarness(controller, scheduler, FakeBot(args.download_ms), backend, args)
+
+    print(
+        f"\nBackend simulado: {args.backend_latency_ms:.0f}±{args.backend_jitter_ms:.0f}ms, "
+        f"{args.backend_error_rate * 100:.1f}% de erros | OCR: {args.ocr} | "
+        f"{args.duration:.0f}s por nível | mix: {args.mix}\n"
+    )
+    print(f"{'usuários':>8} {'updates':>8} {'vazão':>11} {'p50':>9} {'p95':>9} {'p99':>9} {'erros':>7}")
+
+    levels = []
+    first_user_id = 1_000_000
+    try:
+        for concurrency in args.levels:
+            level = await harness.run_level(concurrency, first_user_id)
+            first_user_id += concurrency
+            levels.append(level)
+            print_level(level)
+    finally:
+        await http_client_pool.close()
+        controller.transaction_service.ocr_pool.shutdown()
+        await backend.stop()
+
+    saturation = find_saturation(levels, args.min_gain, args.slo_ms, args.max_error_rate)
+    if saturation is None:
+        print("\n⚠️ Nenhum nível dentro do SLO: reduza a carga inicial ou revise os limites")
+    elif saturation is levels[-1]:
+        print(
+            f"\n📈 Sem saturação até {saturation['concurrency']} usuários simultâneos "
+            f"({saturation['throughput']:.1f} updates/s); aumente os níveis"
+        )
+    else:
+        print(
+            f"\n🚧 Saturação em ~{saturation['concurrency']} usuários simultâneos: "
+            f"{saturation['throughput']:.1f} updates/s com p95 de {saturation['p95_ms']:.0f}ms"
+        )
+
+    stats = backend.get_stats()
+    print(f"Requisições ao backend: {stats['requests']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Teste de carga ponta a ponta: updates simulados passando pelo BotController real"
+    )
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 5, 10, 25, 50, 100, 200])
+    parser.add_argument('--duration', type=float, default=10.0, help="Segundos por nível")
+    parser.add_argument('--think-ms', type=float, default=0.0, help="Pausa média entre mensagens do usuário")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Pesos por tipo de mensagem")
+    parser.add_argument('--registered-ratio', type=float, default=0.9)
+    parser.add_argument('--update-concurrency', type=int, default=config.UPDATE_CONCURRENCY_LIMIT)
+    parser.add_argument('--backend-port', type=int, default=0)
+    parser.add_argument('--backend-latency-ms', type=float, default=20.0)
+    parser.add_argument('--backend-jitter-ms', type=float, default=10.0)
+    parser.add_argument('--backend-error-rate', type=float, default=0.0)
+    parser.add_argument('--backend-slow-rate', type=float, default=0.0)
+    parser.add_argument('--backend-slow-ms', type=float, default=2000.0)
+    parser.add_argument('--ocr', choices=['simulated', 'real'], default='simulated')
+    parser.add_argument('--ocr-latency-ms', type=float, default=1500.0)
+    parser.add_argument('--download-ms', type=float, default=80.0)
+    parser.add_argument('--slo-ms', type=float, default=2000.0, help="p95 máximo aceito")
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--min-gain', type=float, default=0.10, help="Ganho mínimo de vazão entre níveis")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    # Avisos por mensagem (usuário não cadastrado etc.) poluiriam o relatório
+    logging.basicConfig(level=logging.ERROR)
+    random.seed(args.seed)
+
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import difflib
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+from benchmarks.fixtures import ReceiptFixture, build_fixtures
+from benchmarks.preprocess_benchmark import key_fields, percentile
+from services.ocr_engines import parse_engine_chain
+from services.ocr_service import OCRService
+
+# Piora tolerada antes de acusar regressão em relação ao baseline
+DEFAULT_LATENCY_TOLERANCE = 0.20
+DEFAULT_ACCURACY_TOLERANCE = 0.05
+
+# Tipo de entrada com cadeia de motores própria (OCR_ENGINES_IMAGE / OCR_ENGINES_PDF) e a tag
+# das fixtures que passam por OCR nele; PDFs com texto nativo não usam motor nenhum
+ENGINE_INPUT_TYPES = {'image': 'image', 'pdf': 'scanned'}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def score_text(expected: str, text: str) -> Dict[str, float]:
+    expected_fields = key_fields(expected)
+    found_fields = key_fields(text)
+    return {
+        'field_recall': len(expected_fields & found_fields) / len(expected_fields) if expected_fields else 1.0,
+        'similarity': difflib.SequenceMatcher(None, expected, text).ratio()
+    }
+
+
+def get_methods(service: OCRService, fixture: ReceiptFixture) -> Dict[str, Callable]:
+    if fixture.mime_type == 'application/pdf':
+        direct = ('extract_text_from_pdf', service.extract_text_from_pdf)
+    else:
+        direct = ('extract_text_from_image', service.extract_text_from_image)
+
+    return {
+        direct[0]: direct[1],
+        'process_file': lambda content: service.process_file_with_timings(content, fixture.mime_type)
+    }
+
+
+def run_fixture(service: OCRService, fixture: ReceiptFixture, repeat: int) -> Dict[str, dict]:
+    results = {}
+
+    for method_name, method in get_methods(service, fixture).items():
+        latencies = []
+        stages: Dict[str, List[float]] = {}
+        text = ''
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = method(fixture.content)
+            latencies.append(time.perf_counter() - started)
+
+            if isinstance(output, dict):
+                for stage, elapsed in output['timings'].items():
+                    stages.setdefault(stage, []).append(elapsed)
+                output = output['text']
+            text = output or ''
+
+        results[method_name] = {
+            'runs': repeat,
+            'pages': fixture.pages,
+            'total_seconds': sum(latencies),
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'stages_ms': {stage: statistics.mean(values) * 1000 for stage, values in stages.items()},
+            **score_text(fixture.expected_text, text)
+        }
+
+    return results
+
+
+def summarize(results: Dict[str, Dict[str, dict]]) -> dict:
+    runs = [run for methods in results.values() for run in methods.values()]
+    total_seconds = sum(run['total_seconds'] for run in runs)
+    files = sum(run['runs'] for run in runs)
+    pages = sum(run['runs'] * run['pages'] for run in runs)
+
+    return {
+        'files': files,
+        'files_per_second': files / total_seconds if total_seconds else 0.0,
+        'pages_per_second': pages / total_seconds if total_seconds else 0.0,
+        'field_recall': statistics.mean(run['field_recall'] for run in runs),
+        'similarity': statistics.mean(run['similarity'] for run in runs)
+    }
+
+
+def print_report(report: dict):
+    print(
+        f"\nseed {report['seed']}, {report['repeat']} repetição(ões), "
+        f"carga do modelo {report['model_load_seconds']:.1f}s\n"
+    )
+    print(f"{'fixture':<20} {'método':<24} {'p50':>8} {'p95':>8} {'campos':>7} {'similar.':>9}  estágios")
+
+    for fixture_name, methods in report['results'].items():
+        for method_name, run in methods.items():
+            stages = ' '.join(f"{stage}={value:.0f}ms" for stage, value in run['stages_ms'].items())
+            print(
+                f"{fixture_name:<20} {method_name:<24} "
+                f"{run['p50_ms']:>6.0f}ms {run['p95_ms']:>6.0f}ms "
+                f"{run['field_recall'] * 100:>6.0f}% {run['similarity'] * 100:>8.0f}%  {stages}"
+            )
+
+    summary = report['summary']
+    print(
+        f"\nVazão: {summary['files_per_second']:.2f} arquivos/s, "
+        f"{summary['pages_per_second']:.2f} páginas/s | "
+        f"campos {summary['field_recall'] * 100:.0f}%, similaridade {summary['similarity'] * 100:.0f}% | "
+        f"pico de RSS {report['peak_rss_mb']:.0f} MB (após carga do modelo: {report['rss_after_load_mb']:.0f} MB)"
+    )
+
+
+def compare_engines(
+        fixtures: List[ReceiptFixture],
+        chains: List[str],
+        repeat: int,
+        accuracy_tolerance: float
+) -> Dict[str, str]:
+    rows: Dict[str, Dict[str, dict]] = {}
+
+    for chain in chains:
+        names = parse_engine_chain(chain)
+        service = OCRService(engine_chains={'image': names, 'pdf': names})
+        service.warm_up()
+
+        for input_type, tag in ENGINE_INPUT_TYPES.items():
+            runs = [
+                run_fixture(service, fixture, repeat)['process_file']
+                for fixture in fixtures if tag in fixture.tags
+            ]
+            if runs:
+                rows.setdefault(input_type, {})[','.join(names)] = {
+                    'p50_ms': statistics.mean(run['p50_ms'] for run in runs),
+                    'field_recall': statistics.mean(run['field_recall'] for run in runs)
+                }
+
+    print(f"\n{'entrada':<8} {'motores':<24} {'p50':>8} {'campos':>7}")
+    for input_type, by_chain in rows.items():
+        for chain, row in by_chain.items():
+            print(f"{input_type:<8} {chain:<24} {row['p50_ms']:>6.0f}ms {row['field_recall'] * 100:>6.0f}%")
+
+    # A cadeia mais rápida entre as que não perdem campos em relação à melhor
+    recommendations = {}
+    print("\nPadrão sugerido:")
+    for input_type, by_chain in rows.items():
+        best_recall = max(row['field_recall'] for row in by_chain.values())
+        eligible = [
+            chain for chain, row in by_chain.items()
+            if row['field_recall'] >= best_recall - accuracy_tolerance
+        ]
+        recommendations[input_type] = min(eligible, key=lambda chain: by_chain[chain]['p50_ms'])
+        print(f"  OCR_ENGINES_{input_type.upper()}={recommendations[input_type]}")
+
+    return recommendations
+
+
+def compare_with_baseline(
+        report: dict,
+        baseline: dict,
+        latency_tolerance: float,
+        accuracy_tolerance: float
+) -> List[str]:
+    regressions = []
+
+    for fixture_name, methods in report['results'].items():
+        for method_name, run in methods.items():
+            previous = baseline['results'].get(fixture_name, {}).get(method_name)
+            if previous is None:
+                continue
+
+            label = f"{fixture_name}/{method_name}"
+            if run['p95_ms'] > previous['p95_ms'] * (1 + latency_tolerance):
+                regressions.append(f"{label}: p95 {previous['p95_ms']:.0f}ms -> {run['p95_ms']:.0f}ms")
+            for metric in ('field_recall', 'similarity'):
+                if run[metric] < previous[metric] - accuracy_tolerance:
+                    regressions.append(
+                        f"{label}: {metric} {previous[metric] * 100:.0f}% -> {run[metric] * 100:.0f}%"
+                    )
+
+    summary, previous_summary = report['summary'], baseline['summary']
+    print(
+        f"\nComparação com o baseline: vazão "
+        f"{previous_summary['files_per_second']:.2f} -> {summary['files_per_second']:.2f} arquivos/s, "
+        f"pico de RSS {baseline['peak_rss_mb']:.0f} -> {report['peak_rss_mb']:.0f} MB"
+    )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede latência, vazão, memória e acurácia do OCR com comprovantes sintéticos"
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='+', help="Filtra fixtures por nome ou tag (ex.: pdf, scanned)")
+    parser.add_argument('--save-baseline', metavar='ARQUIVO', help="Grava o resultado como baseline")
+    parser.add_argument('--baseline', metavar='ARQUIVO', help="Compara com um baseline gravado")
+    parser.add_argument('--latency-tolerance', type=float, default=DEFAULT_LATENCY_TOLERANCE)
+    parser.add_argument('--accuracy-tolerance', type=float, default=DEFAULT_ACCURACY_TOLERANCE)
+    parser.add_argument('--export-fixtures', metavar='DIRETÓRIO', help="Salva as fixtures geradas para inspeção")
+    parser.add_argument(
+        '--engines',
+        nargs='+',
+        metavar='CADEIA',
+        help="Compara cadeias de motores por tipo de entrada (ex.: tesseract easyocr tesseract,easyocr)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    fixtures = build_fixtures(args.seed)
+    if args.only:
+        fixtures = [
+            fixture for fixture in fixtures
+            if fixture.name in args.only or set(fixture.tags) & set(args.only)
+        ]
+    if not fixtures:
+        parser.error("Nenhuma fixture corresponde ao filtro")
+
+    if args.export_fixtures:
+        os.makedirs(args.export_fixtures, exist_ok=True)
+        for fixture in fixtures:
+            extension = fixture.mime_type.split('/')[-1]
+            with open(os.path.join(args.export_fixtures, f"{fixture.name}.{extension}"), 'wb') as output:
+                output.write(fixture.content)
+            with open(os.path.join(args.export_fixtures, f"{fixture.name}.txt"), 'w', encoding='utf-8') as output:
+                output.write(fixture.expected_text)
+
+    if args.engines:
+        compare_engines(fixtures, args.engines, args.repeat, args.accuracy_tolerance)
+        return
+
+    service = OCRService()
+    started = time.perf_counter()
+    service.warm_up()
+    model_load_seconds = time.perf_counter() - started
+    rss_after_load_mb = peak_rss_mb()
+
+    results = {fixture.name: run_fixture(service, fixture, args.repeat) for fixture in fixtures}
+
+    report = {
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'model_load_seconds': model_load_seconds,
+        'rss_after_load_mb': rss_after_load_mb,
+        'peak_rss_mb': peak_rss_mb(),
+        'summary': summarize(results),
+        'results': results
+    }
+
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+        print(f"\nBaseline gravado em {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+
+        if baseline.get('seed') != args.seed:
+            print(f"⚠️ Baseline gerado com seed {baseline.get('seed')}; as fixtures não são as mesmas")
+
+        regressions = compare_with_baseline(
+            report,
+            baseline,
+            args.latency_tolerance,
+            args.accuracy_tolerance
+        )
+        if regressions:
+            print("\n❌ Regressões encontradas:")
+            for regression in regressions:
+                print(f"  • {regression}")
+            sys.exit(1)
+
+        print("✅ Sem regressões em relação ao baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import difflib
+import os
+import re
+import statistics
+import time
+from typing import Dict, List, Optional
+from PIL import Image
+from services.image_preprocessor import ImagePreprocessor, PREPROCESS_PROFILES
+from services.ocr_service import OCRService
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+AMOUNT_PATTERN = re.compile(r'\d{1,3}(?:\.\d{3})*,\d{2}')
+DATE_PATTERN = re.compile(r'\d{2}/\d{2}(?:/\d{2,4})?')
+
+
+def collect_images(paths: List[str]) -> List[str]:
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            images.append(path)
+    return images
+
+
+def key_fields(text: str) -> set:
+    return set(AMOUNT_PATTERN.findall(text)) | set(DATE_PATTERN.findall(text))
+
+
+def load_reference(image_path: str) -> Optional[str]:
+    # Gabarito opcional: "recibo.jpg" -> "recibo.txt"
+    reference_path = os.path.splitext(image_path)[0] + '.txt'
+    if os.path.exists(reference_path):
+        with open(reference_path, encoding='utf-8') as reference_file:
+            return reference_file.read()
+    return None
+
+
+def run_profile(service: OCRService, profile: str, images: List[str], repeat: int) -> Dict[str, list]:
+    service.preprocessor = ImagePreprocessor(profile)
+    results = {'latencies': [], 'prepare': [], 'pixels': [], 'texts': {}}
+
+    for image_path in images:
+        with open(image_path, 'rb') as image_file:
+            image_bytes = image_file.read()
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with Image.open(image_path) as image:
+                image_np, _ = service.preprocessor.prepare(image)
+            results['prepare'].append(time.perf_counter() - started)
+            results['pixels'].append(image_np.shape[0] * image_np.shape[1])
+
+            started = time.perf_counter()
+            text = service.extract_text_from_image(image_bytes) or ''
+            results['latencies'].append(time.perf_counter() - started)
+
+        results['texts'][image_path] = text
+
+    return results
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara latência e qualidade do OCR entre perfis de pré-processamento"
+    )
+    parser.add_argument('paths', nargs='+', help="Imagens ou diretórios com imagens de comprovantes")
+    parser.add_argument('--profiles', nargs='+', default=list(PREPROCESS_PROFILES))
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    images = collect_images(args.paths)
+    if not images:
+        parser.error("Nenhuma imagem encontrada")
+
+    service = OCRService()
+    service.warm_up()
+
+    all_results = {profile: run_profile(service, profile, images, args.repeat) for profile in args.profiles}
+
+    # Sem gabarito, a referência é o texto do perfil sem pré-processamento
+    reference_profile = 'off' if 'off' in all_results else args.profiles[0]
+    references = {
+        image_path: load_reference(image_path) or all_results[reference_profile]['texts'][image_path]
+        for image_path in images
+    }
+
+    print(f"\n{len(images)} imagens, {args.repeat} repetição(ões), referência: gabarito ou '{reference_profile}'\n")
+    print(f"{'perfil':<10} {'média':>8} {'p95':>8} {'preparo':>8} {'Mpx':>6} {'campos':>7} {'similar.':>9}")
+
+    for profile, results in all_results.items():
+        recalls = []
+        similarities = []
+
+        for image_path in images:
+            text = results['texts'][image_path]
+            expected_fields = key_fields(references[image_path])
+            if expected_fields:
+                recalls.append(len(expected_fields & key_fields(text)) / len(expected_fields))
+            similarities.append(
+                difflib.SequenceMatcher(None, references[image_path], text).ratio()
+            )
+
+        print(
+            f"{profile:<10} "
+            f"{statistics.mean(results['latencies']) * 1000:>6.0f}ms "
+            f"{percentile(results['latencies'], 0.95) * 1000:>6.0f}ms "
+            f"{statistics.mean(results['prepare']) * 1000:>6.0f}ms "
+            f"{statistics.mean(results['pixels']) / 1e6:>6.2f} "
+            f"{(statistics.mean(recalls) if recalls else 1.0) * 100:>6.0f}% "
+            f"{statistics.mean(similarities) * 100:>8.0f}%"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+from caches.ttl_cache import TTLCache
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str, default: Any = None) -> Any:
+        pass
+
+    @abstractmethod
+    def peek(self, key: str, default: Any = None) -> Any:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def clear(self):
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> dict:
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, max_size: int, default_ttl: float, sweep_interval: float = 60.0):
+        self._cache = TTLCache(max_size, default_ttl, sweep_interval)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        return self._cache.get(key, default)
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        return self._cache.peek(key, default)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, key: str) -> bool:
+        return self._cache.delete(key)
+
+    async def clear(self):
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return {'backend': 'memory', **self._cache.get_stats()}
+
+
+class SQLiteCacheBackend(CacheBackend):
+    def __init__(
+            self,
+            namespace: str,
+            path: str,
+            max_size: int,
+            default_ttl: float,
+            sweep_interval: float = 60.0,
+            local_ttl: float = 5.0,
+            invalidation_poll_interval: float = 1.0
+    ):
+        self.namespace = namespace
+        self.path = path
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self.local_ttl = local_ttl
+        self.invalidation_poll_interval = invalidation_poll_interval
+
+        # Cópia local de vida curta para não ir ao SQLite a cada mensagem
+        self._local = TTLCache(max_size, local_ttl, sweep_interval)
+        self._shared_hits = 0
+        self._shared_misses = 0
+        self._invalidations_applied = 0
+        self._evictions = 0
+        self._last_sweep = time.monotonic()
+        self._last_invalidation_poll = time.monotonic()
+        # O SQLite roda fora do loop (asyncio.to_thread); o lock serializa o uso da conexão
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE TABLE IF NOT EXISTS cache_invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                key TEXT,
+                created_at REAL NOT NULL
+            );
+        """)
+
+        row = self._connection.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM cache_invalidations"
+        ).fetchone()
+        self._last_invalidation_id = row[0]
+        self._shared_size = self._count_entries()
+
+        logger.info(f"🗄️ Cache compartilhado '{namespace}' em {path}")
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        await self._poll_invalidations()
+
+        value = self._local.get(key)
+        if value is not None:
+            return value
+
+        now = time.time()
+        row = await asyncio.to_thread(self._select, key, now)
+
+        if row is None:
+            self._shared_misses += 1
+            return default
+
+        self._shared_hits += 1
+        value = json.loads(row[0])
+        self._local.set(key, value, ttl=min(self.local_ttl, row[1] - now))
+        return value
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        # Só a cópia local: quem chama é síncrono e não pode esperar o SQLite
+        return self._local.peek(key, default)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.default_ttl
+
+        await asyncio.to_thread(self._write, key, json.dumps(value), time.time() + ttl)
+
+        self._local.set(key, value, ttl=min(self.local_ttl, ttl))
+        await self._maybe_sweep()
+
+    async def delete(self, key: str) -> bool:
+        deleted = await asyncio.to_thread(self._delete, key)
+
+        deleted_locally = self._local.delete(key)
+        return deleted > 0 or deleted_locally
+
+    async def clear(self):
+        await asyncio.to_thread(self._delete, None)
+
+        self._local.clear()
+
+    def get_stats(self) -> dict:
+        local_stats = self._local.get_stats()
+        hits = local_stats['hits'] + self._shared_hits
+        lookups = hits + self._shared_misses
+
+        return {
+            'backend': 'sqlite',
+            # Última contagem vista por esta instância; contar a cada scrape travaria o loop
+            'size': self._shared_size,
+            'local_size': local_stats['size'],
+            'hits': hits,
+            'local_hits': local_stats['hits'],
+            'shared_hits': self._shared_hits,
+            'misses': self._shared_misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'evictions': self._evictions,
+            'invalidations_applied': self._invalidations_applied
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _count_entries(self) -> int:
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()[0]
+
+    def _select(self, key: str, now: float) -> Optional[tuple]:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT value, expires_at FROM cache_entries "
+                "WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, now)
+            ).fetchone()
+
+    def _write(self, key: str, payload: str, expires_at: float):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.namespace, key, payload, expires_at)
+            )
+            self._evict_overflow()
+
+    def _delete(self, key: Optional[str]) -> int:
+        with self._lock, self._connection:
+            if key is None:
+                cursor = self._connection.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ?",
+                    (self.namespace,)
+                )
+            else:
+                cursor = self._connection.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                )
+            self._publish_invalidation(key)
+            self._shared_size = self._count_entries()
+            return cursor.rowcount
+
+    def _publish_invalidation(self, key: Optional[str]):
+        # As outras instâncias leem esta tabela e descartam suas cópias locais
+        self._connection.execute(
+            "INSERT INTO cache_invalidations (namespace, key, created_at) VALUES (?, ?, ?)",
+            (self.namespace, key, time.time())
+        )
+
+    def _evict_overflow(self):
+        size = self._count_entries()
+        if size > self.max_size:
+            # Primeiro as entradas vencidas; se não bastar, as gravadas há mais tempo
+            # (INSERT OR REPLACE gera um rowid novo a cada escrita)
+            size -= self._connection.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                (self.namespace, time.time())
+            ).rowcount
+
+        if size > self.max_size:
+            evicted = self._connection.execute(
+                "DELETE FROM cache_entries WHERE rowid IN ("
+                "SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY rowid LIMIT ?)",
+                (self.namespace, size - self.max_size)
+            ).rowcount
+            self._evictions += evicted
+            size -= evicted
+
+        self._shared_size = size
+
+    async def _poll_invalidations(self):
+        now = time.monotonic()
+        if now - self._last_invalidation_poll < self.invalidation_poll_interval:
+            return
+
+        self._last_invalidation_poll = now
+        rows = await asyncio.to_thread(self._fetch_invalidations)
+
+        for invalidation_id, key in rows:
+            if key is None:
+                self._local.clear()
+            else:
+                self._local.delete(key)
+            self._last_invalidation_id = max(self._last_invalidation_id, invalidation_id)
+
+        self._invalidations_applied += len(rows)
+
+    def _fetch_invalidations(self) -> list:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT id, key FROM cache_invalidations WHERE id > ? AND namespace = ? ORDER BY id",
+                (self._last_invalidation_id, self.namespace)
+            ).fetchall()
+
+    async def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval:
+            return
+
+        self._last_sweep = now
+        await asyncio.to_thread(self._sweep)
+
+    def _sweep(self):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM cache_entries WHERE expires_at <= ?",
+                (time.time(),)
+            )
+            # Invalidações antigas já foram lidas por todas as instâncias ativas
+            self._connection.execute(
+                "DELETE FROM cache_invalidations WHERE created_at <= ?",
+                (time.time() - 3600,)
+            )
+            self._shared_size = self._count_entries()
+
+
+def create_cache_backend(
+        namespace: str,
+        max_size: int,
+        default_ttl: float,
+        sweep_interval: float = 60.0
+) -> CacheBackend:
+    if config.CACHE_BACKEND == 'sqlite':
+        return SQLiteCacheBackend(
+            namespace=namespace,
+            path=config.CACHE_SQLITE_PATH,
+            max_size=max_size,
+            default_ttl=default_ttl,
+            sweep_interval=sweep_interval,
+            local_ttl=config.CACHE_LOCAL_TTL,
+            invalidation_poll_interval=config.CACHE_INVALIDATION_POLL_INTERVAL
+        )
+
+    if config.CACHE_BACKEND != 'memory':
+        logger.warning(f"Backend de cache desconhecido: {config.CACHE_BACKEND}, usando memória")
+
+    return MemoryCacheBackend(max_size, default_ttl, sweep_interval)
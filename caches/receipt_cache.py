@@ -0,0 +1,205 @@
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptCache:
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = path or config.RECEIPT_CACHE_PATH
+        self.max_bytes = max_bytes or config.RECEIPT_CACHE_MAX_BYTES
+        self._connection: Optional[sqlite3.Connection] = None
+        # Chamado via asyncio.to_thread; o lock serializa o uso da conexão e do contador de bytes
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._stats = {
+            'file_id_hits': 0,
+            'file_id_misses': 0,
+            'content_hits': 0,
+            'content_misses': 0,
+            'evictions': 0
+        }
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS ocr_results (
+                    content_hash TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_ocr_results_last_access
+                    ON ocr_results (last_access);
+                CREATE TABLE IF NOT EXISTS file_ids (
+                    file_unique_id TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_file_ids_content_hash
+                    ON file_ids (content_hash);
+            """)
+
+            row = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM ocr_results"
+            ).fetchone()
+            self._total_bytes = row[0]
+
+            logger.info(
+                f"🗄️ Cache de comprovantes aberto em {self.path} "
+                f"({self._total_bytes / 1024:.0f} KB)"
+            )
+
+        return self._connection
+
+    @staticmethod
+    def hash_content(file_bytes: bytes) -> str:
+        return hashlib.blake2b(file_bytes, digest_size=20).hexdigest()
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size:
+                # Mapeado em memória: o hash lê as páginas do arquivo sem copiá-lo para o heap
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+
+        return digest.hexdigest()
+
+    def get_by_file_id(self, file_unique_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._get_connection().execute(
+                "SELECT r.content_hash, r.text FROM file_ids f "
+                "JOIN ocr_results r ON r.content_hash = f.content_hash "
+                "WHERE f.file_unique_id = ?",
+                (file_unique_id,)
+            ).fetchone()
+
+            if row is None:
+                self._stats['file_id_misses'] += 1
+                return None
+
+            self._stats['file_id_hits'] += 1
+            self._touch(row[0])
+            return row[1]
+
+    def get_by_content(self, content_hash: str) -> Optional[str]:
+        with self._lock:
+            row = self._get_connection().execute(
+                "SELECT text FROM ocr_results WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+
+            if row is None:
+                self._stats['content_misses'] += 1
+                return None
+
+            self._stats['content_hits'] += 1
+            self._touch(content_hash)
+            return row[0]
+
+    def put(self, content_hash: str, text: str, file_unique_id: str = None):
+        with self._lock:
+            self._put(content_hash, text, file_unique_id)
+
+    def link_file_id(self, file_unique_id: str, content_hash: str):
+        with self._lock:
+            self._link_file_id(file_unique_id, content_hash)
+
+    def _put(self, content_hash: str, text: str, file_unique_id: str = None):
+        connection = self._get_connection()
+        size = len(text.encode('utf-8'))
+
+        with connection:
+            previous = connection.execute(
+                "SELECT size FROM ocr_results WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+
+            connection.execute(
+                "INSERT OR REPLACE INTO ocr_results (content_hash, text, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (content_hash, text, size, time.time())
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+
+        if file_unique_id:
+            self._link_file_id(file_unique_id, content_hash)
+
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _link_file_id(self, file_unique_id: str, content_hash: str):
+        connection = self._get_connection()
+
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO file_ids (file_unique_id, content_hash) VALUES (?, ?)",
+                (file_unique_id, content_hash)
+            )
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            'total_bytes': self._total_bytes,
+            'max_bytes': self.max_bytes
+        }
+
+    def _touch(self, content_hash: str):
+        with self._connection:
+            self._connection.execute(
+                "UPDATE ocr_results SET last_access = ? WHERE content_hash = ?",
+                (time.time(), content_hash)
+            )
+
+    def _evict(self):
+        # Remove os menos usados até ficar 10% abaixo do limite, evitando despejos a cada put
+        target_bytes = int(self.max_bytes * 0.9)
+        evicted = 0
+
+        with self._connection:
+            rows = self._connection.execute(
+                "SELECT content_hash, size FROM ocr_results ORDER BY last_access"
+            ).fetchall()
+
+            to_delete = []
+            for content_hash, size in rows:
+                if self._total_bytes <= target_bytes:
+                    break
+                to_delete.append((content_hash,))
+                self._total_bytes -= size
+                evicted += 1
+
+            self._connection.executemany(
+                "DELETE FROM ocr_results WHERE content_hash = ?", to_delete
+            )
+            self._connection.executemany(
+                "DELETE FROM file_ids WHERE content_hash = ?", to_delete
+            )
+
+        self._stats['evictions'] += evicted
+        logger.info(f"🗑️ {evicted} resultados removidos do cache de comprovantes")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+receipt_cache = ReceiptCache()
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._calls = 0
+        self._shared_calls = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+
+        if task is None:
+            # A chamada roda em uma task própria: se quem a iniciou for cancelado,
+            # os demais que aguardam o mesmo resultado não são afetados
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._calls += 1
+        else:
+            self._shared_calls += 1
+            logger.debug(f"🔗 Reaproveitando requisição em andamento para {key}")
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def get_stats(self) -> dict:
+        return {
+            'in_flight': len(self._in_flight),
+            'calls': self._calls,
+            'shared_calls': self._shared_calls
+        }
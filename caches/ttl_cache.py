@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    def __init__(
+            self,
+            max_size: int,
+            default_ttl: float,
+            sweep_interval: float = 60.0
+    ):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._last_sweep = time.monotonic()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self._misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._expirations += 1
+            self._misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        # Leitura sem efeitos: não conta acerto/erro nem renova a posição no LRU
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return default
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = time.monotonic()
+
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+        self._entries[key] = (value, now + (ttl if ttl is not None else self.default_ttl))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        self._entries.clear()
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+
+        for key in expired:
+            del self._entries[key]
+
+        self._expirations += len(expired)
+        self._last_sweep = now
+
+        if expired:
+            logger.debug(f"🧹 {len(expired)} entradas expiradas removidas do cache")
+
+        return len(expired)
+
+    def get_stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / lookups if lookups else 0.0,
+            'evictions': self._evictions,
+            'expirations': self._expirations
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
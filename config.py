@@ -12,4 +12,110 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
 TELEGRAM_CONNECT_TIMEOUT = float(os.getenv('TELEGRAM_CONNECT_TIMEOUT', '60.0'))
 TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', '60.0'))
 TELEGRAM_WRITE_TIMEOUT = float(os.getenv('TELEGRAM_WRITE_TIMEOUT', '60.0'))
-TELEGRAM_POOL_TIMEOUT = float(os.getenv('TELEGRAM_POOL_TIMEOUT', '60.0'))
\ No newline at end of file
+TELEGRAM_POOL_TIMEOUT = float(os.getenv('TELEGRAM_POOL_TIMEOUT', '60.0'))
+
+API_POOL_MAX_CONNECTIONS = int(os.getenv('API_POOL_MAX_CONNECTIONS', '100'))
+API_POOL_MAX_KEEPALIVE = int(os.getenv('API_POOL_MAX_KEEPALIVE', '20'))
+API_POOL_KEEPALIVE_EXPIRY = float(os.getenv('API_POOL_KEEPALIVE_EXPIRY', '30.0'))
+API_MAX_CONCURRENCY_PER_HOST = int(os.getenv('API_MAX_CONCURRENCY_PER_HOST', '20'))
+
+API_RETRY_ATTEMPTS = int(os.getenv('API_RETRY_ATTEMPTS', '3'))
+API_RETRY_BACKOFF_BASE = float(os.getenv('API_RETRY_BACKOFF_BASE', '0.25'))
+API_RETRY_BACKOFF_MAX = float(os.getenv('API_RETRY_BACKOFF_MAX', '2.0'))
+API_RETRY_BUDGET = float(os.getenv('API_RETRY_BUDGET', '15.0'))
+
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', '0.5'))
+CIRCUIT_BREAKER_MIN_REQUESTS = int(os.getenv('CIRCUIT_BREAKER_MIN_REQUESTS', '10'))
+CIRCUIT_BREAKER_WINDOW = float(os.getenv('CIRCUIT_BREAKER_WINDOW', '30.0'))
+CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', '15.0'))
+CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS = int(os.getenv('CIRCUIT_BREAKER_HALF_OPEN_MAX_CALLS', '2'))
+
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', '2'))
+OCR_QUEUE_SIZE = int(os.getenv('OCR_QUEUE_SIZE', '10'))
+OCR_JOB_TIMEOUT = float(os.getenv('OCR_JOB_TIMEOUT', '90.0'))
+OCR_WARMUP_ON_START = os.getenv('OCR_WARMUP_ON_START', 'true').lower() == 'true'
+OCR_WARMUP_TIMEOUT = float(os.getenv('OCR_WARMUP_TIMEOUT', '180.0'))
+
+OCR_PDF_RENDER_DPI = int(os.getenv('OCR_PDF_RENDER_DPI', '150'))
+OCR_PDF_MAX_RENDER_SIDE = int(os.getenv('OCR_PDF_MAX_RENDER_SIDE', '2200'))
+OCR_PDF_PAGE_THREADS = int(os.getenv('OCR_PDF_PAGE_THREADS', '2'))
+OCR_PDF_MAX_PAGES = int(os.getenv('OCR_PDF_MAX_PAGES', '10'))
+OCR_PDF_MAX_OCR_PAGES = int(os.getenv('OCR_PDF_MAX_OCR_PAGES', '4'))
+
+# O Telegram costuma enviar fotos com 90, 320, 800 e 1280 px no lado maior (1280 é a maior na
+# maioria dos casos): começar pela de 800 deixa uma versão maior para escalar se o OCR não convencer
+OCR_PHOTO_MIN_SIDE = int(os.getenv('OCR_PHOTO_MIN_SIDE', '800'))
+OCR_ESCALATION_MIN_CONFIDENCE = float(os.getenv('OCR_ESCALATION_MIN_CONFIDENCE', '0.6'))
+
+# Motores de OCR por tipo de entrada, tentados em ordem. O padrão ainda não foi medido com os
+# comprovantes reais: compare as cadeias com `python -m benchmarks.ocr_benchmark --engines`
+OCR_ENGINES_IMAGE = os.getenv('OCR_ENGINES_IMAGE', 'tesseract,easyocr')
+OCR_ENGINES_PDF = os.getenv('OCR_ENGINES_PDF', 'tesseract,easyocr')
+OCR_CASCADE_MIN_CONFIDENCE = float(os.getenv('OCR_CASCADE_MIN_CONFIDENCE', '0.75'))
+OCR_TESSERACT_LANG = os.getenv('OCR_TESSERACT_LANG', 'por+eng')
+OCR_TESSERACT_CONFIG = os.getenv('OCR_TESSERACT_CONFIG', '--oem 1 --psm 4')
+
+OCR_ROI_ENABLED = os.getenv('OCR_ROI_ENABLED', 'true').lower() == 'true'
+OCR_ROI_HEAD_LINES = int(os.getenv('OCR_ROI_HEAD_LINES', '6'))
+OCR_ROI_TAIL_LINES = int(os.getenv('OCR_ROI_TAIL_LINES', '12'))
+
+RECEIPT_CODES_ENABLED = os.getenv('RECEIPT_CODES_ENABLED', 'true').lower() == 'true'
+
+RECEIPT_MAX_FILE_SIZE = int(os.getenv('RECEIPT_MAX_FILE_SIZE', str(10 * 1024 * 1024)))
+RECEIPT_SPOOL_THRESHOLD = int(os.getenv('RECEIPT_SPOOL_THRESHOLD', str(2 * 1024 * 1024)))
+RECEIPT_SPOOL_DIR = os.getenv('RECEIPT_SPOOL_DIR', '')
+RECEIPT_DOWNLOAD_TIMEOUT = float(os.getenv('RECEIPT_DOWNLOAD_TIMEOUT', '60.0'))
+RECEIPT_DOWNLOAD_MAX_CONNECTIONS = int(os.getenv('RECEIPT_DOWNLOAD_MAX_CONNECTIONS', '10'))
+RECEIPT_DOWNLOAD_MAX_KEEPALIVE = int(os.getenv('RECEIPT_DOWNLOAD_MAX_KEEPALIVE', '5'))
+
+RECEIPT_QUEUE_ENABLED = os.getenv('RECEIPT_QUEUE_ENABLED', 'true').lower() == 'true'
+RECEIPT_QUEUE_PATH = os.getenv('RECEIPT_QUEUE_PATH', 'data/receipt_jobs.sqlite3')
+# Downloads e chamadas ao backend de um job se sobrepõem ao OCR de outro
+RECEIPT_QUEUE_WORKERS = int(os.getenv('RECEIPT_QUEUE_WORKERS', str(OCR_WORKERS * 2)))
+RECEIPT_QUEUE_MAX_ATTEMPTS = int(os.getenv('RECEIPT_QUEUE_MAX_ATTEMPTS', '3'))
+RECEIPT_QUEUE_RETRY_DELAY = float(os.getenv('RECEIPT_QUEUE_RETRY_DELAY', '10.0'))
+RECEIPT_QUEUE_POLL_INTERVAL = float(os.getenv('RECEIPT_QUEUE_POLL_INTERVAL', '5.0'))
+
+RECEIPT_CACHE_ENABLED = os.getenv('RECEIPT_CACHE_ENABLED', 'true').lower() == 'true'
+RECEIPT_CACHE_PATH = os.getenv('RECEIPT_CACHE_PATH', 'data/receipt_cache.sqlite3')
+RECEIPT_CACHE_MAX_BYTES = int(os.getenv('RECEIPT_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+OCR_PREPROCESS_PROFILE = os.getenv('OCR_PREPROCESS_PROFILE', 'balanced')
+
+AUTH_CACHE_MAX_SIZE = int(os.getenv('AUTH_CACHE_MAX_SIZE', '10000'))
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', '300'))
+AUTH_CACHE_NEGATIVE_TTL = float(os.getenv('AUTH_CACHE_NEGATIVE_TTL', '60'))
+AUTH_CACHE_SWEEP_INTERVAL = float(os.getenv('AUTH_CACHE_SWEEP_INTERVAL', '60'))
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', 'data/shared_cache.sqlite3')
+CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', '5'))
+CACHE_INVALIDATION_POLL_INTERVAL = float(os.getenv('CACHE_INVALIDATION_POLL_INTERVAL', '1'))
+
+SUMMARY_CACHE_MAX_SIZE = int(os.getenv('SUMMARY_CACHE_MAX_SIZE', '5000'))
+SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', '600'))
+
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', '0'))
+
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN', '')
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))
+
+UPDATE_CONCURRENCY_LIMIT = int(os.getenv('UPDATE_CONCURRENCY_LIMIT', '32'))
+UPDATE_MAX_PENDING = int(os.getenv('UPDATE_MAX_PENDING', '1000'))
+
+TRANSACTION_BULK_MAX_ITEMS = int(os.getenv('TRANSACTION_BULK_MAX_ITEMS', '20'))
+# O backend ainda não expõe POST /transactions/bulk; até lá cada linha vira um POST /transactions
+TRANSACTION_BULK_ENDPOINT_ENABLED = os.getenv('TRANSACTION_BULK_ENDPOINT_ENABLED', 'false').lower() == 'true'
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+
+PERSISTENCE_ENABLED = os.getenv('PERSISTENCE_ENABLED', 'true').lower() == 'true'
+PERSISTENCE_PATH = os.getenv('PERSISTENCE_PATH', 'data/bot_state.sqlite3')
+PERSISTENCE_UPDATE_INTERVAL = float(os.getenv('PERSISTENCE_UPDATE_INTERVAL', '5.0'))
\ No newline at end of file
@@ -1,10 +1,17 @@
-from telegram import Update
+import sqlite3
+from typing import Any, Dict, List
+from telegram import Document, PhotoSize, Update
 from telegram.ext import ContextTypes
+from services.receipt_downloader import receipt_downloader, ReceiptTooLargeError
+from services.receipt_job_queue import receipt_job_queue
 from services.transaction_service import TransactionService
 from services.user_service import UserService
 from messages.bot_messages import BotMessages
 from middlewares.auth_middleware import auth_middleware
+from metrics.app_metrics import PHOTO_SIZE_ATTEMPTS, RECEIPT_STAGE_DURATION
+import config
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +29,13 @@ class BotController:
 
         logger.info(f"Comando /start recebido de {user.first_name} (ID: {telegram_id})")
 
-        is_registered = await self.user_service.check_user_exists(telegram_id)
+        # Um "não cadastrado" em cache pode estar desatualizado, então só ele é reconsultado
+        is_registered = await auth_middleware.is_user_registered(
+            telegram_id,
+            trust_negative_cache=False
+        )
 
         if is_registered:
-            auth_middleware.clear_cache(telegram_id)
             await update.message.reply_text(
                 self.messages.get_welcome_back_message(user.first_name)
             )
@@ -108,26 +118,16 @@ class BotController:
 
         logger.info(f"Foto recebida de {user.first_name}")
 
-        await update.message.reply_text(self.messages.get_processing_message())
-
         try:
-            photo = update.message.photo[-1]
-            file = await context.bot.get_file(photo.file_id)
-            photo_bytes = await file.download_as_bytearray()
-
-            result = await self.transaction_service.process_receipt(
-                file_bytes=bytes(photo_bytes),
-                mime_type='image/jpeg',
-                telegram_id=telegram_id
-            )
-
-            await update.message.reply_text(result)
+            photo_sizes = receipt_downloader.pick_photo_sizes(update.message.photo)
+        except ReceiptTooLargeError:
+            await update.message.reply_text(self._get_file_too_large_message())
+            return
 
-        except Exception as e:
-            logger.error(f"Erro ao processar foto: {e}")
-            await update.message.reply_text(
-                self.messages.get_error_message("processar a foto")
-            )
+        await self._submit_receipt(update, context, telegram_id, {
+            'kind': 'photo',
+            'photos': [photo.to_dict() for photo in photo_sizes]
+        })
 
 
     @auth_middleware.require_auth()
@@ -146,26 +146,180 @@ class BotController:
             )
             return
 
-        await update.message.reply_text(self.messages.get_processing_message())
+        # Recusa antes de baixar: o Telegram já informa o tamanho do documento
+        try:
+            receipt_downloader.check_size(document.file_size)
+        except ReceiptTooLargeError:
+            await update.message.reply_text(self._get_file_too_large_message())
+            return
+
+        await self._submit_receipt(update, context, telegram_id, {
+            'kind': 'document',
+            'document': document.to_dict()
+        })
+
+
+    async def _submit_receipt(
+            self,
+            update: Update,
+            context: ContextTypes.DEFAULT_TYPE,
+            telegram_id: str,
+            payload: Dict[str, Any]
+    ):
+        processing_message = await update.message.reply_text(self._get_receipt_processing_message())
+
+        # Na fila, o handler termina aqui: um worker edita a mensagem "processando" com o resultado
+        if config.RECEIPT_QUEUE_ENABLED:
+            try:
+                await receipt_job_queue.enqueue(
+                    telegram_id, processing_message.chat_id, processing_message.message_id, payload
+                )
+                return
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao enfileirar comprovante, processando na hora: {e}")
+
+        try:
+            result = await self.process_receipt_job(context.bot, telegram_id, payload, raise_temporary=False)
+        except Exception as e:
+            logger.error(f"Erro ao processar comprovante: {e}")
+            result = self.get_receipt_failure_message(payload)
+
+        await update.message.reply_text(result)
 
+
+    async def process_receipt_job(
+            self,
+            bot,
+            telegram_id: str,
+            payload: Dict[str, Any],
+            raise_temporary: bool = True
+    ) -> str:
+        # Exceções sobem para a fila, que tenta de novo: inclusive as falhas passageiras (OCR ou
+        # backend sobrecarregados), que fora da fila viram resposta. Arquivo grande demais não
+        # muda com retentativa
         try:
-            file = await context.bot.get_file(document.file_id)
-            doc_bytes = await file.download_as_bytearray()
+            if payload['kind'] == 'photo':
+                photo_sizes = [PhotoSize.de_json(photo, bot) for photo in payload['photos']]
+                return await self._process_photo_sizes(bot, photo_sizes, telegram_id, raise_temporary)
 
-            result = await self.transaction_service.process_receipt(
-                file_bytes=bytes(doc_bytes),
-                mime_type=mime_type,
-                telegram_id=telegram_id
+            return await self._process_document(
+                bot, Document.de_json(payload['document'], bot), telegram_id, raise_temporary
             )
 
-            await update.message.reply_text(result)
+        except ReceiptTooLargeError:
+            return self._get_file_too_large_message()
 
-        except Exception as e:
-            logger.error(f"Erro ao processar documento: {e}")
-            await update.message.reply_text(
-                self.messages.get_error_message("processar o documento")
+
+    def get_receipt_failure_message(self, payload: Dict[str, Any]) -> str:
+        if payload['kind'] == 'photo':
+            return self.messages.get_error_message("processar a foto")
+        return self.messages.get_error_message("processar o documento")
+
+
+    async def _process_photo_sizes(
+            self,
+            bot,
+            photo_sizes: List[PhotoSize],
+            telegram_id: str,
+            raise_temporary: bool = False
+    ) -> str:
+        result = None
+
+        # Começa pelo menor tamanho suficiente; só baixa um maior se o OCR tiver baixa confiança
+        for index, photo in enumerate(photo_sizes):
+            is_largest = index == len(photo_sizes) - 1
+            result = await self._process_photo_size(
+                bot,
+                photo,
+                telegram_id,
+                min_confidence=None if is_largest else config.OCR_ESCALATION_MIN_CONFIDENCE,
+                raise_temporary=raise_temporary
             )
 
+            if result is not None:
+                PHOTO_SIZE_ATTEMPTS.inc('accepted')
+                break
+
+            PHOTO_SIZE_ATTEMPTS.inc('escalated')
+
+        return result
+
+
+    async def _process_photo_size(
+            self,
+            bot,
+            photo: PhotoSize,
+            telegram_id: str,
+            min_confidence: float = None,
+            raise_temporary: bool = False
+    ):
+        result = await self.transaction_service.process_cached_receipt(
+            photo.file_unique_id, telegram_id, raise_temporary=raise_temporary
+        )
+        if result is not None:
+            return result
+
+        started = time.perf_counter()
+        receipt_file = await receipt_downloader.download(
+            bot, photo.file_id, 'image/jpeg', photo.file_size
+        )
+        RECEIPT_STAGE_DURATION.observe('download', value=time.perf_counter() - started)
+
+        logger.info(f"🖼️ Foto {photo.width}x{photo.height} ({(photo.file_size or 0) / 1024:.0f} KB)")
+
+        try:
+            return await self.transaction_service.process_receipt(
+                source=receipt_file.source,
+                mime_type=receipt_file.mime_type,
+                telegram_id=telegram_id,
+                file_unique_id=photo.file_unique_id,
+                min_confidence=min_confidence,
+                raise_temporary=raise_temporary
+            )
+        finally:
+            receipt_file.cleanup()
+
+
+    async def _process_document(
+            self,
+            bot,
+            document: Document,
+            telegram_id: str,
+            raise_temporary: bool = False
+    ) -> str:
+        result = await self.transaction_service.process_cached_receipt(
+            document.file_unique_id, telegram_id, raise_temporary=raise_temporary
+        )
+        if result is not None:
+            return result
+
+        started = time.perf_counter()
+        receipt_file = await receipt_downloader.download(
+            bot, document.file_id, document.mime_type, document.file_size
+        )
+        RECEIPT_STAGE_DURATION.observe('download', value=time.perf_counter() - started)
+
+        try:
+            return await self.transaction_service.process_receipt(
+                source=receipt_file.source,
+                mime_type=receipt_file.mime_type,
+                telegram_id=telegram_id,
+                file_unique_id=document.file_unique_id,
+                raise_temporary=raise_temporary
+            )
+        finally:
+            receipt_file.cleanup()
+
+
+    def _get_file_too_large_message(self) -> str:
+        return self.messages.get_file_too_large_message(receipt_downloader.max_file_size_mb)
+
+    def _get_receipt_processing_message(self) -> str:
+        if self.transaction_service.is_ocr_ready:
+            return self.messages.get_processing_message()
+
+        return self.messages.get_ocr_warming_up_message()
+
 
     async def _handle_deletion_flow(
             self,
@@ -196,7 +350,7 @@ class BotController:
                 self.messages.get_delete_account_success()
             )
             context.user_data.clear()
-            auth_middleware.clear_cache(telegram_id)
+            await auth_middleware.clear_cache(telegram_id)
 
         elif result.get('status_code') == 404 or 'não corresponde' in result.get('message', '').lower():
             await update.message.reply_text(
@@ -248,7 +402,7 @@ class BotController:
                     self.messages.get_registration_success_message(name)
                 )
                 context.user_data.clear()
-                auth_middleware.clear_cache(telegram_id)
+                await auth_middleware.clear_cache(telegram_id)
             else:
                 await update.message.reply_text(
                     self.messages.get_registration_error_message(result.get('message'))
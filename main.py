@@ -1,5 +1,20 @@
+import asyncio
+import time
+
+_started_at = time.perf_counter()
+_init_started_at = _started_at
+
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 from controllers.bot_controller import BotController
+from apis.http_client import http_client_pool
+from services.receipt_downloader import receipt_downloader
+from services.ocr_worker_pool import ocr_worker_pool
+from caches.receipt_cache import receipt_cache
+from services.receipt_job_queue import receipt_job_queue
+from middlewares.update_scheduler import update_scheduler
+from metrics.app_metrics import register_collectors, timed_handler
+from metrics.server import metrics_server
+from persistence.sqlite_persistence import SQLitePersistence
 import config
 import logging
 import warnings
@@ -17,35 +32,144 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("telegram").setLevel(logging.WARNING)
 
 
+BOT_MODES = ('polling', 'webhook')
+
+
+def validate_bot_mode():
+    if config.BOT_MODE not in BOT_MODES:
+        raise ValueError(f"BOT_MODE inválido: '{config.BOT_MODE}' (use {' ou '.join(BOT_MODES)})")
+
+    # Sem o segredo, o endpoint público aceitaria atualizações forjadas de qualquer um
+    if config.BOT_MODE == 'webhook':
+        if not config.WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL não configurada para o modo webhook")
+        if not config.WEBHOOK_SECRET_TOKEN:
+            raise ValueError("WEBHOOK_SECRET_TOKEN não configurado: o modo webhook exige o segredo")
+
+
+def log_startup_phase(phase: str, phase_started_at: float):
+    now = time.perf_counter()
+    logger.info(
+        f"⏱️ {phase}: {now - phase_started_at:.3f}s "
+        f"(total desde o início: {now - _started_at:.3f}s)"
+    )
+
+
+async def on_startup(application: Application):
+    log_startup_phase("Conexão com o Telegram", _init_started_at)
+
+    if config.METRICS_ENABLED:
+        try:
+            await metrics_server.start()
+        except OSError as e:
+            logger.error(f"Não foi possível iniciar o servidor de métricas: {e}")
+
+    if config.OCR_WARMUP_ON_START:
+        ocr_worker_pool.start_warm_up()
+    else:
+        logger.info("OCR será carregado sob demanda no primeiro comprovante")
+
+    if config.RECEIPT_QUEUE_ENABLED:
+        await receipt_job_queue.start(application.bot)
+
+
+async def on_shutdown(application: Application):
+    await receipt_job_queue.stop()
+    await metrics_server.stop()
+    await http_client_pool.close()
+    await receipt_downloader.close()
+    ocr_worker_pool.shutdown()
+    receipt_cache.close()
+
+
 def main():
+    global _init_started_at
+
     if not hasattr(config, 'TELEGRAM_BOT_TOKEN') or not config.TELEGRAM_BOT_TOKEN:
         logger.error("Token do Telegram não configurado em 'config.py'!")
         return
 
+    validate_bot_mode()
+
+    log_startup_phase("Importação dos módulos", _started_at)
     logger.info("Construindo aplicação...")
 
+    phase_started_at = time.perf_counter()
+
     try:
-        application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+        builder = (
+            Application.builder()
+            .token(config.TELEGRAM_BOT_TOKEN)
+            .update_queue(asyncio.Queue(maxsize=config.UPDATE_QUEUE_SIZE))
+            .concurrent_updates(update_scheduler)
+            .post_init(on_startup)
+            .post_shutdown(on_shutdown)
+        )
+
+        if config.PERSISTENCE_ENABLED:
+            builder = builder.persistence(SQLitePersistence())
+
+        application = builder.build()
     except Exception as e:
         logger.error(f"Não foi possível iniciar a aplicação: {e}")
         return
 
+    log_startup_phase("Construção da aplicação", phase_started_at)
+
+    phase_started_at = time.perf_counter()
     controller = BotController()
 
-    application.add_handler(CommandHandler("start", controller.handle_start))
-    application.add_handler(CommandHandler("ajuda", controller.handle_help))
-    application.add_handler(CommandHandler("link", controller.handle_link))
-    application.add_handler(CommandHandler("resumo", controller.handle_summary))
-    application.add_handler(CommandHandler("exclusao", controller.handle_delete_account))
-    application.add_handler(MessageHandler(filters.PHOTO, controller.handle_photo))
-    application.add_handler(MessageHandler(filters.Document.ALL, controller.handle_document))
+    register_collectors(controller.transaction_service)
+    receipt_job_queue.set_handler(controller.process_receipt_job, controller.get_receipt_failure_message)
+
+    application.add_handler(CommandHandler("start", timed_handler("start", controller.handle_start)))
+    application.add_handler(CommandHandler("ajuda", timed_handler("ajuda", controller.handle_help)))
+    application.add_handler(CommandHandler("link", timed_handler("link", controller.handle_link)))
+    application.add_handler(CommandHandler("resumo", timed_handler("resumo", controller.handle_summary)))
+    application.add_handler(CommandHandler(
+        "exclusao",
+        timed_handler("exclusao", controller.handle_delete_account)
+    ))
+    application.add_handler(MessageHandler(
+        filters.PHOTO,
+        timed_handler("photo", controller.handle_photo)
+    ))
+    application.add_handler(MessageHandler(
+        filters.Document.ALL,
+        timed_handler("document", controller.handle_document)
+    ))
     application.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND,
-        controller.handle_message
+        timed_handler("message", controller.handle_message)
     ))
 
+    log_startup_phase("Controller e handlers", phase_started_at)
+
     logger.info("Bot iniciado com sucesso")
-    application.run_polling()
+    _init_started_at = time.perf_counter()
+
+    if config.BOT_MODE == 'webhook':
+        run_webhook(application)
+    else:
+        application.run_polling()
+
+
+def run_webhook(application: Application):
+    webhook_url = f"{config.WEBHOOK_URL.rstrip('/')}/{config.WEBHOOK_PATH}"
+    logger.info(
+        f"🌐 Webhook em {config.WEBHOOK_LISTEN}:{config.WEBHOOK_PORT}/{config.WEBHOOK_PATH} "
+        f"(máx. {config.WEBHOOK_MAX_CONNECTIONS} conexões)"
+    )
+
+    # O servidor embutido rejeita requisições sem o cabeçalho X-Telegram-Bot-Api-Secret-Token
+    application.run_webhook(
+        listen=config.WEBHOOK_LISTEN,
+        port=config.WEBHOOK_PORT,
+        url_path=config.WEBHOOK_PATH,
+        webhook_url=webhook_url,
+        secret_token=config.WEBHOOK_SECRET_TOKEN,
+        max_connections=config.WEBHOOK_MAX_CONNECTIONS
+    )
 
 
 if __name__ == "__main__":
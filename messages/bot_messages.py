@@ -106,6 +106,13 @@ class BotMessages:
     def get_processing_message() -> str:
         return "⏳ Processando... Por favor, aguarde."
 
+    @staticmethod
+    def get_ocr_warming_up_message() -> str:
+        return (
+            "🔥 O leitor de comprovantes está sendo iniciado.\n\n"
+            "Seu comprovante já está na fila e será processado em instantes."
+        )
+
     @staticmethod
     def get_error_message(action: str) -> str:
         return (
@@ -122,6 +129,14 @@ class BotMessages:
             "• Documentos PDF"
         )
 
+    @staticmethod
+    def get_file_too_large_message(max_size_mb: float) -> str:
+        return (
+            f"⚠️ Arquivo muito grande.\n\n"
+            f"Envie comprovantes de até {max_size_mb:.0f} MB, "
+            f"como uma foto ou um PDF só com as páginas do comprovante."
+        )
+
     @staticmethod
     def get_delete_account_confirmation() -> str:
         return (
@@ -0,0 +1,178 @@
+import re
+import time
+from functools import wraps
+from typing import Callable
+from metrics.registry import registry
+
+HANDLER_DURATION = registry.histogram(
+    'bot_handler_duration_seconds',
+    'Tempo de execução dos handlers do bot',
+    ['handler']
+)
+HANDLER_ERRORS = registry.counter(
+    'bot_handler_errors_total',
+    'Exceções não tratadas nos handlers do bot',
+    ['handler']
+)
+API_REQUEST_DURATION = registry.histogram(
+    'bot_api_request_duration_seconds',
+    'Duração das chamadas ao backend por endpoint e status',
+    ['method', 'endpoint', 'status']
+)
+API_RETRIES = registry.counter(
+    'bot_api_retries_total',
+    'Novas tentativas de chamadas ao backend',
+    ['endpoint']
+)
+CIRCUIT_BREAKER_REJECTIONS = registry.counter(
+    'bot_circuit_breaker_rejections_total',
+    'Chamadas recusadas na hora por circuito aberto',
+    ['endpoint']
+)
+RECEIPT_STAGE_DURATION = registry.histogram(
+    'bot_receipt_stage_duration_seconds',
+    'Duração de cada etapa do processamento de comprovantes',
+    ['stage']
+)
+PHOTO_SIZE_ATTEMPTS = registry.counter(
+    'bot_photo_size_attempts_total',
+    'Tamanhos de foto processados, por resultado (aceito ou escalado para um maior)',
+    ['outcome']
+)
+RECEIPT_CODE_READS = registry.counter(
+    'bot_receipt_code_reads_total',
+    'Comprovantes novos por código lido (nfce, pix, boleto) ou none quando foi preciso OCR',
+    ['kind']
+)
+RECEIPT_JOBS = registry.counter(
+    'bot_receipt_jobs_total',
+    'Jobs da fila de comprovantes por evento (enqueued, done, retried, failed, recovered)',
+    ['outcome']
+)
+OCR_ENGINE_PAGES = registry.counter(
+    'bot_ocr_engine_pages_total',
+    'Imagens e páginas cujo texto final veio de cada motor de OCR',
+    ['engine']
+)
+OCR_JOBS = registry.counter(
+    'bot_ocr_jobs_total',
+    'Jobs de OCR por resultado',
+    ['outcome']
+)
+
+
+def timed_handler(name: str, callback: Callable) -> Callable:
+    @wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_DURATION.observe(name, value=time.perf_counter() - started)
+
+    return wrapper
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    # Sem query string e sem IDs, para manter a cardinalidade dos labels baixa
+    path = endpoint.split('?')[0]
+    return re.sub(r'/\d+(?=/|$)', '/:id', path)
+
+
+# Valor numérico do estado do circuito para o gauge
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+def register_collectors(transaction_service):
+    from apis.resilience import circuit_breakers
+    from apis.user_api import UserAPI
+    from caches.receipt_cache import receipt_cache
+    from middlewares.auth_middleware import auth_middleware
+    from middlewares.update_scheduler import update_scheduler
+    from services.ocr_worker_pool import ocr_worker_pool
+    from services.receipt_job_queue import receipt_job_queue
+
+    def cache_stats() -> dict:
+        receipt_stats = receipt_cache.get_stats()
+        return {
+            'auth': auth_middleware.get_cache_stats(),
+            'summary': transaction_service.get_summary_cache_stats(),
+            'receipt_file_id': {
+                'hits': receipt_stats['file_id_hits'],
+                'misses': receipt_stats['file_id_misses']
+            },
+            'receipt_content': {
+                'hits': receipt_stats['content_hits'],
+                'misses': receipt_stats['content_misses']
+            }
+        }
+
+    registry.callback(
+        'bot_cache_hits_total', 'Acertos de cache', ['cache'],
+        lambda: {(name,): stats['hits'] for name, stats in cache_stats().items()},
+        metric_type='counter'
+    )
+    registry.callback(
+        'bot_cache_misses_total', 'Falhas de cache', ['cache'],
+        lambda: {(name,): stats['misses'] for name, stats in cache_stats().items()},
+        metric_type='counter'
+    )
+    registry.callback(
+        'bot_cache_entries', 'Entradas atualmente em cache', ['cache'],
+        lambda: {
+            ('auth',): auth_middleware.get_cache_stats()['size'],
+            ('summary',): transaction_service.get_summary_cache_stats()['size']
+        }
+    )
+    registry.callback(
+        'bot_receipt_cache_bytes', 'Tamanho do cache de comprovantes em bytes', [],
+        lambda: {(): receipt_cache.get_stats()['total_bytes']}
+    )
+
+    def queue_depths() -> dict:
+        scheduler_stats = update_scheduler.get_stats()
+        receipt_stats = receipt_job_queue.get_stats()
+        return {
+            ('ocr_jobs',): ocr_worker_pool.pending_jobs,
+            ('updates_pending',): scheduler_stats['pending'],
+            ('updates_active',): scheduler_stats['active'],
+            ('receipts_pending',): receipt_stats['pending'],
+            ('receipts_running',): receipt_stats['running'],
+            ('receipts_failed',): receipt_stats['failed']
+        }
+
+    registry.callback('bot_queue_depth', 'Itens aguardando ou em execução por fila', ['queue'], queue_depths)
+    registry.callback(
+        'bot_receipt_queue_oldest_age_seconds', 'Idade do comprovante mais antigo aguardando na fila', [],
+        lambda: {(): receipt_job_queue.get_stats()['oldest_pending_age']}
+    )
+
+    def parser_outcomes() -> dict:
+        stats = transaction_service.get_parser_stats()
+        return {('hit',): stats['hits'], ('miss',): stats['attempts'] - stats['hits']}
+
+    registry.callback(
+        'bot_local_parser_total', 'Mensagens avaliadas pelo parser local', ['outcome'],
+        parser_outcomes, metric_type='counter'
+    )
+
+    def user_lookup_outcomes() -> dict:
+        stats = UserAPI._lookups.get_stats()
+        return {('sent',): stats['calls'], ('coalesced',): stats['shared_calls']}
+
+    registry.callback(
+        'bot_user_lookups_total', 'Consultas de usuário ao backend', ['outcome'],
+        user_lookup_outcomes, metric_type='counter'
+    )
+
+    registry.callback(
+        'bot_circuit_breaker_state', 'Estado do circuito por endpoint (0 fechado, 1 meio aberto, 2 aberto)',
+        ['endpoint'],
+        lambda: {
+            (name,): CIRCUIT_STATE_VALUES[stats['state']]
+            for name, stats in circuit_breakers.get_stats().items()
+        }
+    )
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Optional
+from metrics.registry import registry
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsServer:
+    def __init__(self, host: str = None, port: int = None):
+        self.host = host or config.METRICS_HOST
+        self.port = port or config.METRICS_PORT
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        # Roda no próprio loop do bot: a leitura das métricas não concorre com os handlers
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"📈 Métricas disponíveis em http://{self.host}:{self.port}/metrics")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+
+            # Descarta os cabeçalhos da requisição
+            while True:
+                header = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if header in (b'\r\n', b'\n', b''):
+                    break
+
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+
+            if parts and parts[0] == 'GET' and path.split('?')[0] == '/metrics':
+                status = '200 OK'
+                body = registry.render().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                status = '404 Not Found'
+                body = b'not found\n'
+                content_type = 'text/plain; charset=utf-8'
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+        except Exception as e:
+            logger.warning(f"Erro ao servir métricas: {e}")
+
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+metrics_server = MetricsServer()
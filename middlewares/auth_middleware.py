@@ -3,7 +3,9 @@ from telegram.ext import ContextTypes
 from typing import Callable, Awaitable
 from functools import wraps
 from apis.user_api import UserAPI
+from caches.backends import create_cache_backend
 from messages.bot_messages import BotMessages
+import config
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,8 +15,14 @@ class AuthMiddleware:
     def __init__(self):
         self.user_api = UserAPI()
         self.messages = BotMessages()
-        self._user_cache = {}
-        self._cache_ttl = 300
+        self._cache_ttl = config.AUTH_CACHE_TTL
+        self._negative_cache_ttl = config.AUTH_CACHE_NEGATIVE_TTL
+        self._user_cache = create_cache_backend(
+            namespace='auth',
+            max_size=config.AUTH_CACHE_MAX_SIZE,
+            default_ttl=self._cache_ttl,
+            sweep_interval=config.AUTH_CACHE_SWEEP_INTERVAL
+        )
 
     def require_auth(
             self,
@@ -65,16 +73,25 @@ class AuthMiddleware:
 
         return decorator
 
-    async def _check_authentication(self, telegram_id: str, user) -> bool:
+    async def is_user_registered(
+            self,
+            telegram_id: str,
+            trust_negative_cache: bool = True
+    ) -> bool:
+        return await self._check_authentication(telegram_id, None, trust_negative_cache)
+
+    async def _check_authentication(
+            self,
+            telegram_id: str,
+            user,
+            trust_negative_cache: bool = True
+    ) -> bool:
         try:
             # Verifica cache primeiro
-            if telegram_id in self._user_cache:
-                cached_data = self._user_cache[telegram_id]
-
-                import time
-                if time.time() - cached_data['timestamp'] < self._cache_ttl:
-                    logger.debug(f"📦 Usuário {telegram_id} encontrado no cache")
-                    return cached_data['is_authenticated']
+            cached_data = await self._user_cache.get(telegram_id)
+            if cached_data is not None and (cached_data['is_authenticated'] or trust_negative_cache):
+                logger.debug(f"📦 Usuário {telegram_id} encontrado no cache")
+                return cached_data['is_authenticated']
 
             # Consulta a API
             logger.info(f"🔍 Verificando autenticação do usuário {telegram_id} na API")
@@ -84,15 +101,18 @@ class AuthMiddleware:
                 users = result.get('data', {}).get('users', [])
                 is_authenticated = bool(users)
 
-                import time
-                self._user_cache[telegram_id] = {
-                    'is_authenticated': is_authenticated,
-                    'timestamp': time.time(),
-                    'user_data': users[0] if users else None
-                }
+                # Usuários não cadastrados ficam menos tempo no cache
+                await self._user_cache.set(
+                    telegram_id,
+                    {
+                        'is_authenticated': is_authenticated,
+                        'user_data': users[0] if users else None
+                    },
+                    ttl=self._cache_ttl if is_authenticated else self._negative_cache_ttl
+                )
 
                 if is_authenticated:
-                    user_name = users[0].get('name', user.first_name)
+                    user_name = users[0].get('name', user.first_name if user else telegram_id)
                     logger.info(f"✅ Usuário autenticado: {user_name} ({telegram_id})")
                 else:
                     logger.warning(f"⚠️ Usuário não encontrado: {telegram_id}")
@@ -106,19 +126,22 @@ class AuthMiddleware:
             logger.error(f"Erro no middleware de autenticação: {e}", exc_info=True)
             return False
 
-    def clear_cache(self, telegram_id: str = None):
+    async def clear_cache(self, telegram_id: str = None):
         if telegram_id:
-            if telegram_id in self._user_cache:
-                del self._user_cache[telegram_id]
+            if await self._user_cache.delete(telegram_id):
                 logger.info(f"🗑️ Cache limpo para usuário {telegram_id}")
         else:
-            self._user_cache.clear()
+            await self._user_cache.clear()
             logger.info("🗑️ Todo o cache de autenticação foi limpo")
 
     def get_cached_user_data(self, telegram_id: str) -> dict:
-        if telegram_id in self._user_cache:
-            return self._user_cache[telegram_id].get('user_data')
+        cached_data = self._user_cache.peek(telegram_id)
+        if cached_data is not None:
+            return cached_data.get('user_data')
         return None
 
+    def get_cache_stats(self) -> dict:
+        return self._user_cache.get_stats()
+
 
 auth_middleware = AuthMiddleware()
\ No newline at end of file
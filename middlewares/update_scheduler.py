@@ -0,0 +1,110 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Hashable, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UserOrderedUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, concurrency_limit: int = None, max_pending: int = None):
+        # O semáforo da classe base limita as atualizações pendentes no total;
+        # o limite de execução simultânea é aplicado depois da fila por usuário
+        super().__init__(max_pending or config.UPDATE_MAX_PENDING)
+        self.concurrency_limit = concurrency_limit or config.UPDATE_CONCURRENCY_LIMIT
+        self._running = asyncio.Semaphore(self.concurrency_limit)
+        self._user_locks: Dict[Hashable, asyncio.Lock] = {}
+        self._user_pending: Dict[Hashable, int] = {}
+        self._pending = 0
+        self._active = 0
+        self._processed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @staticmethod
+    def _get_key(update: object) -> Optional[Hashable]:
+        if not isinstance(update, Update):
+            return None
+
+        if update.effective_chat:
+            return update.effective_chat.id
+        if update.effective_user:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._get_key(update)
+        queued_at = time.perf_counter()
+        self._pending += 1
+
+        if key is None:
+            lock = None
+        else:
+            lock = self._user_locks.setdefault(key, asyncio.Lock())
+            self._user_pending[key] = self._user_pending.get(key, 0) + 1
+
+        started = False
+
+        try:
+            # asyncio.Lock atende em ordem de chegada, preservando a ordem do usuário
+            if lock is not None:
+                await lock.acquire()
+
+            try:
+                async with self._running:
+                    self._record_wait(time.perf_counter() - queued_at)
+                    self._pending -= 1
+                    started = True
+                    self._active += 1
+                    try:
+                        await coroutine
+                    finally:
+                        self._active -= 1
+                        self._processed += 1
+            finally:
+                if lock is not None:
+                    lock.release()
+
+        finally:
+            if not started:
+                self._pending -= 1
+
+            if key is not None:
+                self._user_pending[key] -= 1
+                if not self._user_pending[key]:
+                    del self._user_pending[key]
+                    del self._user_locks[key]
+
+    def _record_wait(self, wait: float):
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+    def get_stats(self) -> dict:
+        return {
+            'pending': self._pending,
+            'active': self._active,
+            'processed': self._processed,
+            'concurrency_limit': self.concurrency_limit,
+            'users_waiting': len(self._user_pending),
+            'max_user_queue': max(self._user_pending.values(), default=0),
+            'avg_wait_seconds': self._total_wait / self._processed if self._processed else 0.0,
+            'max_wait_seconds': self._max_wait
+        }
+
+    async def initialize(self) -> None:
+        logger.info(
+            f"🚦 Escalonador por usuário ativo (até {self.concurrency_limit} atualizações simultâneas)"
+        )
+
+    async def shutdown(self) -> None:
+        stats = self.get_stats()
+        logger.info(
+            f"🚦 Escalonador encerrado: {stats['processed']} atualizações, "
+            f"espera média {stats['avg_wait_seconds'] * 1000:.0f}ms"
+        )
+
+
+update_scheduler = UserOrderedUpdateProcessor()
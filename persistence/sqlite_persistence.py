@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Set
+from telegram.ext import BasePersistence, PersistenceInput
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SQLitePersistence(BasePersistence):
+    def __init__(self, path: str = None, update_interval: float = None):
+        # Só o user_data guarda estado dos fluxos (cadastro, exclusão, resumo)
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval or config.PERSISTENCE_UPDATE_INTERVAL
+        )
+        self.path = path or config.PERSISTENCE_PATH
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._loaded: Set[int] = set()
+        self._snapshots: Dict[int, str] = {}
+        self._pending: Dict[int, Optional[str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stats = {'loads': 0, 'writes': 0, 'deletes': 0, 'batches': 0, 'skipped': 0}
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS user_data (
+                    user_id INTEGER PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            logger.info(f"💾 Estado dos usuários persistido em {self.path}")
+
+        return self._connection
+
+    async def get_user_data(self) -> Dict[int, Dict[str, Any]]:
+        # Nada é carregado na partida: cada usuário é lido na sua primeira mensagem
+        return {}
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict[str, Any]) -> None:
+        if user_id in self._loaded:
+            return
+
+        self._loaded.add(user_id)
+        stored = await asyncio.to_thread(self._load, user_id)
+        self._stats['loads'] += 1
+
+        if stored is not None:
+            self._snapshots[user_id] = stored
+            # O que já foi escrito nesta execução tem precedência sobre o disco
+            for key, value in json.loads(stored).items():
+                user_data.setdefault(key, value)
+
+    def _load(self, user_id: int) -> Optional[str]:
+        with self._lock:
+            row = self._get_connection().execute(
+                "SELECT data FROM user_data WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    async def update_user_data(self, user_id: int, data: Dict[str, Any]) -> None:
+        if not data:
+            self._queue_write(user_id, None)
+            return
+
+        try:
+            serialized = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Estado do usuário {user_id} não serializável, ignorado: {e}")
+            return
+
+        self._queue_write(user_id, serialized)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._queue_write(user_id, None)
+
+    def _queue_write(self, user_id: int, serialized: Optional[str]):
+        # Só vai ao disco quem mudou desde a última escrita (ou leitura) conhecida
+        if user_id in self._loaded and self._snapshots.get(user_id) == serialized:
+            self._stats['skipped'] += 1
+            return
+
+        self._pending[user_id] = serialized
+
+        # A aplicação chama update_user_data para vários usuários de uma vez;
+        # a tarefa roda depois de todos e grava o lote numa única transação
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        # Alterações que chegam durante a gravação entram no lote seguinte
+        while self._pending:
+            batch, self._pending = self._pending, {}
+
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao gravar estado de {len(batch)} usuário(s): {e}")
+                # Volta para a fila sem sobrescrever alterações mais novas
+                for user_id, serialized in batch.items():
+                    self._pending.setdefault(user_id, serialized)
+                return
+
+            for user_id, serialized in batch.items():
+                if serialized is None:
+                    self._snapshots.pop(user_id, None)
+                else:
+                    self._snapshots[user_id] = serialized
+
+    def _write_batch(self, batch: Dict[int, Optional[str]]):
+        now = time.time()
+        updates = [(user_id, data, now) for user_id, data in batch.items() if data is not None]
+        deletes = [(user_id,) for user_id, data in batch.items() if data is None]
+
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO user_data (user_id, data, updated_at) VALUES (?, ?, ?)",
+                    updates
+                )
+                connection.executemany("DELETE FROM user_data WHERE user_id = ?", deletes)
+
+        self._stats['writes'] += len(updates)
+        self._stats['deletes'] += len(deletes)
+        self._stats['batches'] += 1
+        logger.debug(f"💾 Estado gravado: {len(updates)} atualização(ões), {len(deletes)} remoção(ões)")
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._write_pending()
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+        logger.info(
+            f"💾 Persistência encerrada: {self._stats['writes']} gravações "
+            f"em {self._stats['batches']} lotes"
+        )
+
+    def get_stats(self) -> dict:
+        return {**self._stats, 'loaded_users': len(self._loaded), 'pending': len(self._pending)}
+
+    # Dados que este backend não guarda
+    async def get_chat_data(self) -> Dict[int, Any]:
+        return {}
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> Dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: Dict[Any, Any]) -> None:
+        pass
+
+    async def update_bot_data(self, data: Dict[Any, Any]) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Dict[Any, Any]) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Dict[Any, Any]) -> None:
+        pass
@@ -0,0 +1,207 @@
+from PIL import Image, ImageChops, ImageOps
+from typing import Any, Dict, Optional, Tuple
+import config
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PREPROCESS_PROFILES = {
+    'off': {
+        'max_side': None,
+        'target_text_height': None,
+        'grayscale': False,
+        'auto_orient': False,
+        'crop_borders': False
+    },
+    'fast': {
+        'max_side': 1280,
+        'target_text_height': 20,
+        'grayscale': True,
+        'auto_orient': True,
+        'crop_borders': True
+    },
+    'balanced': {
+        'max_side': 1800,
+        'target_text_height': 28,
+        'grayscale': True,
+        'auto_orient': True,
+        'crop_borders': True
+    },
+    'quality': {
+        'max_side': 2600,
+        'target_text_height': 40,
+        'grayscale': False,
+        'auto_orient': True,
+        'crop_borders': True
+    }
+}
+
+# Largura da miniatura usada nas heurísticas baratas (altura de texto, orientação, bordas)
+ANALYSIS_WIDTH = 400
+
+# Quanto a projeção por coluna precisa variar mais que a por linha para a imagem ser tida como deitada
+SIDEWAYS_VARIATION_RATIO = 1.3
+
+
+class ImagePreprocessor:
+    def __init__(self, profile: str = None):
+        self.profile_name = profile or config.OCR_PREPROCESS_PROFILE
+
+        if self.profile_name not in PREPROCESS_PROFILES:
+            logger.warning(
+                f"Perfil de pré-processamento desconhecido: {self.profile_name}, usando 'balanced'"
+            )
+            self.profile_name = 'balanced'
+
+        self.profile = PREPROCESS_PROFILES[self.profile_name]
+
+    @property
+    def grayscale(self) -> bool:
+        return self.profile['grayscale']
+
+    def prepare(self, image: Image.Image) -> Tuple[np.ndarray, Dict[str, Any]]:
+        profile = self.profile
+        read_options = {}
+        original_size = image.size
+
+        mode = 'L' if profile['grayscale'] else 'RGB'
+
+        if profile['max_side']:
+            # Em JPEG, decodifica direto em escala reduzida (1/2, 1/4, 1/8)
+            image.draft(mode, (profile['max_side'], profile['max_side']))
+
+        if profile['auto_orient']:
+            image = ImageOps.exif_transpose(image)
+
+        if image.mode != mode:
+            image = image.convert(mode)
+
+        analysis = self._make_analysis_image(image)
+
+        if profile['crop_borders']:
+            image, analysis = self._crop_borders(image, analysis)
+
+        if profile['auto_orient'] and self._is_sideways(analysis):
+            image = image.transpose(Image.Transpose.ROTATE_90)
+            analysis = analysis.transpose(Image.Transpose.ROTATE_90)
+            # Sem saber o sentido do giro, o EasyOCR testa também o texto de cabeça para baixo
+            read_options['rotation_info'] = [180]
+
+        image = self._resize(image, analysis)
+
+        logger.debug(
+            f"Pré-processamento '{self.profile_name}': {original_size} -> {image.size}"
+        )
+
+        return np.asarray(image), read_options
+
+    def _resize(self, image: Image.Image, analysis: Image.Image) -> Image.Image:
+        scale = 1.0
+
+        target_text_height = self.profile['target_text_height']
+        if target_text_height:
+            text_height = self._estimate_text_height(analysis)
+            if text_height:
+                text_height *= image.width / analysis.width
+                scale = min(scale, target_text_height / text_height)
+
+        max_side = self.profile['max_side']
+        if max_side:
+            scale = min(scale, max_side / max(image.size))
+
+        if scale >= 0.95:
+            return image
+
+        new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        return image.resize(new_size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+    @staticmethod
+    def _make_analysis_image(image: Image.Image) -> Image.Image:
+        analysis = image.convert('L') if image.mode != 'L' else image
+
+        if analysis.width > ANALYSIS_WIDTH:
+            height = max(1, round(analysis.height * ANALYSIS_WIDTH / analysis.width))
+            analysis = analysis.resize((ANALYSIS_WIDTH, height), Image.Resampling.BILINEAR)
+
+        return analysis
+
+    @staticmethod
+    def _ink_mask(analysis: Image.Image) -> np.ndarray:
+        pixels = np.asarray(analysis, dtype=np.float32)
+        return pixels < (pixels.mean() - pixels.std() * 0.5)
+
+    def _estimate_text_height(self, analysis: Image.Image) -> Optional[float]:
+        row_ink = self._ink_mask(analysis).mean(axis=1)
+        # Desconta a "tinta" constante de bordas e sombras presente em todas as linhas
+        text_rows = (row_ink - np.percentile(row_ink, 5)) > 0.02
+
+        # Comprimento das sequências de linhas com tinta ~ altura de uma linha de texto
+        runs = []
+        run = 0
+        for is_text in text_rows:
+            if is_text:
+                run += 1
+            elif run:
+                runs.append(run)
+                run = 0
+        if run:
+            runs.append(run)
+
+        runs = [r for r in runs if r >= 2]
+        if len(runs) < 3:
+            return None
+
+        return float(np.median(runs))
+
+    def _is_sideways(self, analysis: Image.Image) -> bool:
+        ink = self._ink_mask(analysis)
+        if ink.mean() < 0.005:
+            return False
+
+        # Com texto horizontal, a projeção por linha alterna entre linhas de texto e espaços
+        # (variação alta) e a projeção por coluna fica uniforme; deitado, acontece o contrário
+        row_profile = ink.mean(axis=1)
+        column_profile = ink.mean(axis=0)
+        row_variation = row_profile.std() / row_profile.mean()
+        column_variation = column_profile.std() / column_profile.mean()
+        return bool(column_variation > row_variation * SIDEWAYS_VARIATION_RATIO)
+
+    @staticmethod
+    def _crop_borders(
+            image: Image.Image,
+            analysis: Image.Image
+    ) -> Tuple[Image.Image, Image.Image]:
+        corners = [
+            analysis.getpixel((0, 0)),
+            analysis.getpixel((analysis.width - 1, 0)),
+            analysis.getpixel((0, analysis.height - 1)),
+            analysis.getpixel((analysis.width - 1, analysis.height - 1))
+        ]
+        background = Image.new('L', analysis.size, int(np.median(corners)))
+
+        difference = ImageChops.difference(analysis, background).point(
+            lambda value: 255 if value > 40 else 0
+        )
+        bbox = difference.getbbox()
+        if not bbox:
+            return image, analysis
+
+        left, top, right, bottom = bbox
+        area_ratio = ((right - left) * (bottom - top)) / (analysis.width * analysis.height)
+        if area_ratio > 0.9:
+            return image, analysis
+
+        margin = 4
+        left, top = max(0, left - margin), max(0, top - margin)
+        right, bottom = min(analysis.width, right + margin), min(analysis.height, bottom + margin)
+
+        ratio = image.width / analysis.width
+        image_box = (
+            int(left * ratio),
+            int(top * ratio),
+            min(image.width, int(right * ratio)),
+            min(image.height, int(bottom * ratio))
+        )
+
+        return image.crop(image_box), analysis.crop((left, top, right, bottom))
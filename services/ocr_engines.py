@@ -0,0 +1,139 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+import config
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Formato de resultado do EasyOCR, seguido por todos os motores: (caixa, texto, confiança 0..1)
+OCRResult = Tuple[list, str, float]
+
+
+class OCREngine(ABC):
+    name = ''
+    # Motores com detecção separada do reconhecimento permitem o OCR por regiões
+    supports_regions = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._available: Optional[bool] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._available is not None
+
+    @property
+    def is_available(self) -> bool:
+        self.load()
+        return self._available
+
+    def load(self):
+        if self._available is not None:
+            return
+
+        with self._lock:
+            if self._available is None:
+                started = time.perf_counter()
+                try:
+                    self._load()
+                    self._available = True
+                    logger.info(f"Motor de OCR {self.name} inicializado em {time.perf_counter() - started:.2f}s")
+                except Exception as e:
+                    self._available = False
+                    logger.warning(f"Motor de OCR {self.name} indisponível: {e}")
+
+    @abstractmethod
+    def _load(self):
+        pass
+
+    @abstractmethod
+    def readtext(self, image_np: np.ndarray, **read_options) -> List[OCRResult]:
+        pass
+
+
+class EasyOCREngine(OCREngine):
+    name = 'easyocr'
+    supports_regions = True
+
+    def __init__(self):
+        super().__init__()
+        self.reader = None
+
+    def _load(self):
+        # Importação adiada: easyocr carrega o torch, o que leva alguns segundos
+        import easyocr
+        self.reader = easyocr.Reader(['pt', 'en'], gpu=False)
+
+    def readtext(self, image_np: np.ndarray, **read_options) -> List[OCRResult]:
+        return self.reader.readtext(image_np, **read_options)
+
+    def detect(self, image_np: np.ndarray):
+        return self.reader.detect(image_np)
+
+    def recognize(self, image_np: np.ndarray, horizontal_list: list, free_list: list, **read_options) -> List[OCRResult]:
+        return self.reader.recognize(
+            image_np, horizontal_list=horizontal_list, free_list=free_list, **read_options
+        )
+
+
+class TesseractEngine(OCREngine):
+    name = 'tesseract'
+
+    def __init__(self):
+        super().__init__()
+        self._pytesseract = None
+
+    def _load(self):
+        import pytesseract
+        # Falha aqui se o binário do tesseract não estiver instalado
+        pytesseract.get_tesseract_version()
+        self._pytesseract = pytesseract
+
+    def readtext(self, image_np: np.ndarray, **read_options) -> List[OCRResult]:
+        # rotation_info e demais opções são do EasyOCR; o tesseract lê a imagem como veio
+        data = self._pytesseract.image_to_data(
+            image_np,
+            lang=config.OCR_TESSERACT_LANG,
+            config=config.OCR_TESSERACT_CONFIG,
+            output_type=self._pytesseract.Output.DICT
+        )
+
+        # O tesseract devolve palavras; agrupa por linha para ficar no formato do EasyOCR
+        lines: Dict[Tuple[int, int, int], List[int]] = {}
+        for index, word in enumerate(data['text']):
+            if word.strip() and float(data['conf'][index]) >= 0:
+                key = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+                lines.setdefault(key, []).append(index)
+
+        results = []
+        for indexes in lines.values():
+            left = min(data['left'][index] for index in indexes)
+            top = min(data['top'][index] for index in indexes)
+            right = max(data['left'][index] + data['width'][index] for index in indexes)
+            bottom = max(data['top'][index] + data['height'][index] for index in indexes)
+
+            text = ' '.join(data['text'][index].strip() for index in indexes)
+            confidence = sum(float(data['conf'][index]) for index in indexes) / len(indexes) / 100
+            results.append(([[left, top], [right, top], [right, bottom], [left, bottom]], text, confidence))
+
+        return results
+
+
+OCR_ENGINES = {
+    EasyOCREngine.name: EasyOCREngine,
+    TesseractEngine.name: TesseractEngine
+}
+
+
+def parse_engine_chain(value: str) -> List[str]:
+    names = []
+    for name in (part.strip().lower() for part in value.split(',')):
+        if name in OCR_ENGINES:
+            names.append(name)
+        elif name:
+            logger.warning(f"Motor de OCR desconhecido: {name}, ignorado")
+
+    return names or [EasyOCREngine.name]
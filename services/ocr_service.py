@@ -1,30 +1,78 @@
-import easyocr
 from PIL import Image
 import fitz
 import io
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple, Union
+from services.image_preprocessor import ImagePreprocessor
+from services.ocr_engines import OCR_ENGINES, EasyOCREngine, OCREngine, OCRResult, parse_engine_chain
+from services.receipt_codes import ReceiptCodeDecoder, receipt_code_parser
+import config
 import logging
 import numpy as np
+import re
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Palavras que acompanham o valor a pagar e o formato das datas do comprovante
+ROI_KEYWORD_PATTERN = re.compile(r'total|valor|r\$|pix', re.IGNORECASE)
+ROI_AMOUNT_PATTERN = re.compile(r'\d+[.,]\d{2}(?!\d)')
+ROI_DATE_PATTERN = re.compile(r'(?<!\d)\d{2}/\d{2}/\d{2,4}(?!\d)')
+
+# Abaixo disso o texto não serve ao backend (mesmo limite do process_receipt)
+CASCADE_MIN_TEXT_LENGTH = 10
+
 class OCRService:
-    def __init__(self):
-        self.reader = easyocr.Reader(['pt', 'en'], gpu=False)
-        logger.info("EasyOCR inicializado")
-    
-    def extract_text_from_image(self, image_bytes: bytes) -> Optional[str]:
+    def __init__(self, engine_chains: Dict[str, List[str]] = None):
+        self.preprocessor = ImagePreprocessor()
+        self.code_decoder = ReceiptCodeDecoder()
+        # Motores tentados em ordem, por tipo de entrada: o próximo só roda se o anterior não convencer
+        self.engine_chains = engine_chains or {
+            'image': parse_engine_chain(config.OCR_ENGINES_IMAGE),
+            'pdf': parse_engine_chain(config.OCR_ENGINES_PDF)
+        }
+        self._engines: Dict[str, OCREngine] = {
+            name: OCR_ENGINES[name]()
+            for name in dict.fromkeys(name for chain in self.engine_chains.values() for name in chain)
+        }
+        self._timings: Dict[str, float] = {}
+        self._timings_lock = threading.Lock()
+        self._box_scores: List[Tuple[int, float]] = []
+        self._engine_pages: Dict[str, int] = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        return all(engine.is_loaded for engine in self._engines.values())
+
+    def warm_up(self):
+        for engine in self._engines.values():
+            engine.load()
+
+    @contextmanager
+    def _time_stage(self, stage: str):
+        started = time.perf_counter()
         try:
-            image = Image.open(io.BytesIO(image_bytes))
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            # As páginas de PDF rodam em threads e somam no mesmo estágio
+            with self._timings_lock:
+                self._timings[stage] = self._timings.get(stage, 0.0) + elapsed
 
-            image_np = np.array(image)
+    def extract_text_from_image(self, image: Union[bytes, bytearray, str]) -> Optional[str]:
+        try:
+            with self._time_stage('preprocess'):
+                # Caminho em disco: o PIL lê o arquivo sob demanda, sem carregá-lo inteiro
+                image = Image.open(image if isinstance(image, str) else io.BytesIO(image))
+                image_np, read_options = self.preprocessor.prepare(image)
 
-            results = self.reader.readtext(image_np)
+            payload = self._read_codes(image_np)
+            if payload is not None:
+                return payload
 
-            text = '\n'.join([result[1] for result in results])
-            text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+            text = self._read_text(image_np, 'image', **read_options)
 
             logger.info(f"Texto extraído da imagem: {len(text)} caracteres")
             return text
@@ -32,25 +80,71 @@ class OCRService:
             logger.error(f"Erro ao extrair texto da imagem: {e}")
             return None
 
-    def extract_text_from_pdf(self, pdf_bytes: bytes) -> Optional[str]:
+    def extract_text_from_pdf(self, pdf: Union[bytes, bytearray, str]) -> Optional[str]:
         try:
-            document = fitz.open(stream=pdf_bytes, filetype="pdf")
-            full_text = []
+            if isinstance(pdf, str):
+                document = fitz.open(pdf, filetype="pdf")
+            else:
+                document = fitz.open(stream=pdf, filetype="pdf")
+            page_texts = {}
+            ocr_jobs = {}
+            page_threads = config.OCR_PDF_PAGE_THREADS
+
+            # Limita quantas páginas renderizadas ficam em memória ao mesmo tempo
+            in_flight = threading.BoundedSemaphore(page_threads + 1)
 
-            for page_num in range(len(document)):
-                page = document[page_num]
-                text = page.get_text()
+            with ThreadPoolExecutor(max_workers=page_threads) as executor:
+                for page_num in range(min(len(document), config.OCR_PDF_MAX_PAGES)):
+                    page = document[page_num]
+                    with self._time_stage('pdf_text'):
+                        text = page.get_text()
+
+                    if text.strip():
+                        page_texts[page_num] = text
+                        continue
+
+                    if len(ocr_jobs) >= config.OCR_PDF_MAX_OCR_PAGES:
+                        logger.info(
+                            f"Página {page_num + 1} ignorada: limite de "
+                            f"{config.OCR_PDF_MAX_OCR_PAGES} páginas com OCR atingido"
+                        )
+                        continue
 
-                if not text.strip():
                     logger.info(f"Página {page_num + 1} sem texto nativo, usando OCR...")
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    image_bytes = pix.tobytes("png")
-                    text = self.extract_text_from_image(image_bytes)
 
-                if text:
-                    full_text.append(text.strip())
+                    # Renderiza a próxima página enquanto as anteriores passam pelo OCR
+                    in_flight.acquire()
+                    with self._time_stage('pdf_render'):
+                        pix = self._render_page(page)
+
+                    payload = self._read_codes(self._pixmap_to_array(pix))
+                    if payload is not None:
+                        in_flight.release()
+                        for job in ocr_jobs.values():
+                            job.cancel()
+                        document.close()
+                        return payload
+
+                    job = executor.submit(self._read_pixmap, pix, page_num)
+                    job.add_done_callback(lambda _: in_flight.release())
+                    ocr_jobs[page_num] = job
+
+                for page_num, job in ocr_jobs.items():
+                    page_texts[page_num] = job.result()
+
+            if len(document) > config.OCR_PDF_MAX_PAGES:
+                logger.info(
+                    f"PDF com {len(document)} páginas: apenas as primeiras "
+                    f"{config.OCR_PDF_MAX_PAGES} foram lidas"
+                )
 
             document.close()
+
+            full_text = [
+                page_texts[page_num].strip()
+                for page_num in sorted(page_texts)
+                if page_texts[page_num] and page_texts[page_num].strip()
+            ]
             result = '\n\n'.join(full_text)
             logger.info(f"Texto extraído do PDF: {len(result)} caracteres")
             return result
@@ -58,11 +152,247 @@ class OCRService:
             logger.error(f"Erro ao extrair texto do PDF: {e}")
             return None
 
-    def process_file(self, file_bytes: bytes, mime_type: str) -> Optional[str]:
+    def _read_text(self, image_np: np.ndarray, input_type: str, **read_options) -> str:
+        engines = [
+            self._engines[name] for name in self.engine_chains[input_type]
+            if self._engines[name].is_available
+        ]
+        if not engines:
+            raise RuntimeError("Nenhum motor de OCR disponível")
+
+        for index, engine in enumerate(engines):
+            is_last = index == len(engines) - 1
+
+            try:
+                results = self._run_engine(engine, image_np, **read_options)
+            except Exception as e:
+                # Falha de um motor (ex.: binário ou idioma ausente) passa a vez ao próximo
+                if is_last:
+                    raise
+                logger.warning(f"Erro no OCR com {engine.name}: {e}, tentando {engines[index + 1].name}")
+                continue
+
+            text = '\n'.join([result[1] for result in results])
+            text = '\n'.join(line.strip() for line in text.split('\n') if line.strip())
+
+            # Confiança de cada caixa, pesada pelo tamanho do texto reconhecido
+            scores = [(len(result[1]), float(result[2])) for result in results]
+            confidence = self._weighted_confidence(scores)
+
+            if is_last or (
+                    len(text) >= CASCADE_MIN_TEXT_LENGTH
+                    and confidence is not None
+                    and confidence >= config.OCR_CASCADE_MIN_CONFIDENCE
+            ):
+                with self._timings_lock:
+                    self._box_scores.extend(scores)
+                    self._engine_pages[engine.name] = self._engine_pages.get(engine.name, 0) + 1
+                return text
+
+            logger.info(
+                f"OCR com {engine.name} insuficiente ({len(text)} caracteres, "
+                f"confiança {confidence or 0:.2f}), tentando {engines[index + 1].name}"
+            )
+
+    def _run_engine(self, engine: OCREngine, image_np: np.ndarray, **read_options) -> List[OCRResult]:
+        if engine.supports_regions and config.OCR_ROI_ENABLED:
+            return self._read_regions(engine, image_np, **read_options)
+
+        with self._time_stage('recognize' if engine.supports_regions else engine.name):
+            return engine.readtext(image_np, **read_options)
+
+    def _read_regions(self, engine: EasyOCREngine, image_np: np.ndarray, **read_options) -> List[OCRResult]:
+
+        with self._time_stage('detect'):
+            horizontal_list, free_list = engine.detect(image_np)
+        horizontal_list, free_list = horizontal_list[0], free_list[0]
+
+        if not horizontal_list and not free_list:
+            return []
+
+        lines = self._group_lines(horizontal_list)
+        head_count = config.OCR_ROI_HEAD_LINES
+        tail_count = config.OCR_ROI_TAIL_LINES
+
+        if len(lines) <= head_count + tail_count:
+            with self._time_stage('recognize'):
+                return engine.recognize(
+                    image_np, horizontal_list=horizontal_list, free_list=free_list, **read_options
+                )
+
+        # Estabelecimento, CNPJ e data ficam no topo; total e pagamento, no rodapé.
+        # Os itens do meio (a maior parte de um cupom de mercado) só são lidos se faltar algo
+        head, middle, tail = lines[:head_count], lines[head_count:-tail_count], lines[-tail_count:]
+        head_boxes = [box for line in head for box in line]
+        tail_boxes = [box for line in tail for box in line]
+
+        with self._time_stage('recognize_roi'):
+            results = engine.recognize(
+                image_np, horizontal_list=head_boxes + tail_boxes, free_list=free_list, **read_options
+            )
+
+        # Cada resultado volta para a sua linha pela posição da caixa, sem depender da ordem
+        roi_lines, unmatched = self._match_lines(head + tail, results)
+        if sum(len(line) for line in roi_lines) != len(head_boxes) + len(tail_boxes):
+            logger.warning("Resultados do OCR por regiões não batem com as caixas, lendo o comprovante inteiro")
+            with self._time_stage('recognize'):
+                return engine.recognize(
+                    image_np, horizontal_list=horizontal_list, free_list=free_list, **read_options
+                )
+
+        line_texts = [' '.join(result[1] for result in line) for line in roi_lines]
+        if self._has_key_fields(line_texts):
+            logger.debug(f"OCR por regiões: {len(head) + len(tail)} de {len(lines)} linhas lidas")
+            return [result for line in roi_lines for result in line] + unmatched
+
+        logger.info("Total ou data fora das regiões de interesse, lendo o comprovante inteiro")
+        with self._time_stage('recognize'):
+            middle_results = engine.recognize(
+                image_np, horizontal_list=[box for line in middle for box in line], free_list=[],
+                **read_options
+            )
+
+        middle_lines, middle_unmatched = self._match_lines(middle, middle_results)
+        ordered = roi_lines[:len(head)] + middle_lines + roi_lines[len(head):]
+        return [result for line in ordered for result in line] + middle_unmatched + unmatched
+
+    @staticmethod
+    def _match_lines(
+            lines: List[List[list]],
+            results: List[OCRResult]
+    ) -> Tuple[List[List[OCRResult]], List[OCRResult]]:
+        # O resultado pertence à linha cuja caixa ([x_min, x_max, y_min, y_max]) contém o seu centro;
+        # os que não caem em nenhuma (ex.: caixas inclinadas do free_list) seguem à parte
+        matched: List[List[OCRResult]] = [[] for _ in lines]
+        unmatched = []
+        for result in results:
+            center_x = sum(point[0] for point in result[0]) / len(result[0])
+            center_y = sum(point[1] for point in result[0]) / len(result[0])
+            index = next(
+                (
+                    index for index, line in enumerate(lines)
+                    if any(box[0] <= center_x <= box[1] and box[2] <= center_y <= box[3] for box in line)
+                ),
+                None
+            )
+            if index is None:
+                unmatched.append(result)
+            else:
+                matched[index].append(result)
+
+        for line in matched:
+            line.sort(key=lambda result: min(point[0] for point in result[0]))
+        return matched, unmatched
+
+    @staticmethod
+    def _group_lines(boxes: List[list]) -> List[List[list]]:
+        # Caixas do detector vêm como [x_min, x_max, y_min, y_max]; agrupa as que dividem a mesma linha
+        lines: List[List[list]] = []
+        for box in sorted(boxes, key=lambda box: (box[2] + box[3]) / 2):
+            if lines:
+                first = lines[-1][0]
+                if abs((box[2] + box[3]) - (first[2] + first[3])) / 2 <= (first[3] - first[2]) / 2:
+                    lines[-1].append(box)
+                    continue
+            lines.append([box])
+
+        for line in lines:
+            line.sort(key=lambda box: box[0])
+        return lines
+
+    @staticmethod
+    def _has_key_fields(line_texts: List[str]) -> bool:
+        if not any(ROI_DATE_PATTERN.search(text) for text in line_texts):
+            return False
+
+        # O valor costuma estar na mesma linha da palavra-chave ou logo abaixo dela
+        for index, text in enumerate(line_texts):
+            if ROI_KEYWORD_PATTERN.search(text):
+                nearby = ' '.join(line_texts[index:index + 2])
+                if ROI_AMOUNT_PATTERN.search(nearby):
+                    return True
+
+        return False
+
+    def _read_codes(self, image_np: np.ndarray) -> Optional[str]:
+        # QR code da NFC-e, BR Code do PIX ou código de barras de boleto dispensam o OCR;
+        # o conteúdo bruto segue como texto e é interpretado de novo no processo principal
+        if not config.RECEIPT_CODES_ENABLED:
+            return None
+
+        with self._time_stage('codes'):
+            payloads = self.code_decoder.decode(image_np)
+
+        for payload in payloads:
+            if receipt_code_parser.parse(payload) is not None:
+                logger.info("Código do comprovante lido, OCR dispensado")
+                return payload
+
+        return None
+
+    @staticmethod
+    def _pixmap_to_array(pix: fitz.Pixmap) -> np.ndarray:
+        # Usa os bytes do pixmap diretamente, sem codificar/decodificar PNG
+        samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+        shape = (pix.height, pix.width) if pix.n == 1 else (pix.height, pix.width, pix.n)
+        return np.frombuffer(samples, dtype=np.uint8).reshape(shape)
+
+    def _read_pixmap(self, pix: fitz.Pixmap, page_num: int) -> Optional[str]:
+        try:
+            return self._read_text(self._pixmap_to_array(pix), 'pdf')
+        except Exception as e:
+            logger.error(f"Erro no OCR da página {page_num + 1}: {e}")
+            return None
+
+    def _render_page(self, page: fitz.Page) -> fitz.Pixmap:
+        zoom = self._get_render_zoom(page)
+        colorspace = fitz.csGRAY if self.preprocessor.grayscale else fitz.csRGB
+        return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+
+    @staticmethod
+    def _get_render_zoom(page: fitz.Page) -> float:
+        zoom = config.OCR_PDF_RENDER_DPI / 72
+
+        # Em páginas escaneadas, renderizar acima da resolução da imagem não ajuda o OCR
+        native_zooms = [
+            info['width'] / fitz.Rect(info['bbox']).width
+            for info in page.get_image_info()
+            if fitz.Rect(info['bbox']).width > 0
+        ]
+        if native_zooms:
+            zoom = min(zoom, max(native_zooms))
+
+        longest_side = max(page.rect.width, page.rect.height)
+        zoom = min(zoom, config.OCR_PDF_MAX_RENDER_SIDE / longest_side)
+
+        return max(zoom, 1.0)
+
+    def process_file(self, source: Union[bytes, bytearray, str], mime_type: str) -> Optional[str]:
         if mime_type.startswith('image/'):
-            return self.extract_text_from_image(file_bytes)
+            return self.extract_text_from_image(source)
         elif mime_type == 'application/pdf':
-            return self.extract_text_from_pdf(file_bytes)
+            return self.extract_text_from_pdf(source)
         else:
             logger.warning(f"⚠️ Tipo de arquivo não suportado: {mime_type}")
-            return None
\ No newline at end of file
+            return None
+
+    def process_file_with_timings(self, source: Union[bytes, bytearray, str], mime_type: str) -> Dict[str, Any]:
+        self._timings = {}
+        self._box_scores = []
+        self._engine_pages = {}
+        text = self.process_file(source, mime_type)
+        return {
+            'text': text,
+            'confidence': self._weighted_confidence(self._box_scores),
+            'timings': dict(self._timings),
+            'engines': dict(self._engine_pages)
+        }
+
+    @staticmethod
+    def _weighted_confidence(scores: List[Tuple[int, float]]) -> Optional[float]:
+        # Sem caixas de OCR (texto nativo de PDF ou nada lido) não há confiança a medir
+        total_chars = sum(chars for chars, _ in scores)
+        if not total_chars:
+            return None
+
+        return sum(chars * score for chars, score in scores) / total_chars
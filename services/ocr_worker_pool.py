@@ -0,0 +1,239 @@
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Union
+from metrics.app_metrics import OCR_ENGINE_PAGES, OCR_JOBS, RECEIPT_STAGE_DURATION
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+_worker_ocr_service = None
+
+
+def _init_worker(threads_per_worker: int, preload_model: bool):
+    global _worker_ocr_service
+
+    # Processos 'spawn' não herdam a configuração de log do processo principal
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s[%(process)d] - %(levelname)s - %(message)s',
+        level=logging.INFO,
+        stream=sys.stdout
+    )
+
+    # Evita que cada processo use todos os núcleos e dispute CPU com os demais
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+
+    from services.ocr_service import OCRService
+    _worker_ocr_service = OCRService()
+
+    if preload_model:
+        _worker_ocr_service.warm_up()
+
+
+def _ping_worker() -> bool:
+    return _worker_ocr_service.is_loaded
+
+
+def _run_ocr_job(source: Union[bytes, bytearray, str], mime_type: str) -> Dict[str, Any]:
+    started_at = time.time()
+    result = _worker_ocr_service.process_file_with_timings(source, mime_type)
+    result['started_at'] = started_at
+    return result
+
+
+class OCRQueueFullError(Exception):
+    pass
+
+
+class OCRJobTimeoutError(Exception):
+    pass
+
+
+class OCRWorkerPool:
+    def __init__(
+            self,
+            max_workers: int = None,
+            max_queue_size: int = None,
+            job_timeout: float = None
+    ):
+        self.max_workers = max_workers or config.OCR_WORKERS
+        self.max_queue_size = max_queue_size if max_queue_size is not None else config.OCR_QUEUE_SIZE
+        self.job_timeout = job_timeout or config.OCR_JOB_TIMEOUT
+        self.preload_model = config.OCR_WARMUP_ON_START
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending_jobs = 0
+        self._is_ready = False
+        self._warm_up_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._is_ready
+
+    @property
+    def pending_jobs(self) -> int:
+        return self._pending_jobs
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue_size
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.max_workers)
+
+            # 'spawn' evita herdar o loop asyncio e as threads do processo principal
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(threads_per_worker, self.preload_model)
+            )
+            logger.info(
+                f"⚙️ Pool de OCR criado com {self.max_workers} processos "
+                f"({threads_per_worker} threads cada)"
+            )
+
+        return self._executor
+
+    def _reset_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._is_ready = False
+
+    def start_warm_up(self):
+        if self._warm_up_task is None:
+            self._warm_up_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self):
+        started = time.perf_counter()
+        logger.info("🔥 Aquecendo processos de OCR em segundo plano...")
+
+        try:
+            # Um job por processo força o spawn de todos os workers de uma vez
+            executor = self._get_executor()
+            jobs = [
+                asyncio.wrap_future(executor.submit(_ping_worker))
+                for _ in range(self.max_workers)
+            ]
+            await asyncio.wait_for(asyncio.gather(*jobs), timeout=config.OCR_WARMUP_TIMEOUT)
+
+            self._is_ready = True
+            logger.info(f"🔥 OCR pronto em {time.perf_counter() - started:.2f}s")
+
+        except Exception as e:
+            logger.error(f"Falha ao aquecer o OCR: {e}", exc_info=True)
+
+    def _release_slot(self):
+        self._pending_jobs -= 1
+
+    def _schedule_release(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._release_slot)
+        except RuntimeError:
+            # Loop já encerrado (desligamento do bot)
+            pass
+
+    def _recycle_executor(self, executor: ProcessPoolExecutor):
+        # Outro job que estourou o tempo já reciclou este pool
+        if executor is not self._executor:
+            return
+
+        # Cancelar o future não interrompe um job em execução: o processo seguiria ocupado até
+        # terminar. Os processos são encerrados e os jobs que estavam neles recebem
+        # BrokenProcessPool, que os manda para o pool novo
+        processes = list((executor._processes or {}).values())
+        self._executor = None
+        self._is_ready = False
+        executor.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
+
+        logger.warning(f"♻️ Pool de OCR reciclado: {len(processes)} processo(s) encerrado(s)")
+
+    def _submit_job(self, source: Union[bytes, bytearray, str], mime_type: str):
+        executor = self._get_executor()
+        try:
+            return executor, executor.submit(_run_ocr_job, source, mime_type)
+        except BrokenProcessPool:
+            logger.error("Pool de OCR quebrado, recriando processos")
+            self._reset_executor()
+            executor = self._get_executor()
+            return executor, executor.submit(_run_ocr_job, source, mime_type)
+
+    async def submit(self, source: Union[bytes, bytearray, str], mime_type: str) -> Dict[str, Any]:
+        # Um caminho de arquivo chega ao processo como uma string curta, sem serializar o conteúdo
+        if self._pending_jobs >= self.capacity:
+            OCR_JOBS.inc('rejected')
+            logger.warning(f"🚦 Fila de OCR cheia ({self._pending_jobs}/{self.capacity})")
+            raise OCRQueueFullError()
+
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(2):
+            executor, job = self._submit_job(source, mime_type)
+
+            # A vaga só é liberada quando o processo termina de fato (ou é encerrado)
+            submitted_at = time.time()
+            self._pending_jobs += 1
+            job.add_done_callback(lambda _: self._schedule_release(loop))
+
+            # Enquanto o modelo carrega, o job espera na fila além do tempo normal
+            timeout = self.job_timeout if self._is_ready else self.job_timeout + config.OCR_WARMUP_TIMEOUT
+
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(job), timeout=timeout)
+                self._is_ready = True
+                self._record_job_metrics(result, submitted_at)
+                return {'text': result['text'], 'confidence': result['confidence']}
+
+            except asyncio.TimeoutError:
+                # Ainda na fila, o job só é descartado; já num processo, é preciso reciclar o pool
+                if not job.cancel():
+                    self._recycle_executor(executor)
+                OCR_JOBS.inc('timeout')
+                logger.warning(f"⏱️ Job de OCR excedeu {timeout:.0f}s ({mime_type})")
+                raise OCRJobTimeoutError()
+
+            except BrokenProcessPool:
+                if attempt == 0 and executor is not self._executor:
+                    # Pool reciclado pelo timeout de outro job: este não tem culpa e roda de novo
+                    logger.info("Job de OCR interrompido pela reciclagem do pool, reenviando")
+                    continue
+
+                OCR_JOBS.inc('crashed')
+                logger.error("Processo de OCR encerrado inesperadamente", exc_info=True)
+                if executor is self._executor:
+                    self._reset_executor()
+                return {'text': None, 'confidence': None}
+
+    @staticmethod
+    def _record_job_metrics(result: Dict[str, Any], submitted_at: float):
+        OCR_JOBS.inc('success' if result['text'] else 'empty')
+
+        RECEIPT_STAGE_DURATION.observe('ocr_queue_wait', value=max(0.0, result['started_at'] - submitted_at))
+        RECEIPT_STAGE_DURATION.observe('ocr_total', value=time.time() - submitted_at)
+        for stage, elapsed in result['timings'].items():
+            RECEIPT_STAGE_DURATION.observe(f'ocr_{stage}', value=elapsed)
+        for engine, pages in result['engines'].items():
+            OCR_ENGINE_PAGES.inc(engine, amount=pages)
+
+    def shutdown(self):
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            self._warm_up_task.cancel()
+
+        if self._executor is not None:
+            self._reset_executor()
+            logger.info("⚙️ Pool de OCR encerrado")
+
+
+ocr_worker_pool = OCRWorkerPool()
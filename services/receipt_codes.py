@@ -0,0 +1,257 @@
+import re
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Chave de acesso da NF-e/NFC-e e código de barras de boleto têm 44 dígitos; a estrutura
+# (modelo e dígito verificador da chave, moeda do boleto) diz qual é qual
+CODE_44_PATTERN = re.compile(r'\d{44}')
+
+# Posições na chave de acesso da NF-e/NFC-e (44 dígitos)
+KEY_YEAR_MONTH = slice(2, 6)
+KEY_CNPJ = slice(6, 20)
+KEY_MODEL = slice(20, 22)
+KEY_EMISSION_TYPE = 34
+OFFLINE_EMISSION = '9'
+
+# Código de moeda do boleto bancário (posição 4): 9 = real
+BOLETO_CURRENCY_REAL = '9'
+
+PIX_GUI = 'br.gov.bcb.pix'
+
+
+def _format_cnpj(cnpj: str) -> str:
+    return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+
+
+def _mod11_digit(digits: str) -> int:
+    # Pesos de 2 a 9 da direita para a esquerda, como na chave de acesso e no boleto
+    total = sum(int(digit) * (2 + index % 8) for index, digit in enumerate(reversed(digits)))
+    return 11 - total % 11
+
+
+def _mod10_digit(digits: str) -> int:
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        product = int(digit) * (2 if index % 2 == 0 else 1)
+        total += product // 10 + product % 10
+    return (10 - total % 10) % 10
+
+
+def _crc16(payload: str) -> str:
+    # CRC16-CCITT (polinômio 0x1021, início 0xFFFF), exigido pelo BR Code do PIX
+    crc = 0xFFFF
+    for byte in payload.encode('utf-8'):
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return f"{crc:04X}"
+
+
+class ReceiptCodeDecoder:
+    def __init__(self):
+        self._qr_detector = None
+        self._pyzbar = None
+        self._available = None
+
+    def _load(self) -> bool:
+        if self._available is None:
+            # Importação adiada: o opencv vem junto com o easyocr; o pyzbar (libzbar) é opcional
+            # e acrescenta os códigos de barras (boletos) à leitura de QR codes
+            try:
+                import cv2
+                self._qr_detector = cv2.QRCodeDetector()
+            except ImportError:
+                logger.warning("opencv não instalado, leitura de QR code desativada")
+
+            try:
+                from pyzbar import pyzbar
+                self._pyzbar = pyzbar
+            except ImportError:
+                logger.debug("pyzbar não instalado, leitura de códigos de barras desativada")
+
+            self._available = self._qr_detector is not None or self._pyzbar is not None
+
+        return self._available
+
+    def decode(self, image_np: np.ndarray) -> List[str]:
+        if not self._load():
+            return []
+
+        payloads = []
+
+        if self._pyzbar is not None:
+            try:
+                payloads.extend(
+                    symbol.data.decode('utf-8', errors='replace')
+                    for symbol in self._pyzbar.decode(image_np)
+                )
+            except Exception as e:
+                logger.debug(f"Falha na leitura com pyzbar: {e}")
+
+        if not payloads and self._qr_detector is not None:
+            try:
+                data, _, _ = self._qr_detector.detectAndDecode(image_np)
+                if data:
+                    payloads.append(data)
+            except Exception as e:
+                logger.debug(f"Falha na leitura do QR code: {e}")
+
+        return payloads
+
+
+class ReceiptCodeParser:
+    def parse(self, payload: str, today: date = None) -> Optional[Dict[str, Any]]:
+        # Só conteúdos completos e com dígitos verificadores válidos viram transação;
+        # texto de OCR comum (várias linhas) nunca casa com estes formatos
+        payload = payload.strip()
+        today = today or date.today()
+
+        try:
+            if payload.lower().startswith(('http://', 'https://')):
+                return self._parse_nfce(payload, today)
+            if payload.startswith('000201'):
+                return self._parse_pix(payload, today)
+            if CODE_44_PATTERN.fullmatch(payload):
+                # O código de barras do DANFE é só a chave de acesso, sem valor: não vira transação
+                if self._is_valid_access_key(payload):
+                    return None
+                return self._parse_boleto(payload, today)
+        except (ValueError, IndexError) as e:
+            logger.debug(f"Código de comprovante inválido: {e}")
+
+        return None
+
+    def _parse_nfce(self, url: str, today: date) -> Optional[Dict[str, Any]]:
+        query = {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+
+        # Versão 2/3: p=chave|versão|ambiente|... ; versão 1: parâmetros chNFe, vNF, dhEmi
+        if 'p' in query:
+            fields = query['p'].split('|')
+            access_key = fields[0]
+            if not self._is_valid_access_key(access_key):
+                return None
+
+            # Só a emissão em contingência (offline) traz dia e valor no QR code
+            if access_key[KEY_EMISSION_TYPE] != OFFLINE_EMISSION or len(fields) < 5:
+                return None
+
+            year_month = access_key[KEY_YEAR_MONTH]
+            issued = date(2000 + int(year_month[:2]), int(year_month[2:]), int(fields[3]))
+            amount = float(fields[4])
+
+        elif 'chNFe' in query and 'vNF' in query:
+            access_key = query['chNFe']
+            if not self._is_valid_access_key(access_key):
+                return None
+
+            amount = float(query['vNF'])
+            issued = today
+            if 'dhEmi' in query:
+                # dhEmi vem em hexadecimal: "2024-03-15T10:20:30-03:00" codificado
+                issued = datetime.fromisoformat(bytes.fromhex(query['dhEmi']).decode('ascii')).date()
+
+        else:
+            return None
+
+        if amount <= 0:
+            return None
+
+        return {
+            'type': 'despesa',
+            'amount': round(amount, 2),
+            'description': f"Compra NFC-e CNPJ {_format_cnpj(access_key[KEY_CNPJ])}",
+            'date': issued.isoformat(),
+            'source': 'nfce'
+        }
+
+    @staticmethod
+    def _is_valid_access_key(access_key: str) -> bool:
+        if not CODE_44_PATTERN.fullmatch(access_key) or access_key[KEY_MODEL] not in ('55', '65'):
+            return False
+
+        digit = _mod11_digit(access_key[:43])
+        return int(access_key[43]) == (0 if digit >= 10 else digit)
+
+    def _parse_pix(self, payload: str, today: date) -> Optional[Dict[str, Any]]:
+        # O CRC cobre tudo até o identificador "6304", inclusive
+        if len(payload) < 8 or payload[-8:-4] != '6304' or _crc16(payload[:-4]) != payload[-4:].upper():
+            return None
+
+        fields = self._read_emv(payload)
+        account = self._read_emv(fields.get('26', ''))
+        if account.get('00', '').lower() != PIX_GUI or '54' not in fields:
+            return None
+
+        amount = float(fields['54'])
+        if amount <= 0:
+            return None
+
+        merchant = fields.get('59', '').strip()
+        return {
+            'type': 'despesa',
+            'amount': round(amount, 2),
+            'description': f"PIX {merchant}" if merchant else 'PIX',
+            'date': today.isoformat(),
+            'source': 'pix'
+        }
+
+    @staticmethod
+    def _read_emv(payload: str) -> Dict[str, str]:
+        # Formato TLV: ID de 2 dígitos, tamanho de 2 dígitos e o valor
+        fields = {}
+        position = 0
+        while position + 4 <= len(payload):
+            field_id = payload[position:position + 2]
+            length = int(payload[position + 2:position + 4])
+            fields[field_id] = payload[position + 4:position + 4 + length]
+            position += 4 + length
+        return fields
+
+    def _parse_boleto(self, barcode: str, today: date) -> Optional[Dict[str, Any]]:
+        if barcode[0] == '8':
+            # Arrecadação (contas de consumo e tributos): identificador 6 ou 8 indica valor em reais
+            if barcode[2] not in '68':
+                return None
+
+            payload = barcode[:3] + barcode[4:]
+            if barcode[2] == '6':
+                expected = _mod10_digit(payload)
+            else:
+                digit = _mod11_digit(payload)
+                expected = 0 if digit >= 10 else digit
+            if int(barcode[3]) != expected:
+                return None
+
+            amount = int(barcode[4:15]) / 100
+            description = 'Conta/tributo (código de barras)'
+
+        else:
+            if barcode[3] != BOLETO_CURRENCY_REAL:
+                return None
+
+            digit = _mod11_digit(barcode[:4] + barcode[5:])
+            if int(barcode[4]) != (1 if digit in (0, 10, 11) else digit):
+                return None
+
+            amount = int(barcode[9:19]) / 100
+            description = f"Boleto banco {barcode[:3]}"
+
+        if amount <= 0:
+            return None
+
+        return {
+            'type': 'despesa',
+            'amount': amount,
+            'description': description,
+            'date': today.isoformat(),
+            'source': 'boleto'
+        }
+
+
+receipt_code_parser = ReceiptCodeParser()
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+import httpx
+from telegram import PhotoSize
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+MIME_EXTENSIONS = {'application/pdf': '.pdf', 'image/png': '.png', 'image/webp': '.webp'}
+
+
+class ReceiptTooLargeError(Exception):
+    def __init__(self, size: Optional[int], max_size: int):
+        super().__init__(f"Arquivo de {size} bytes excede o limite de {max_size} bytes")
+        self.size = size
+        self.max_size = max_size
+
+
+@dataclass
+class ReceiptFile:
+    mime_type: str
+    size: int
+    content: Optional[bytearray] = None
+    path: Optional[str] = None
+    owns_path: bool = False
+
+    @property
+    def source(self) -> Union[bytearray, str]:
+        # Arquivos em disco seguem como caminho: o OCR lê direto dele, sem passar pela memória do bot
+        return self.path if self.path is not None else self.content
+
+    def cleanup(self):
+        if self.owns_path and self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class ReceiptDownloader:
+    def __init__(
+            self,
+            max_file_size: int = None,
+            spool_threshold: int = None,
+            spool_dir: str = None
+    ):
+        self.max_file_size = max_file_size or config.RECEIPT_MAX_FILE_SIZE
+        self.spool_threshold = spool_threshold if spool_threshold is not None else config.RECEIPT_SPOOL_THRESHOLD
+        self.spool_dir = spool_dir or config.RECEIPT_SPOOL_DIR or tempfile.gettempdir()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def max_file_size_mb(self) -> float:
+        return self.max_file_size / (1024 * 1024)
+
+    def check_size(self, file_size: Optional[int]):
+        if file_size is not None and file_size > self.max_file_size:
+            raise ReceiptTooLargeError(file_size, self.max_file_size)
+
+    def pick_photo_sizes(self, photos: Sequence[PhotoSize]) -> List[PhotoSize]:
+        # O Telegram manda a mesma foto em vários tamanhos; a lista começa pelo menor que já
+        # atinge a resolução mínima e segue com os maiores, para escalar se o OCR não convencer
+        fitting = sorted(
+            (photo for photo in photos if photo.file_size is None or photo.file_size <= self.max_file_size),
+            key=lambda photo: photo.width * photo.height
+        )
+        if not fitting:
+            raise ReceiptTooLargeError(min(photo.file_size or 0 for photo in photos), self.max_file_size)
+
+        start = next(
+            (
+                index for index, photo in enumerate(fitting)
+                if max(photo.width, photo.height) >= config.OCR_PHOTO_MIN_SIDE
+            ),
+            len(fitting) - 1
+        )
+        return fitting[start:]
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+
+        # Cliente próprio: sem os cabeçalhos do backend e sem disputar as conexões dele.
+        # O limite de conexões também limita quantos downloads correm ao mesmo tempo
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.RECEIPT_DOWNLOAD_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.RECEIPT_DOWNLOAD_MAX_KEEPALIVE
+                ),
+                timeout=config.RECEIPT_DOWNLOAD_TIMEOUT
+            )
+            self._loop = loop
+
+        return self._client
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
+        self._client = None
+        self._loop = None
+
+    async def download(
+            self,
+            bot,
+            file_id: str,
+            mime_type: str,
+            file_size: Optional[int] = None
+    ) -> ReceiptFile:
+        self.check_size(file_size)
+
+        file = await bot.get_file(file_id)
+        size = file.file_size or file_size
+        self.check_size(size)
+
+        file_path = getattr(file, 'file_path', None)
+
+        # Servidor local da Bot API: o arquivo já está em disco
+        if file_path and not file_path.startswith(('http://', 'https://')) and os.path.exists(file_path):
+            return ReceiptFile(mime_type, os.path.getsize(file_path), path=file_path)
+
+        if (size is not None and size <= self.spool_threshold) or not file_path:
+            content = await file.download_as_bytearray()
+            self.check_size(len(content))
+            return ReceiptFile(mime_type, len(content), content=content)
+
+        path, size = await self._stream_to_spool(file_path, mime_type)
+        return ReceiptFile(mime_type, size, path=path, owns_path=True)
+
+    async def _stream_to_spool(self, url: str, mime_type: str):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        descriptor, path = tempfile.mkstemp(
+            prefix='receipt-',
+            suffix=MIME_EXTENSIONS.get(mime_type, '.jpg'),
+            dir=self.spool_dir
+        )
+
+        size = 0
+        try:
+            client = self._get_client()
+            with os.fdopen(descriptor, 'wb') as spool:
+                async with client.stream('GET', url) as response:
+                    response.raise_for_status()
+
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        # file_size pode faltar ou mentir: o limite vale também durante o download
+                        self.check_size(size)
+                        spool.write(chunk)
+
+        except BaseException:
+            os.remove(path)
+            raise
+
+        # A URL contém o token do bot, então só o tamanho vai para o log
+        logger.info(f"📥 Comprovante de {size / 1024:.0f} KB gravado em disco")
+        return path, size
+
+
+receipt_downloader = ReceiptDownloader()
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from telegram.error import BadRequest
+from metrics.app_metrics import RECEIPT_JOBS, RECEIPT_STAGE_DURATION
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Jobs que esgotaram as tentativas ficam um tempo no banco para diagnóstico
+FAILED_RETENTION_SECONDS = 7 * 24 * 3600
+
+ReceiptJobHandler = Callable[[Any, str, Dict[str, Any]], Awaitable[str]]
+
+
+class ReceiptJobQueue:
+    def __init__(
+            self,
+            path: str = None,
+            workers: int = None,
+            max_attempts: int = None,
+            retry_delay: float = None
+    ):
+        self.path = path or config.RECEIPT_QUEUE_PATH
+        self.workers = workers or config.RECEIPT_QUEUE_WORKERS
+        self.max_attempts = max_attempts or config.RECEIPT_QUEUE_MAX_ATTEMPTS
+        self.retry_delay = retry_delay or config.RECEIPT_QUEUE_RETRY_DELAY
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._bot = None
+        self._handler: Optional[ReceiptJobHandler] = None
+        self._failure_message: Optional[Callable[[Dict[str, Any]], str]] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS receipt_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    telegram_id TEXT NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    message_id INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    outcome TEXT,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    next_attempt_at REAL NOT NULL
+                )
+            """)
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_receipt_jobs_due ON receipt_jobs (status, next_attempt_at)"
+            )
+            logger.info(f"📬 Fila de comprovantes em {self.path}")
+
+        return self._connection
+
+    def set_handler(self, handler: ReceiptJobHandler, failure_message: Callable[[Dict[str, Any]], str]):
+        # handler(bot, telegram_id, payload) devolve o texto da resposta; exceções viram nova tentativa
+        self._handler = handler
+        self._failure_message = failure_message
+
+    async def start(self, bot):
+        if self._handler is None:
+            raise RuntimeError("Fila de comprovantes iniciada sem handler")
+
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+
+        recovered = await asyncio.to_thread(self._recover)
+        if recovered:
+            RECEIPT_JOBS.inc('recovered', amount=recovered)
+            logger.info(f"📬 {recovered} comprovante(s) interrompido(s) voltaram para a fila")
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"receipt-worker-{index}")
+            for index in range(self.workers)
+        ]
+        logger.info(f"📬 {self.workers} workers de comprovantes iniciados")
+
+    def _recover(self) -> int:
+        # Jobs "em execução" numa partida só existem se o processo anterior parou no meio deles
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                # Quem já esgotou as tentativas (ex.: derrubou o processo todas as vezes) não roda
+                # de novo: volta para a fila só para o usuário receber a mensagem de erro
+                exhausted = connection.execute(
+                    """
+                    SELECT id, payload FROM receipt_jobs
+                    WHERE status = ? AND attempts >= ? AND result IS NULL
+                    """,
+                    (RUNNING, self.max_attempts)
+                ).fetchall()
+                connection.executemany(
+                    "UPDATE receipt_jobs SET result = ?, outcome = ?, last_error = ? WHERE id = ?",
+                    [
+                        (self._failure_message(json.loads(row['payload'])), FAILED, 'interrompido', row['id'])
+                        for row in exhausted
+                    ]
+                )
+
+                recovered = connection.execute(
+                    "UPDATE receipt_jobs SET status = ?, next_attempt_at = ? WHERE status = ?",
+                    (PENDING, time.time(), RUNNING)
+                ).rowcount
+                connection.execute(
+                    "DELETE FROM receipt_jobs WHERE status = ? AND created_at < ?",
+                    (FAILED, time.time() - FAILED_RETENTION_SECONDS)
+                )
+        return recovered
+
+    async def stop(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+        # Jobs interrompidos continuam "em execução" no banco e são retomados na próxima partida
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    async def enqueue(self, telegram_id: str, chat_id: int, message_id: int, payload: Dict[str, Any]) -> int:
+        job_id = await asyncio.to_thread(self._insert, telegram_id, chat_id, message_id, payload)
+        RECEIPT_JOBS.inc('enqueued')
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        return job_id
+
+    def _insert(self, telegram_id: str, chat_id: int, message_id: int, payload: Dict[str, Any]) -> int:
+        now = time.time()
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                return connection.execute(
+                    """
+                    INSERT INTO receipt_jobs
+                        (telegram_id, chat_id, message_id, payload, status, created_at, next_attempt_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (telegram_id, chat_id, message_id, json.dumps(payload), PENDING, now, now)
+                ).lastrowid
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+
+            try:
+                job = await asyncio.to_thread(self._claim_next)
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao ler a fila de comprovantes: {e}")
+                job = None
+
+            if job is None:
+                # Acorda com um job novo ou, no máximo, a cada intervalo para ver retentativas vencidas
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=config.RECEIPT_QUEUE_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(job)
+            except Exception as e:
+                # O job segue "em execução" no banco e é retomado na próxima partida
+                logger.error(f"Erro inesperado no comprovante {job['id']}: {e}", exc_info=True)
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                row = connection.execute(
+                    """
+                    SELECT * FROM receipt_jobs
+                    WHERE status = ? AND next_attempt_at <= ?
+                    ORDER BY id LIMIT 1
+                    """,
+                    (PENDING, time.time())
+                ).fetchone()
+                if row is None:
+                    return None
+
+                connection.execute(
+                    "UPDATE receipt_jobs SET status = ?, attempts = attempts + 1 WHERE id = ?",
+                    (RUNNING, row['id'])
+                )
+
+        job = dict(row)
+        job['attempts'] += 1
+        job['payload'] = json.loads(job['payload'])
+        return job
+
+    async def _run(self, job: Dict[str, Any]):
+        if job['attempts'] == 1:
+            RECEIPT_STAGE_DURATION.observe('queue_wait', value=max(0.0, time.time() - job['created_at']))
+
+        result, outcome = job['result'], job['outcome']
+
+        # Com o resultado já gravado, a transação foi criada e só falta responder: o comprovante
+        # não é processado de novo. Uma queda entre a criação e a gravação ainda pode repeti-lo
+        if result is None:
+            try:
+                result = await self._handler(self._bot, job['telegram_id'], job['payload'])
+            except Exception as e:
+                if await self._retry_later(job, e):
+                    return
+                result, outcome = self._failure_message(job['payload']), FAILED
+            else:
+                outcome = DONE
+
+            await asyncio.to_thread(self._store_result, job['id'], result, outcome)
+
+        try:
+            await self._reply(job, result)
+        except Exception as e:
+            if await self._retry_later(job, e):
+                return
+            outcome = FAILED
+
+        if outcome == FAILED:
+            await asyncio.to_thread(self._mark_failed, job['id'])
+        else:
+            await asyncio.to_thread(self._delete, job['id'])
+        RECEIPT_JOBS.inc(outcome)
+
+    async def _retry_later(self, job: Dict[str, Any], error: Exception) -> bool:
+        if job['attempts'] >= self.max_attempts:
+            logger.error(
+                f"❌ Comprovante {job['id']} falhou após {job['attempts']} tentativas: {error}",
+                exc_info=error
+            )
+            return False
+
+        delay = self.retry_delay * (2 ** (job['attempts'] - 1))
+        logger.warning(
+            f"🔁 Comprovante {job['id']} falhou (tentativa {job['attempts']}/{self.max_attempts}): "
+            f"{error}; nova tentativa em {delay:.0f}s"
+        )
+        await asyncio.to_thread(self._reschedule, job['id'], delay, str(error))
+        RECEIPT_JOBS.inc('retried')
+        return True
+
+    async def _reply(self, job: Dict[str, Any], text: str):
+        # A resposta substitui a mensagem "processando"; se ela sumiu, vai como mensagem nova
+        try:
+            await self._bot.edit_message_text(text, chat_id=job['chat_id'], message_id=job['message_id'])
+        except BadRequest as e:
+            logger.debug(f"Mensagem {job['message_id']} não editável ({e}), enviando nova")
+            await self._bot.send_message(job['chat_id'], text)
+
+    def _execute(self, query: str, parameters: tuple):
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                connection.execute(query, parameters)
+
+    def _store_result(self, job_id: int, result: str, outcome: str):
+        self._execute("UPDATE receipt_jobs SET result = ?, outcome = ? WHERE id = ?", (result, outcome, job_id))
+
+    def _reschedule(self, job_id: int, delay: float, error: str):
+        self._execute(
+            "UPDATE receipt_jobs SET status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+            (PENDING, time.time() + delay, error, job_id)
+        )
+
+    def _mark_failed(self, job_id: int):
+        self._execute("UPDATE receipt_jobs SET status = ? WHERE id = ?", (FAILED, job_id))
+
+    def _delete(self, job_id: int):
+        self._execute("DELETE FROM receipt_jobs WHERE id = ?", (job_id,))
+
+    def get_stats(self) -> dict:
+        stats = {PENDING: 0, RUNNING: 0, FAILED: 0, 'oldest_pending_age': 0.0}
+
+        with self._lock:
+            if self._connection is None:
+                return stats
+            rows = self._connection.execute(
+                "SELECT status, COUNT(*), MIN(created_at) FROM receipt_jobs GROUP BY status"
+            ).fetchall()
+
+        for status, count, oldest in rows:
+            stats[status] = count
+            if status == PENDING:
+                stats['oldest_pending_age'] = time.time() - oldest
+
+        return stats
+
+
+receipt_job_queue = ReceiptJobQueue()
@@ -0,0 +1,186 @@
+import re
+import unicodedata
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 1.234,56 | 1234,56 | 25,9 | 1.500 | 25.90 | 150 (com ou sem "R$" na frente)
+AMOUNT_PATTERN = re.compile(
+    r'(?<![\w/.,])(?:r\$\s*)?'
+    r'(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+,\d{1,2}|\d+\.\d{1,2}|\d+)'
+    r'(?:\s*(?:reais|real|conto|contos))?'
+    r'(?!\w)',
+    re.IGNORECASE
+)
+DATE_PATTERN = re.compile(r'(?<!\d)(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?(?!\d)')
+# "dia 12/03", "no dia 12/03", "em 12/03": a palavra que anuncia a data sai junto com ela
+DATE_PREFIX_PATTERN = re.compile(r'(?:\b(?:no|em)\s+)?(?:\bdia\s+)?$', re.IGNORECASE)
+RELATIVE_DATES = {
+    'hoje': 0,
+    'ontem': 1,
+    'anteontem': 2
+}
+
+INCOME_KEYWORDS = {
+    'recebi', 'recebido', 'recebimento', 'salario', 'ganhei', 'renda', 'reembolso',
+    'vendi', 'venda', 'freela', 'rendimento', 'rendimentos', 'entrada', 'receita'
+}
+EXPENSE_KEYWORDS = {
+    'paguei', 'pago', 'gastei', 'gasto', 'comprei', 'compra', 'despesa', 'conta',
+    'pagamento', 'saida'
+}
+# Verbos indicam o tipo, mas não fazem parte da descrição ("recebi salário" -> "salário")
+TYPE_VERBS = {'recebi', 'recebido', 'ganhei', 'vendi', 'paguei', 'pago', 'gastei', 'comprei'}
+FILLER_WORDS = {'de', 'do', 'da', 'no', 'na', 'em', 'com', 'o', 'a', 'um', 'uma', 'pra', 'para', 'r$'}
+
+# Número inteiro seguido de substantivo é quantidade, não valor: "3 parcelas", "2 pizzas"
+COUNT_NOUN_PATTERN = re.compile(r'\s*([^\W\d_]+)')
+# Palavras que podem vir logo depois de um valor: "50 no mercado", "50 e 30"
+AMOUNT_FOLLOWERS = FILLER_WORDS | {'e', 'pelo', 'pela', 'por', 'hoje', 'ontem', 'anteontem', 'dia'}
+
+# Mensagens longas tendem a ser frases ambíguas; ficam para o backend interpretar
+MAX_WORDS = 8
+
+
+def _normalize(word: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', word.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def find_amounts(text: str) -> List[re.Match]:
+    # Valores monetários do texto, sem datas ("12/03") nem quantidades ("3 parcelas")
+    text = DATE_PATTERN.sub(' ', text)
+
+    amounts = []
+    for match in AMOUNT_PATTERN.finditer(text):
+        if match.group(0).strip().isdigit():
+            following = COUNT_NOUN_PATTERN.match(text, match.end())
+            if following and _normalize(following.group(1)) not in AMOUNT_FOLLOWERS:
+                continue
+        amounts.append(match)
+
+    return amounts
+
+
+class TransactionParser:
+    def __init__(self):
+        self._attempts = 0
+        self._hits = 0
+
+    def parse(self, text: str, today: date = None) -> Optional[Dict[str, Any]]:
+        self._attempts += 1
+        today = today or date.today()
+
+        parsed = self._parse(text.strip(), today)
+        if parsed is not None:
+            self._hits += 1
+            logger.debug(f"⚡ Mensagem interpretada localmente: {parsed}")
+
+        return parsed
+
+    def _parse(self, text: str, today: date) -> Optional[Dict[str, Any]]:
+        if not text or '\n' in text or len(text.split()) > MAX_WORDS:
+            return None
+
+        transaction_date, text = self._extract_date(text, today)
+        if transaction_date is None:
+            return None
+
+        amounts = list(AMOUNT_PATTERN.finditer(text))
+        if len(amounts) != 1:
+            return None
+
+        amount = self._parse_amount(amounts[0].group(1))
+        if amount is None or amount <= 0:
+            return None
+
+        remaining = text[:amounts[0].start()] + ' ' + text[amounts[0].end():]
+        words = re.findall(r'[^\s,.;:!?]+', remaining)
+        normalized_words = [_normalize(word) for word in words]
+
+        is_income = any(word in INCOME_KEYWORDS for word in normalized_words)
+        is_expense = any(word in EXPENSE_KEYWORDS for word in normalized_words)
+        # Sem palavra-chave o tipo é um palpite ("bônus 1000", "pix do joão 200"): fica com o backend
+        if is_income == is_expense:
+            return None
+
+        # Sem digitos soltos: "2 pizzas 50" tem dois números e é ambíguo
+        if any(char.isdigit() for char in remaining):
+            return None
+
+        description_words = [
+            word for word, normalized in zip(words, normalized_words)
+            if normalized not in TYPE_VERBS
+        ]
+
+        # Preposições só saem das pontas: "conta de luz" mantém o "de"
+        while description_words and _normalize(description_words[0]) in FILLER_WORDS:
+            description_words.pop(0)
+        while description_words and _normalize(description_words[-1]) in FILLER_WORDS:
+            description_words.pop()
+
+        if not description_words:
+            return None
+
+        return {
+            'type': 'receita' if is_income else 'despesa',
+            'amount': amount,
+            'description': ' '.join(description_words),
+            'date': transaction_date.isoformat()
+        }
+
+    @staticmethod
+    def _extract_date(text: str, today: date):
+        match = DATE_PATTERN.search(text)
+        if match:
+            day, month, year = match.groups()
+            if year is None:
+                year = today.year
+            elif len(year) == 2:
+                year = 2000 + int(year)
+
+            try:
+                transaction_date = date(int(year), int(month), int(day))
+            except ValueError:
+                return None, text
+
+            # "25/12" digitado em janeiro se refere ao ano anterior
+            if match.group(3) is None and transaction_date > today:
+                try:
+                    transaction_date = transaction_date.replace(year=transaction_date.year - 1)
+                except ValueError:
+                    return None, text
+
+            start = match.start() - len(DATE_PREFIX_PATTERN.search(text[:match.start()]).group())
+            return transaction_date, text[:start] + ' ' + text[match.end():]
+
+        for word in text.split():
+            days_ago = RELATIVE_DATES.get(_normalize(word))
+            if days_ago is not None:
+                remaining = re.sub(rf'\b{re.escape(word)}\b', ' ', text, count=1)
+                return today - timedelta(days=days_ago), remaining
+
+        return today, text
+
+    @staticmethod
+    def _parse_amount(raw_amount: str) -> Optional[float]:
+        if ',' in raw_amount:
+            normalized = raw_amount.replace('.', '').replace(',', '.')
+        elif re.fullmatch(r'\d{1,3}(?:\.\d{3})+', raw_amount):
+            normalized = raw_amount.replace('.', '')
+        else:
+            normalized = raw_amount
+
+        try:
+            return round(float(normalized), 2)
+        except ValueError:
+            return None
+
+    def get_stats(self) -> dict:
+        return {
+            'attempts': self._attempts,
+            'hits': self._hits,
+            'hit_rate': self._hits / self._attempts if self._attempts else 0.0
+        }
@@ -1,44 +1,187 @@
-from typing import Dict, Any
+import asyncio
+import re
+from typing import Dict, Any, List, Optional, Union
 from apis.transaction_api import TransactionAPI
-from services.ocr_service import OCRService
+from caches.backends import create_cache_backend
+from caches.receipt_cache import receipt_cache
+from metrics.app_metrics import RECEIPT_CODE_READS
+from services.receipt_codes import receipt_code_parser
+from services.transaction_parser import TransactionParser, find_amounts
+from services.ocr_worker_pool import ocr_worker_pool, OCRQueueFullError, OCRJobTimeoutError
+import config
 import logging
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_TYPES = ('month', 'category')
+
+LINE_SEPARATOR_PATTERN = re.compile(r'[\n;]+')
+
+MIN_RECEIPT_TEXT_LENGTH = 10
+
+
+class TemporaryReceiptError(Exception):
+    pass
+
 
 class TransactionService:
     def __init__(self):
         self.transaction_api = TransactionAPI()
-        self.ocr_service = OCRService()
+        self.parser = TransactionParser()
+        self.code_parser = receipt_code_parser
+        self.ocr_pool = ocr_worker_pool
+        self.receipt_cache = receipt_cache if config.RECEIPT_CACHE_ENABLED else None
+        self._summary_cache = create_cache_backend(
+            namespace='summary',
+            max_size=config.SUMMARY_CACHE_MAX_SIZE,
+            default_ttl=config.SUMMARY_CACHE_TTL
+        )
+
+    @property
+    def is_ocr_ready(self) -> bool:
+        return self.ocr_pool.is_ready
 
     async def process_text_transaction(self, text: str, telegram_id: str) -> str:
+        candidates = self._split_transaction_candidates(text)
+
+        if len(candidates) > 1:
+            return await self._process_bulk_transactions(candidates, telegram_id)
+
+        return await self._create_transaction(text, telegram_id, self.parser.parse(text))
+
+    async def _create_transaction(
+            self,
+            text: str,
+            telegram_id: str,
+            parsed: Optional[Dict[str, Any]] = None,
+            raise_temporary: bool = False
+    ) -> str:
         result = await self.transaction_api.create_transaction(
             telegram_id=telegram_id,
-            original_message=text
+            original_message=text,
+            parsed=parsed
         )
 
         if result['success']:
+            await self._invalidate_summaries(telegram_id)
             return self._format_success_message(result['data'])
 
+        if raise_temporary and result.get('retryable'):
+            raise TemporaryReceiptError(result['message'])
+
         return f"⚠️ {result['message']}"
 
+    async def process_cached_receipt(
+            self,
+            file_unique_id: str,
+            telegram_id: str,
+            raise_temporary: bool = False
+    ) -> Optional[str]:
+        if self.receipt_cache is None:
+            return None
+
+        extracted_text = await asyncio.to_thread(self.receipt_cache.get_by_file_id, file_unique_id)
+        if extracted_text is None:
+            return None
+
+        logger.info(f"📦 Comprovante {file_unique_id} encontrado no cache, sem download")
+        return await self._process_extracted_text(extracted_text, telegram_id, raise_temporary=raise_temporary)
+
     async def process_receipt(
             self,
-            file_bytes: bytes,
+            source: Union[bytes, bytearray, str],
             mime_type: str,
-            telegram_id: str
-    ) -> str:
+            telegram_id: str,
+            file_unique_id: str = None,
+            min_confidence: float = None,
+            raise_temporary: bool = False
+    ) -> Optional[str]:
+        # Com min_confidence, um OCR de baixa confiança devolve None para o chamador tentar
+        # uma versão maior do arquivo; nada é registrado nem guardado em cache nesse caso.
+        # Com raise_temporary (fila), falhas passageiras viram exceção para uma nova tentativa
+        # em vez de resposta ao usuário
         logger.info(f"📄 Processando comprovante do tipo: {mime_type}")
 
-        extracted_text = self.ocr_service.process_file(file_bytes, mime_type)
+        content_hash = None
+        extracted_text = None
+
+        if self.receipt_cache is not None:
+            if isinstance(source, str):
+                content_hash = await asyncio.to_thread(self.receipt_cache.hash_file, source)
+            else:
+                content_hash = self.receipt_cache.hash_content(source)
+            extracted_text = await asyncio.to_thread(self.receipt_cache.get_by_content, content_hash)
+
+            if extracted_text is not None:
+                logger.info(f"📦 Conteúdo do comprovante encontrado no cache ({content_hash[:12]})")
+                if file_unique_id:
+                    await asyncio.to_thread(self.receipt_cache.link_file_id, file_unique_id, content_hash)
+
+        if extracted_text is None:
+            try:
+                ocr_result = await self.ocr_pool.submit(source, mime_type)
+            except OCRQueueFullError:
+                if raise_temporary:
+                    raise
+                return (
+                    "⏳ Muitos comprovantes sendo processados no momento. "
+                    "Aguarde alguns instantes e envie novamente."
+                )
+            except OCRJobTimeoutError:
+                if raise_temporary:
+                    raise
+                return (
+                    "⏱️ O processamento do comprovante demorou demais. "
+                    "Tente enviar uma imagem menor ou digite a transação manualmente."
+                )
+
+            extracted_text = ocr_result['text']
 
+            if min_confidence is not None and not self._is_confident(ocr_result, min_confidence):
+                logger.info(
+                    f"🔎 OCR com baixa confiança ({ocr_result['confidence'] or 0:.2f}), "
+                    f"tentando uma versão maior do arquivo"
+                )
+                return None
+
+            if config.RECEIPT_CODES_ENABLED and extracted_text:
+                code = self.code_parser.parse(extracted_text)
+                RECEIPT_CODE_READS.inc(code['source'] if code else 'none')
+
+            if extracted_text and content_hash is not None:
+                await asyncio.to_thread(self.receipt_cache.put, content_hash, extracted_text, file_unique_id)
+
+        return await self._process_extracted_text(extracted_text, telegram_id, raise_temporary=raise_temporary)
+
+    @staticmethod
+    def _is_confident(ocr_result: Dict[str, Any], min_confidence: float) -> bool:
+        text = ocr_result['text'] or ''
+        if len(text) < MIN_RECEIPT_TEXT_LENGTH:
+            return False
+
+        # Texto nativo de PDF não tem confiança de OCR e é sempre exato
+        confidence = ocr_result['confidence']
+        return confidence is None or confidence >= min_confidence
+
+    async def _process_extracted_text(
+            self,
+            extracted_text: Optional[str],
+            telegram_id: str,
+            raise_temporary: bool = False
+    ) -> str:
         if not extracted_text:
             return (
                 "❌ Não foi possível extrair texto do comprovante. "
                 "Tente enviar uma imagem mais nítida ou digite manualmente."
             )
 
-        if len(extracted_text) < 10:
+        # Conteúdo de QR code/código de barras já vem estruturado, sem interpretação no backend
+        code = self.code_parser.parse(extracted_text)
+        if code is not None:
+            logger.info(f"⚡ Comprovante lido pelo código ({code['source']}): R$ {code['amount']:.2f}")
+            return await self._create_transaction(extracted_text, telegram_id, code, raise_temporary=raise_temporary)
+
+        if len(extracted_text) < MIN_RECEIPT_TEXT_LENGTH:
             return (
                 "⚠️ Pouco texto identificado no comprovante. "
                 "Tente enviar uma imagem mais clara ou digite a transação manualmente."
@@ -49,16 +192,80 @@ class TransactionService:
             f"{extracted_text[:200]}..."
         )
 
-        return await self.process_text_transaction(extracted_text, telegram_id)
+        # O texto do comprovante vai inteiro: suas várias linhas descrevem uma única compra
+        return await self._create_transaction(extracted_text, telegram_id, raise_temporary=raise_temporary)
+
+    async def _process_bulk_transactions(
+            self,
+            candidates: List[str],
+            telegram_id: str
+    ) -> str:
+        logger.info(f"🧾 Enviando {len(candidates)} transações em lote")
+
+        max_items = config.TRANSACTION_BULK_MAX_ITEMS
+        created = []
+        failed = []
+
+        for start in range(0, len(candidates), max_items):
+            batch = candidates[start:start + max_items]
+            result = await self.transaction_api.create_transactions_bulk(
+                telegram_id,
+                batch,
+                [self.parser.parse(candidate) for candidate in batch]
+            )
+
+            if result['success']:
+                created.extend(result['data']['created'])
+                failed.extend(result['data']['failed'])
+            else:
+                failed.extend(
+                    {'original_message': candidate, 'message': result['message']}
+                    for candidate in batch
+                )
+
+        if created:
+            await self._invalidate_summaries(telegram_id)
+
+        return self._format_bulk_message(created, failed)
+
+    @staticmethod
+    def _split_transaction_candidates(text: str) -> List[str]:
+        lines = [line.strip() for line in LINE_SEPARATOR_PATTERN.split(text) if line.strip()]
+
+        # Só separa quando cada linha traz exatamente um valor; do contrário o texto é uma
+        # transação só ("gastei 50 no mercado\nno dia 12/03", "paguei 3 parcelas; total 300")
+        if len(lines) < 2 or not all(len(find_amounts(line)) == 1 for line in lines):
+            return [text]
+
+        return lines
 
     async def get_summary(self, telegram_id: str, summary_type: str) -> str:
+        cache_key = f"{telegram_id}:{summary_type}"
+        data = await self._summary_cache.get(cache_key)
+
+        if data is not None:
+            logger.debug(f"📦 Resumo '{summary_type}' de {telegram_id} encontrado no cache")
+            return self._format_summary(data, summary_type)
+
         result = await self.transaction_api.get_summary(telegram_id, summary_type)
         
         if not result['success']:
             return f"⚠️ {result['message']}"
-        
+
+        await self._summary_cache.set(cache_key, result['data'])
         return self._format_summary(result['data'], summary_type)
 
+    def get_parser_stats(self) -> dict:
+        return self.parser.get_stats()
+
+    def get_summary_cache_stats(self) -> dict:
+        return self._summary_cache.get_stats()
+
+    async def _invalidate_summaries(self, telegram_id: str):
+        # Uma nova transação muda todos os resumos do usuário
+        for summary_type in SUMMARY_TYPES:
+            await self._summary_cache.delete(f"{telegram_id}:{summary_type}")
+
     def _format_success_message(self, data: Dict[str, Any]) -> str:
         transaction_type = "Despesa" if data['type'] == "despesa" else "Receita"
 
@@ -72,6 +279,32 @@ class TransactionService:
 
         return message
     
+    def _format_bulk_message(
+            self,
+            created: List[Dict[str, Any]],
+            failed: List[Dict[str, Any]]
+    ) -> str:
+        if not created:
+            message = "⚠️ Nenhuma transação foi registrada.\n"
+        else:
+            label = "transação registrada" if len(created) == 1 else "transações registradas"
+            message = f"✅ {len(created)} {label}!\n"
+
+        for index, data in enumerate(created, start=1):
+            transaction_type = "Despesa" if data['type'] == "despesa" else "Receita"
+            message += (
+                f"\n{index}. 📂 {data['category']}"
+                f"\n    💰 {transaction_type}: R$ {data['amount']:.2f}"
+                f"\n    📝 {data['description']}\n"
+            )
+
+        if failed:
+            message += "\n⚠️ Não foi possível registrar:\n"
+            for error in failed:
+                message += f"• {error['original_message']}: {error['message']}\n"
+
+        return message
+
     def _format_summary(self, data: Dict[str, Any], summary_type: str) -> str:
         if not data or len(data) == 0:
             return "📊 Nenhuma transação encontrada."
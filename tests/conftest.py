@@ -0,0 +1,20 @@
+import pytest
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_clock(monkeypatch):
+    # Substitui a função de tempo indicada (ex.: time.monotonic) por um relógio controlado pelo teste
+    def install(module, name: str, now: float = 1000.0) -> FakeClock:
+        clock = FakeClock(now)
+        monkeypatch.setattr(module, name, clock)
+        return clock
+
+    return install
@@ -0,0 +1,78 @@
+import asyncio
+import httpx
+import pytest
+from apis import base_api
+from apis.base_api import BaseAPI
+from apis.resilience import CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(base_api.circuit_breakers, '_breakers', {})
+
+
+def request(monkeypatch, handler, method='POST'):
+    async def scenario():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(base_api.http_client_pool, 'get_client', lambda: client)
+        api = BaseAPI()
+        api.base_url = 'http://backend/api'
+        try:
+            return await api._request(method, '/transactions', {'telegram_id': '123'})
+        finally:
+            await client.aclose()
+
+    return asyncio.run(scenario())
+
+
+def _raise(error):
+    def handler(request):
+        raise error
+    return handler
+
+
+@pytest.mark.parametrize('handler, retryable', [
+    (lambda request: httpx.Response(201, json={'transaction': {}}), None),
+    (lambda request: httpx.Response(400, json={'message': 'inválido'}), None),
+    (lambda request: httpx.Response(404), None),
+    # Recusada antes de ser processada ou sem nunca ter saído: pode ser repetida
+    (lambda request: httpx.Response(503, json={'detail': 'manutenção'}), True),
+    (lambda request: httpx.Response(429), True),
+    (_raise(httpx.ConnectError('recusada')), True),
+    (_raise(httpx.ConnectTimeout('sem resposta do servidor')), True),
+    (_raise(httpx.PoolTimeout('pool cheio')), True),
+    # O POST pode ter criado a transação: repetir duplicaria
+    (lambda request: httpx.Response(502), None),
+    (lambda request: httpx.Response(504), None),
+    (_raise(httpx.ReadTimeout('lento')), None),
+    (_raise(httpx.RemoteProtocolError('conexão caiu')), None),
+    (_raise(httpx.ReadError('conexão caiu')), None),
+])
+def test_post_is_retryable_only_when_not_processed(monkeypatch, handler, retryable):
+    result = request(monkeypatch, handler)
+
+    assert result.get('retryable') is retryable
+
+
+@pytest.mark.parametrize('handler', [
+    lambda request: httpx.Response(502),
+    lambda request: httpx.Response(504),
+    _raise(httpx.ReadTimeout('lento')),
+    _raise(httpx.ReadError('conexão caiu')),
+])
+def test_idempotent_request_is_retryable_after_any_temporary_failure(monkeypatch, handler):
+    monkeypatch.setattr(base_api, 'backoff_delay', lambda attempt: 0)
+
+    result = request(monkeypatch, handler, method='GET')
+
+    assert result['retryable'] is True
+
+
+def test_open_circuit_is_retryable(monkeypatch):
+    breaker = CircuitBreaker('POST /transactions', min_requests=1, failure_rate=0.5)
+    breaker.record_failure()
+    monkeypatch.setattr(base_api.circuit_breakers, '_breakers', {'POST /transactions': breaker})
+
+    result = request(monkeypatch, lambda request: httpx.Response(201, json={}))
+
+    assert (result['success'], result['circuit_open'], result['retryable']) == (False, True, True)
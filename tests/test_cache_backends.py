@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from caches.backends import SQLiteCacheBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteCacheBackend(
+        namespace='auth',
+        path=str(tmp_path / 'cache.sqlite3'),
+        max_size=3,
+        default_ttl=60,
+        local_ttl=0.001
+    )
+    yield backend
+    backend.close()
+
+
+def _keys(backend: SQLiteCacheBackend) -> set:
+    rows = backend._connection.execute(
+        "SELECT key FROM cache_entries WHERE namespace = ?", (backend.namespace,)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def _set_all(backend: SQLiteCacheBackend, *items):
+    async def run():
+        for key, value, *ttl in items:
+            await backend.set(key, value, *ttl)
+
+    asyncio.run(run())
+
+
+def test_set_evicts_oldest_rows_beyond_max_size(backend):
+    _set_all(backend, *((key, key) for key in 'abcde'))
+
+    assert _keys(backend) == {'c', 'd', 'e'}
+    assert backend.get_stats()['evictions'] == 2
+
+
+def test_rewritten_key_counts_as_recent(backend):
+    _set_all(backend, ('a', 'a'), ('b', 'b'), ('c', 'c'), ('a', 'a2'), ('d', 'd'))
+
+    assert _keys(backend) == {'a', 'c', 'd'}
+
+
+def test_expired_rows_are_evicted_before_live_ones(backend):
+    _set_all(backend, ('a', 'a'), ('expired', 'x', -1), ('b', 'b'), ('c', 'c'))
+
+    assert _keys(backend) == {'a', 'b', 'c'}
+    assert backend.get_stats()['evictions'] == 0
+
+
+def test_other_namespaces_are_not_evicted(backend, tmp_path):
+    other = SQLiteCacheBackend(
+        namespace='summary', path=backend.path, max_size=3, default_ttl=60
+    )
+    try:
+        _set_all(other, ('kept', 1))
+        _set_all(backend, *((key, key) for key in 'abcd'))
+
+        assert _keys(other) == {'kept'}
+    finally:
+        other.close()
+
+
+def test_sqlite_calls_do_not_block_the_event_loop(backend):
+    _set_all(backend, ('a', 'a'))
+    backend._local.clear()
+
+    async def run():
+        # Com a conexão ocupada por outra thread, o loop continua atendendo outras tarefas
+        backend._lock.acquire()
+        lookup = asyncio.create_task(backend.get('a'))
+        await asyncio.sleep(0.05)
+        assert not lookup.done()
+        backend._lock.release()
+        return await lookup
+
+    assert asyncio.run(run()) == 'a'
+
+
+def test_peek_reads_only_the_local_copy(tmp_path):
+    backend = SQLiteCacheBackend(
+        namespace='auth', path=str(tmp_path / 'cache.sqlite3'), max_size=3, default_ttl=60, local_ttl=60
+    )
+    try:
+        _set_all(backend, ('a', 'a'))
+
+        assert backend.peek('a') == 'a'
+        backend._local.clear()
+        assert backend.peek('a') is None
+    finally:
+        backend.close()
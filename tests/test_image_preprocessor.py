@@ -0,0 +1,26 @@
+import io
+import pytest
+from PIL import Image
+from services.image_preprocessor import ImagePreprocessor
+
+fixtures = pytest.importorskip('benchmarks.fixtures')
+
+
+def _analysis(preprocessor: ImagePreprocessor, content: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(content)).convert('L')
+    analysis = preprocessor._make_analysis_image(image)
+    return preprocessor._crop_borders(image, analysis)[1]
+
+
+@pytest.mark.parametrize('fixture', [
+    fixture for fixture in fixtures.build_fixtures() if fixture.name.startswith('image_')
+], ids=lambda fixture: fixture.name)
+def test_is_sideways_detects_only_rotated_90(fixture):
+    preprocessor = ImagePreprocessor('balanced')
+    expected = fixture.name == 'image_rotated_90'
+    assert preprocessor._is_sideways(_analysis(preprocessor, fixture.content)) is expected
+
+
+def test_blank_image_is_not_sideways():
+    preprocessor = ImagePreprocessor('balanced')
+    assert preprocessor._is_sideways(Image.new('L', (300, 400), 255)) is False
@@ -0,0 +1,40 @@
+import pytest
+import main
+
+
+@pytest.mark.parametrize('settings', [
+    {'BOT_MODE': 'polling'},
+    {'BOT_MODE': 'polling', 'WEBHOOK_SECRET_TOKEN': ''},
+    {'BOT_MODE': 'webhook', 'WEBHOOK_URL': 'https://bot.exemplo.com', 'WEBHOOK_SECRET_TOKEN': 's3gr3d0'},
+])
+def test_accepts_valid_modes(monkeypatch, settings):
+    for name, value in settings.items():
+        monkeypatch.setattr(main.config, name, value)
+
+    main.validate_bot_mode()
+
+
+@pytest.mark.parametrize('settings, error', [
+    ({'BOT_MODE': 'webhok'}, 'BOT_MODE inválido'),
+    ({'BOT_MODE': ''}, 'BOT_MODE inválido'),
+    ({'BOT_MODE': 'Webhook'}, 'BOT_MODE inválido'),
+    ({'BOT_MODE': 'webhook', 'WEBHOOK_URL': '', 'WEBHOOK_SECRET_TOKEN': 's3gr3d0'}, 'WEBHOOK_URL'),
+    ({'BOT_MODE': 'webhook', 'WEBHOOK_URL': 'https://bot.exemplo.com', 'WEBHOOK_SECRET_TOKEN': ''}, 'WEBHOOK_SECRET_TOKEN'),
+])
+def test_refuses_unknown_mode_or_unauthenticated_webhook(monkeypatch, settings, error):
+    for name, value in settings.items():
+        monkeypatch.setattr(main.config, name, value)
+
+    with pytest.raises(ValueError, match=error):
+        main.validate_bot_mode()
+
+
+def test_main_does_not_start_webhook_without_secret(monkeypatch):
+    monkeypatch.setattr(main.config, 'TELEGRAM_BOT_TOKEN', '123:abc')
+    monkeypatch.setattr(main.config, 'BOT_MODE', 'webhook')
+    monkeypatch.setattr(main.config, 'WEBHOOK_URL', 'https://bot.exemplo.com')
+    monkeypatch.setattr(main.config, 'WEBHOOK_SECRET_TOKEN', '')
+    monkeypatch.setattr(main, 'run_webhook', lambda application: pytest.fail('webhook iniciado'))
+
+    with pytest.raises(ValueError):
+        main.main()
@@ -0,0 +1,167 @@
+import numpy as np
+import pytest
+from services import ocr_service
+from services.ocr_engines import OCREngine
+from services.ocr_service import OCRService
+
+IMAGE = np.zeros((10, 10), dtype=np.uint8)
+
+
+class FakeEngine(OCREngine):
+    def __init__(self, name: str, results=None, error: Exception = None):
+        super().__init__()
+        self.name = name
+        self.results = results or []
+        self.error = error
+        self.calls = 0
+
+    def _load(self):
+        pass
+
+    def readtext(self, image_np, **read_options):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.results
+
+
+def make_service(*engines: FakeEngine) -> OCRService:
+    service = OCRService(engine_chains={'image': [], 'pdf': []})
+    service.engine_chains['image'] = [engine.name for engine in engines]
+    service._engines = {engine.name: engine for engine in engines}
+    return service
+
+
+def _box():
+    return [[0, 0], [10, 0], [10, 5], [0, 5]]
+
+
+CONFIDENT = [(_box(), 'TOTAL R$ 45,90 12/03/2024', 0.95)]
+WEAK = [(_box(), 'T0TAL', 0.3)]
+
+
+@pytest.mark.parametrize('first, expected_text, second_calls', [
+    (FakeEngine('primeiro', CONFIDENT), 'TOTAL R$ 45,90 12/03/2024', 0),
+    (FakeEngine('primeiro', WEAK), 'segundo', 1),
+    (FakeEngine('primeiro', error=RuntimeError('tesseract ausente')), 'segundo', 1),
+])
+def test_cascade_moves_to_next_engine_when_needed(first, expected_text, second_calls):
+    second = FakeEngine('segundo', [(_box(), 'segundo', 0.9)])
+    service = make_service(first, second)
+
+    assert service._read_text(IMAGE, 'image') == expected_text
+    assert second.calls == second_calls
+
+
+def test_cascade_raises_when_last_engine_fails():
+    service = make_service(
+        FakeEngine('primeiro', error=RuntimeError('falha 1')),
+        FakeEngine('segundo', error=RuntimeError('falha 2'))
+    )
+
+    with pytest.raises(RuntimeError, match='falha 2'):
+        service._read_text(IMAGE, 'image')
+
+
+def test_last_engine_result_is_kept_even_when_weak():
+    service = make_service(FakeEngine('primeiro', WEAK), FakeEngine('segundo', WEAK))
+
+    assert service._read_text(IMAGE, 'image') == 'T0TAL'
+    assert service._engine_pages == {'segundo': 1}
+
+
+class MissingEngine(FakeEngine):
+    def _load(self):
+        raise ImportError('pytesseract não instalado')
+
+
+def test_no_available_engine_raises():
+    service = make_service(MissingEngine('primeiro'))
+
+    with pytest.raises(RuntimeError, match='Nenhum motor'):
+        service._read_text(IMAGE, 'image')
+
+
+@pytest.mark.parametrize('boxes, expected', [
+    ([], []),
+    # Mesma linha, fora de ordem: ordena da esquerda para a direita
+    ([[50, 90, 10, 30], [0, 40, 12, 31]], [[[0, 40, 12, 31], [50, 90, 10, 30]]]),
+    # Linhas distintas, ordenadas de cima para baixo
+    ([[0, 40, 50, 70], [0, 40, 10, 30]], [[[0, 40, 10, 30]], [[0, 40, 50, 70]]]),
+    # Centro deslocado em até meia altura ainda é a mesma linha
+    ([[0, 40, 10, 30], [50, 90, 19, 39]], [[[0, 40, 10, 30], [50, 90, 19, 39]]]),
+    ([[0, 40, 10, 30], [50, 90, 21, 41]], [[[0, 40, 10, 30]], [[50, 90, 21, 41]]]),
+])
+def test_group_lines(boxes, expected):
+    assert OCRService._group_lines(boxes) == expected
+
+
+def _result(box, text, confidence=0.9):
+    x_min, x_max, y_min, y_max = box
+    return [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]], text, confidence
+
+
+def _line_boxes(count):
+    return [[0, 100, index * 20, index * 20 + 15] for index in range(count)]
+
+
+class FakeDetector(FakeEngine):
+    supports_regions = True
+
+    def __init__(self, texts, drop=0, reverse=False):
+        super().__init__('easyocr')
+        self.texts = texts
+        self.drop = drop
+        self.reverse = reverse
+        self.recognized = []
+
+    def detect(self, image_np):
+        return [_line_boxes(len(self.texts))], [[]]
+
+    def recognize(self, image_np, horizontal_list, free_list, **read_options):
+        self.recognized.append(len(horizontal_list))
+        results = [_result(box, self.texts[box[2] // 20]) for box in horizontal_list]
+        if self.reverse:
+            results.reverse()
+        return results[:len(results) - self.drop]
+
+
+@pytest.fixture
+def roi_config(monkeypatch):
+    monkeypatch.setattr(ocr_service.config, 'OCR_ROI_ENABLED', True)
+    monkeypatch.setattr(ocr_service.config, 'OCR_ROI_HEAD_LINES', 2)
+    monkeypatch.setattr(ocr_service.config, 'OCR_ROI_TAIL_LINES', 2)
+
+
+RECEIPT = ['MERCADO BOM', '12/03/2024', 'ARROZ 10,00', 'FEIJAO 8,00', 'TOTAL', 'R$ 18,00']
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_read_regions_reads_only_head_and_tail_when_fields_are_there(roi_config, reverse):
+    engine = FakeDetector(RECEIPT, reverse=reverse)
+    service = make_service(engine)
+
+    results = service._read_regions(engine, IMAGE)
+
+    assert engine.recognized == [4]
+    assert [result[1] for result in results] == ['MERCADO BOM', '12/03/2024', 'TOTAL', 'R$ 18,00']
+
+
+def test_read_regions_reads_middle_when_fields_are_missing(roi_config):
+    texts = ['MERCADO BOM', 'CUPOM', '12/03/2024', 'TOTAL R$ 18,00', 'OBRIGADO', 'VOLTE SEMPRE']
+    engine = FakeDetector(texts, reverse=True)
+    service = make_service(engine)
+
+    results = service._read_regions(engine, IMAGE)
+
+    assert engine.recognized == [4, 2]
+    assert [result[1] for result in results] == texts
+
+
+def test_read_regions_falls_back_when_results_do_not_match_boxes(roi_config):
+    engine = FakeDetector(RECEIPT, drop=1)
+    service = make_service(engine)
+
+    service._read_regions(engine, IMAGE)
+
+    assert engine.recognized == [4, 6]
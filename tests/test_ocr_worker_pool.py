@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+import pytest
+from services import ocr_worker_pool as pool_module
+from services.ocr_worker_pool import OCRJobTimeoutError, OCRQueueFullError, OCRWorkerPool
+
+
+def fake_ocr_job(source, mime_type):
+    # Roda no processo do pool: o conteúdo diz quantos segundos o "OCR" leva
+    started_at = time.time()
+    time.sleep(float(source))
+    return {
+        'text': f"lido por {os.getpid()}",
+        'confidence': 0.9,
+        'timings': {},
+        'engines': {},
+        'started_at': started_at
+    }
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(pool_module, '_run_ocr_job', fake_ocr_job)
+    pools = []
+
+    def factory(**options):
+        pool = OCRWorkerPool(**options)
+        pool.preload_model = False
+        pools.append(pool)
+        return pool
+
+    yield factory
+
+    for pool in pools:
+        pool.shutdown()
+
+
+async def _warm(pool: OCRWorkerPool):
+    # Sobe os processos antes de medir tempo: o spawn não conta no timeout dos testes
+    await pool.submit('0', 'image/jpeg')
+
+
+async def _wait_released(pool: OCRWorkerPool):
+    for _ in range(100):
+        if pool.pending_jobs == 0:
+            return
+        await asyncio.sleep(0.05)
+
+
+def test_rejects_jobs_beyond_capacity(make_pool):
+    pool = make_pool(max_workers=1, max_queue_size=1, job_timeout=30)
+
+    async def scenario():
+        await _warm(pool)
+        running = [asyncio.ensure_future(pool.submit('0.5', 'image/jpeg')) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(OCRQueueFullError):
+            await pool.submit('0', 'image/jpeg')
+
+        results = await asyncio.gather(*running)
+        await _wait_released(pool)
+        return results, pool.pending_jobs, await pool.submit('0', 'image/jpeg')
+
+    results, pending, after = asyncio.run(scenario())
+
+    assert all(result['text'] for result in results)
+    assert pending == 0
+    assert after['text']
+
+
+def test_timeout_terminates_the_busy_process(make_pool):
+    pool = make_pool(max_workers=1, max_queue_size=2, job_timeout=1)
+
+    async def scenario():
+        await _warm(pool)
+        old_processes = list(pool._executor._processes.values())
+
+        with pytest.raises(OCRJobTimeoutError):
+            await pool.submit('60', 'image/jpeg')
+
+        for process in old_processes:
+            process.join(timeout=5)
+        await _wait_released(pool)
+
+        # A vaga volta e o próximo job roda num processo novo
+        result = await pool.submit('0', 'image/jpeg')
+        return old_processes, pool.pending_jobs, result
+
+    old_processes, pending, result = asyncio.run(scenario())
+
+    assert all(not process.is_alive() for process in old_processes)
+    assert pending == 0
+    assert result['text'] != f"lido por {old_processes[0].pid}"
+
+
+def test_job_interrupted_by_recycling_is_resubmitted(make_pool, caplog):
+    pool = make_pool(max_workers=2, max_queue_size=2, job_timeout=1.5)
+
+    async def scenario():
+        await asyncio.gather(_warm(pool), _warm(pool))
+
+        stuck = asyncio.ensure_future(pool.submit('60', 'image/jpeg'))
+        await asyncio.sleep(1)
+        # Em execução no outro processo quando o pool é reciclado
+        innocent = asyncio.ensure_future(pool.submit('1', 'image/jpeg'))
+
+        with pytest.raises(OCRJobTimeoutError):
+            await stuck
+        return await innocent
+
+    caplog.set_level('INFO', logger=pool_module.__name__)
+
+    assert asyncio.run(scenario())['text']
+    assert 'reenviando' in caplog.text
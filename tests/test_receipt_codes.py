@@ -0,0 +1,149 @@
+from datetime import date
+import pytest
+from services.receipt_codes import ReceiptCodeParser, _crc16
+
+TODAY = date(2024, 3, 20)
+
+
+def mod11(digits: str) -> int:
+    weights = [2, 3, 4, 5, 6, 7, 8, 9]
+    total = sum(int(digit) * weights[index % 8] for index, digit in enumerate(reversed(digits)))
+    return 11 - total % 11
+
+
+def mod10(digits: str) -> int:
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        product = int(digit) * (2 if index % 2 == 0 else 1)
+        total += sum(int(char) for char in str(product))
+    return (10 - total % 10) % 10
+
+
+def access_key(model: str = '65', emission_type: str = '9', year_month: str = '2403') -> str:
+    # UF, AAMM, CNPJ, modelo, série, número, tipo de emissão, código numérico
+    key = '35' + year_month + '12345678000195' + model + '001' + '000000123' + emission_type + '87654321'
+    digit = mod11(key)
+    return key + str(0 if digit >= 10 else digit)
+
+
+def pix(fields: str) -> str:
+    payload = '000201' + fields + '6304'
+    return payload + _crc16(payload)
+
+
+def emv(field_id: str, value: str) -> str:
+    return f"{field_id}{len(value):02d}{value}"
+
+
+PIX_ACCOUNT = emv('26', emv('00', 'br.gov.bcb.pix') + emv('01', 'loja@exemplo.com'))
+
+
+def arrecadacao(value_id: str, amount_cents: int) -> str:
+    body = '8' + '3' + value_id + f"{amount_cents:011d}" + '0138' + '0074119002551100010601813'
+    if value_id == '6':
+        digit = mod10(body)
+    else:
+        digit = mod11(body)
+        digit = 0 if digit >= 10 else digit
+    return body[:3] + str(digit) + body[3:]
+
+
+def bump_digit(code: str, position: int) -> str:
+    return code[:position] + str((int(code[position]) + 1) % 10) + code[position + 1:]
+
+
+def test_crc16_matches_bcb_example():
+    payload = (
+        '00020126580014br.gov.bcb.pix0136123e4567-e12b-12d1-a456-426655440000'
+        '5204000053039865802BR5913Fulano de Tal6008BRASILIA62070503***6304'
+    )
+    assert _crc16(payload) == '1D3D'
+
+
+@pytest.mark.parametrize('payload, expected', [
+    (
+        pix(PIX_ACCOUNT + emv('52', '0000') + emv('53', '986') + emv('54', '45.90') + emv('59', 'PADARIA BOA')),
+        {'amount': 45.9, 'description': 'PIX PADARIA BOA', 'source': 'pix'}
+    ),
+    (
+        pix(PIX_ACCOUNT + emv('54', '10.00')),
+        {'amount': 10.0, 'description': 'PIX', 'source': 'pix'}
+    ),
+    (
+        '00193373700000001000500940144816060680935031',
+        {'amount': 1.0, 'description': 'Boleto banco 001', 'source': 'boleto'}
+    ),
+    (
+        arrecadacao('6', 13332),
+        {'amount': 133.32, 'description': 'Conta/tributo (código de barras)', 'source': 'boleto'}
+    ),
+    (
+        arrecadacao('8', 5000),
+        {'amount': 50.0, 'description': 'Conta/tributo (código de barras)', 'source': 'boleto'}
+    ),
+])
+def test_parses_valid_codes(payload, expected):
+    parsed = ReceiptCodeParser().parse(payload, TODAY)
+
+    assert {key: parsed[key] for key in expected} == expected
+    assert (parsed['type'], parsed['date']) == ('despesa', '2024-03-20')
+
+
+@pytest.mark.parametrize('payload', [
+    # PIX com CRC errado, sem valor, com valor zero ou de outro arranjo
+    pix(PIX_ACCOUNT + emv('54', '45.90'))[:-4] + '0000',
+    pix(PIX_ACCOUNT + emv('59', 'PADARIA BOA')),
+    pix(PIX_ACCOUNT + emv('54', '0.00')),
+    pix(emv('26', emv('00', 'br.com.outro')) + emv('54', '45.90')),
+    # Boleto com dígito verificador trocado ou moeda diferente de real
+    bump_digit('00193373700000001000500940144816060680935031', 4),
+    '00103373700000001000500940144816060680935031',
+    # Arrecadação com dígito errado ou valor por referência (identificador 7)
+    bump_digit(arrecadacao('6', 13332), 3),
+    '837' + arrecadacao('6', 13332)[3:],
+    # Chave de acesso sozinha (código de barras do DANFE): 44 dígitos, mas sem valor
+    access_key(model='55'),
+    access_key(model='65'),
+    # Texto comum de OCR
+    'TOTAL R$ 45,90\n12/03/2024',
+    '',
+])
+def test_rejects_invalid_codes(payload):
+    assert ReceiptCodeParser().parse(payload, TODAY) is None
+
+
+def nfce_v2(key: str, day: str = '15', amount: str = '87.35') -> str:
+    return f"https://www.nfce.fazenda.sp.gov.br/qrcode?p={key}|2|1|{day}|{amount}|6a|1|ABCDEF"
+
+
+@pytest.mark.parametrize('url, expected', [
+    (nfce_v2(access_key()), (87.35, '2024-03-15')),
+    (
+        'http://nfce.sefaz.rs.gov.br/qrcode?chNFe=' + access_key(emission_type='1')
+        + '&vNF=120.50&dhEmi=' + '2024-03-10T08:00:00-03:00'.encode('ascii').hex(),
+        (120.5, '2024-03-10')
+    ),
+    (
+        'http://nfce.sefaz.rs.gov.br/qrcode?chNFe=' + access_key(emission_type='1') + '&vNF=9.99',
+        (9.99, '2024-03-20')
+    ),
+])
+def test_parses_nfce_urls(url, expected):
+    parsed = ReceiptCodeParser().parse(url, TODAY)
+
+    assert (parsed['amount'], parsed['date']) == expected
+    assert parsed['description'] == 'Compra NFC-e CNPJ 12.345.678/0001-95'
+    assert parsed['source'] == 'nfce'
+
+
+@pytest.mark.parametrize('url', [
+    # Emissão normal (online): o QR code da versão 2 não traz valor nem dia
+    nfce_v2(access_key(emission_type='1')),
+    # Chave com dígito verificador errado ou modelo desconhecido
+    nfce_v2(bump_digit(access_key(), 43)),
+    nfce_v2(access_key(model='57')),
+    nfce_v2(access_key(), amount='0.00'),
+    'https://www.exemplo.com/qualquer?coisa=1',
+])
+def test_rejects_nfce_urls_without_usable_data(url):
+    assert ReceiptCodeParser().parse(url, TODAY) is None
@@ -0,0 +1,205 @@
+import asyncio
+import pytest
+from telegram.error import BadRequest
+from services import receipt_job_queue as queue_module
+from services.receipt_job_queue import DONE, FAILED, PENDING, RUNNING, ReceiptJobQueue
+
+FAILURE_MESSAGE = '❌ Não foi possível processar o comprovante'
+
+
+class FakeBot:
+    def __init__(self, edit_errors=()):
+        self.edit_errors = list(edit_errors)
+        self.edited = []
+        self.sent = []
+
+    async def edit_message_text(self, text, chat_id, message_id):
+        if self.edit_errors:
+            raise self.edit_errors.pop(0)
+        self.edited.append((chat_id, message_id, text))
+
+    async def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+class ScriptedHandler:
+    # Cada chamada consome o próximo item: texto de resposta ou exceção
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self, bot, telegram_id, payload):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(queue_module.time, 'time', now=1_700_000_000.0)
+
+
+def make_queue(tmp_path, handler, bot=None) -> ReceiptJobQueue:
+    queue = ReceiptJobQueue(
+        path=str(tmp_path / 'jobs.sqlite3'), workers=1, max_attempts=3, retry_delay=10
+    )
+    queue.set_handler(handler, lambda payload: FAILURE_MESSAGE)
+    queue._bot = bot or FakeBot()
+    return queue
+
+
+def rows(queue: ReceiptJobQueue) -> list:
+    return [dict(row) for row in queue._get_connection().execute("SELECT * FROM receipt_jobs")]
+
+
+def run_due(queue: ReceiptJobQueue) -> bool:
+    job = queue._claim_next()
+    if job is None:
+        return False
+    asyncio.run(queue._run(job))
+    return True
+
+
+def enqueue(queue: ReceiptJobQueue) -> int:
+    return asyncio.run(queue.enqueue('123', 42, 7, {'kind': 'photo', 'photos': []}))
+
+
+def test_successful_job_replies_and_is_deleted(tmp_path, clock):
+    queue = make_queue(tmp_path, ScriptedHandler('✅ Despesa registrada'))
+    enqueue(queue)
+
+    assert run_due(queue)
+
+    assert queue._bot.edited == [(42, 7, '✅ Despesa registrada')]
+    assert rows(queue) == []
+
+
+@pytest.mark.parametrize('failures, expected_delay', [(1, 10), (2, 20)])
+def test_failure_is_retried_with_exponential_backoff(tmp_path, clock, failures, expected_delay):
+    outcomes = [TimeoutError('backend lento')] * failures + ['✅ ok']
+    handler = ScriptedHandler(*outcomes)
+    queue = make_queue(tmp_path, handler)
+    enqueue(queue)
+
+    for _ in range(failures - 1):
+        run_due(queue)
+        clock.now += 1000
+    run_due(queue)
+
+    row = rows(queue)[0]
+    assert (row['status'], row['attempts'], row['last_error']) == (PENDING, failures, 'backend lento')
+    assert row['next_attempt_at'] == clock.now + expected_delay
+
+    # Antes do prazo nada roda; depois, a nova tentativa responde ao usuário
+    clock.now += expected_delay - 1
+    assert run_due(queue) is False
+    clock.now += 1
+    assert run_due(queue) is True
+    assert queue._bot.edited == [(42, 7, '✅ ok')]
+    assert handler.calls == failures + 1
+
+
+def test_exhausted_job_replies_failure_message_and_is_kept(tmp_path, clock):
+    handler = ScriptedHandler(*[RuntimeError('fora do ar')] * 3)
+    queue = make_queue(tmp_path, handler)
+    enqueue(queue)
+
+    for _ in range(3):
+        assert run_due(queue)
+        clock.now += 1000
+
+    row = rows(queue)[0]
+    assert (row['status'], row['outcome'], row['attempts']) == (FAILED, FAILED, 3)
+    assert queue._bot.edited == [(42, 7, FAILURE_MESSAGE)]
+    assert handler.calls == 3
+
+
+def test_reply_failure_retries_only_the_reply(tmp_path, clock):
+    handler = ScriptedHandler('✅ Despesa registrada')
+    bot = FakeBot(edit_errors=[ConnectionError('telegram fora do ar')])
+    queue = make_queue(tmp_path, handler, bot)
+    enqueue(queue)
+
+    run_due(queue)
+    row = rows(queue)[0]
+    assert (row['status'], row['result'], row['outcome']) == (PENDING, '✅ Despesa registrada', DONE)
+
+    clock.now += 10
+    run_due(queue)
+
+    assert handler.calls == 1
+    assert bot.edited == [(42, 7, '✅ Despesa registrada')]
+    assert rows(queue) == []
+
+
+def test_uneditable_message_falls_back_to_new_message(tmp_path, clock):
+    bot = FakeBot(edit_errors=[BadRequest('Message to edit not found')])
+    queue = make_queue(tmp_path, ScriptedHandler('✅ ok'), bot)
+    enqueue(queue)
+
+    run_due(queue)
+
+    assert bot.sent == [(42, '✅ ok')]
+    assert rows(queue) == []
+
+
+def _insert_running(queue: ReceiptJobQueue, attempts: int, result: str = None):
+    job_id = enqueue(queue)
+    queue._execute(
+        "UPDATE receipt_jobs SET status = ?, attempts = ?, result = ? WHERE id = ?",
+        (RUNNING, attempts, result, job_id)
+    )
+    return job_id
+
+
+def test_recover_requeues_interrupted_jobs(tmp_path, clock):
+    handler = ScriptedHandler('✅ ok')
+    queue = make_queue(tmp_path, handler)
+    _insert_running(queue, attempts=1)
+
+    assert queue._recover() == 1
+    assert rows(queue)[0]['status'] == PENDING
+
+    run_due(queue)
+    assert handler.calls == 1
+    assert queue._bot.edited == [(42, 7, '✅ ok')]
+
+
+def test_recover_does_not_rerun_exhausted_or_finished_jobs(tmp_path, clock):
+    handler = ScriptedHandler()
+    queue = make_queue(tmp_path, handler)
+    _insert_running(queue, attempts=3)
+    _insert_running(queue, attempts=1, result='✅ já registrada')
+
+    assert queue._recover() == 2
+    run_due(queue)
+    run_due(queue)
+
+    # Nenhum dos dois volta ao handler: um recebe a mensagem de erro, o outro a resposta gravada
+    assert handler.calls == 0
+    assert sorted(text for _, _, text in queue._bot.edited) == sorted([FAILURE_MESSAGE, '✅ já registrada'])
+    assert [row['status'] for row in rows(queue)] == [FAILED]
+
+
+def test_recover_purges_old_failed_jobs(tmp_path, clock):
+    queue = make_queue(tmp_path, ScriptedHandler())
+    job_id = enqueue(queue)
+    queue._mark_failed(job_id)
+
+    clock.now += queue_module.FAILED_RETENTION_SECONDS + 1
+    queue._recover()
+
+    assert rows(queue) == []
+
+
+def test_stats_count_jobs_by_status(tmp_path, clock):
+    queue = make_queue(tmp_path, ScriptedHandler())
+    enqueue(queue)
+    clock.now += 30
+    enqueue(queue)
+
+    stats = queue.get_stats()
+    assert (stats[PENDING], stats[RUNNING], stats[FAILED]) == (2, 0, 0)
+    assert stats['oldest_pending_age'] == 30
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from services.ocr_worker_pool import OCRJobTimeoutError, OCRQueueFullError
+from services.transaction_service import TemporaryReceiptError, TransactionService
+
+RECEIPT_TEXT = 'MERCADO BOM\nTOTAL R$ 45,90\n12/03/2024'
+
+
+class FakeOCRPool:
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    async def submit(self, source, mime_type):
+        if self.error is not None:
+            raise self.error
+        return {'text': RECEIPT_TEXT, 'confidence': 0.9}
+
+
+class FakeTransactionAPI:
+    def __init__(self, result):
+        self.result = result
+
+    async def create_transaction(self, telegram_id, original_message, parsed=None):
+        return self.result
+
+
+def make_service(ocr_error=None, api_result=None) -> TransactionService:
+    service = TransactionService()
+    service.receipt_cache = None
+    service.ocr_pool = FakeOCRPool(ocr_error)
+    service.transaction_api = FakeTransactionAPI(api_result or {'success': False, 'message': 'erro'})
+    return service
+
+
+def process(service: TransactionService, raise_temporary: bool):
+    return asyncio.run(service.process_receipt(
+        b'imagem', 'image/jpeg', '123', raise_temporary=raise_temporary
+    ))
+
+
+TEMPORARY_API_FAILURES = [
+    {'success': False, 'message': 'Não foi possível conectar ao servidor', 'retryable': True},
+    {'success': False, 'message': 'Servidor temporariamente indisponível.', 'circuit_open': True, 'retryable': True},
+]
+
+
+@pytest.mark.parametrize('ocr_error', [OCRQueueFullError(), OCRJobTimeoutError()])
+def test_busy_ocr_raises_on_queue_path_and_replies_inline(ocr_error):
+    service = make_service(ocr_error=ocr_error)
+
+    with pytest.raises(type(ocr_error)):
+        process(service, raise_temporary=True)
+    assert process(service, raise_temporary=False).startswith(('⏳', '⏱️'))
+
+
+@pytest.mark.parametrize('api_result', TEMPORARY_API_FAILURES)
+def test_temporary_api_failure_raises_on_queue_path_and_replies_inline(api_result):
+    service = make_service(api_result=api_result)
+
+    with pytest.raises(TemporaryReceiptError):
+        process(service, raise_temporary=True)
+    assert process(service, raise_temporary=False) == f"⚠️ {api_result['message']}"
+
+
+def test_final_api_failure_is_a_reply_on_both_paths():
+    service = make_service(api_result={'success': False, 'message': 'Usuário não encontrado', 'status_code': 400})
+
+    assert process(service, raise_temporary=True) == '⚠️ Usuário não encontrado'
+    assert process(service, raise_temporary=False) == '⚠️ Usuário não encontrado'
@@ -0,0 +1,101 @@
+import pytest
+from apis import resilience
+from apis.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, backoff_delay
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(resilience.time, 'monotonic')
+
+
+def _record(breaker: CircuitBreaker, success: bool):
+    if success:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        'teste', failure_rate=0.5, min_requests=4, window=30, open_seconds=10, half_open_max_calls=1
+    )
+
+
+@pytest.mark.parametrize('outcomes, expected_state', [
+    ([True, True, True, True], CLOSED),
+    ([False, False, False], CLOSED),
+    ([True, True, False, False], OPEN),
+    ([True, False, False, False], OPEN),
+    ([True, True, True, False], CLOSED),
+])
+def test_opens_only_above_failure_rate_with_enough_requests(clock, outcomes, expected_state):
+    breaker = make_breaker()
+    for success in outcomes:
+        _record(breaker, success)
+
+    assert breaker.state == expected_state
+
+
+def test_old_outcomes_leave_the_window(clock):
+    breaker = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 31
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()['requests_in_window'] == 3
+
+
+def _open(breaker: CircuitBreaker):
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_open_circuit_rejects_until_timeout(clock):
+    breaker = make_breaker()
+    _open(breaker)
+
+    assert breaker.allow_request() is False
+    clock.now += 9
+    assert breaker.allow_request() is False
+    assert breaker.get_stats()['rejected'] == 2
+
+    clock.now += 1
+    assert breaker.state == HALF_OPEN
+
+
+@pytest.mark.parametrize('probe_succeeds, expected_state', [(True, CLOSED), (False, OPEN)])
+def test_half_open_probe_decides_next_state(clock, probe_succeeds, expected_state):
+    breaker = make_breaker()
+    _open(breaker)
+    clock.now += 10
+
+    assert breaker.allow_request() is True
+    # Só uma chamada de teste por vez
+    assert breaker.allow_request() is False
+
+    _record(breaker, probe_succeeds)
+    assert breaker.state == expected_state
+
+
+def test_release_frees_half_open_slot(clock):
+    breaker = make_breaker()
+    _open(breaker)
+    clock.now += 10
+
+    assert breaker.allow_request() is True
+    breaker.release()
+    assert breaker.allow_request() is True
+
+
+@pytest.mark.parametrize('attempt, ceiling', [(0, 0.5), (1, 1.0), (2, 2.0), (3, 4.0), (10, 5.0)])
+def test_backoff_delay_is_full_jitter_up_to_capped_ceiling(monkeypatch, attempt, ceiling):
+    monkeypatch.setattr(resilience.config, 'API_RETRY_BACKOFF_BASE', 0.5)
+    monkeypatch.setattr(resilience.config, 'API_RETRY_BACKOFF_MAX', 5.0)
+    monkeypatch.setattr(resilience.random, 'uniform', lambda low, high: (low, high))
+
+    assert backoff_delay(attempt) == (0, ceiling)
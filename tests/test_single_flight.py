@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from caches.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {'user': 1}
+
+        results = await asyncio.gather(*(single_flight.do('123', fetch) for _ in range(5)))
+        return calls, results, single_flight.get_stats()
+
+    calls, results, stats = asyncio.run(scenario())
+
+    assert calls == 1
+    assert all(result == {'user': 1} for result in results)
+    assert stats == {'in_flight': 0, 'calls': 1, 'shared_calls': 4}
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(
+            single_flight.do('a', lambda: fetch('a')),
+            single_flight.do('b', lambda: fetch('b'))
+        ), single_flight.get_stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert results == ['a', 'b']
+    assert stats['calls'] == 2
+
+
+def test_key_is_released_after_completion():
+    async def scenario():
+        single_flight = SingleFlight()
+        counter = iter(range(10))
+
+        async def fetch():
+            return next(counter)
+
+        first = await single_flight.do('a', fetch)
+        second = await single_flight.do('a', fetch)
+        return first, second
+
+    assert asyncio.run(scenario()) == (0, 1)
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError('backend fora do ar')
+
+        return await asyncio.gather(
+            single_flight.do('a', fail), single_flight.do('a', fail), return_exceptions=True
+        ), single_flight.get_stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats['in_flight'] == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            return 'ok'
+
+        first = asyncio.ensure_future(single_flight.do('a', fetch))
+        second = asyncio.ensure_future(single_flight.do('a', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == 'ok'
@@ -0,0 +1,58 @@
+from datetime import date
+import pytest
+from services.transaction_parser import TransactionParser
+
+TODAY = date(2024, 3, 20)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('gastei 50 no mercado', ('despesa', 50.0, 'mercado', '2024-03-20')),
+    ('paguei conta de luz 120,50', ('despesa', 120.5, 'conta de luz', '2024-03-20')),
+    ('comprei pão R$ 12,90', ('despesa', 12.9, 'pão', '2024-03-20')),
+    ('recebi salário 3.500,00', ('receita', 3500.0, 'salário', '2024-03-20')),
+    ('ganhei 1.500 de freela', ('receita', 1500.0, 'freela', '2024-03-20')),
+    ('reembolso 25.90', ('receita', 25.9, 'reembolso', '2024-03-20')),
+    ('gastei 30 reais no almoço', ('despesa', 30.0, 'almoço', '2024-03-20')),
+    ('gastei 50 no mercado ontem', ('despesa', 50.0, 'mercado', '2024-03-19')),
+    ('paguei 80 anteontem na farmácia', ('despesa', 80.0, 'farmácia', '2024-03-18')),
+    ('gastei 50 no mercado dia 12/03', ('despesa', 50.0, 'mercado', '2024-03-12')),
+    ('gastei 50 no mercado no dia 12/03', ('despesa', 50.0, 'mercado', '2024-03-12')),
+    ('gastei 50 dia 12/03 no mercado', ('despesa', 50.0, 'mercado', '2024-03-12')),
+    ('paguei 30 em 12/03/2023 no posto', ('despesa', 30.0, 'posto', '2023-03-12')),
+    ('gastei 40 no bar 25/12', ('despesa', 40.0, 'bar', '2023-12-25')),
+])
+def test_parses_simple_messages(text, expected):
+    parsed = TransactionParser().parse(text, TODAY)
+
+    assert (parsed['type'], parsed['amount'], parsed['description'], parsed['date']) == expected
+
+
+@pytest.mark.parametrize('text', [
+    # Sem palavra-chave de receita ou despesa o tipo seria um palpite
+    'bônus 1000',
+    'dividendos 50',
+    'mesada 300',
+    'cashback 15',
+    'pix do joão 200',
+    'mercado 50',
+    # Ambíguos ou fora do formato simples
+    'recebi 50 e paguei a conta',
+    'comprei 2 pizzas 50',
+    'gastei no mercado',
+    'gastei 0 no mercado',
+    'gastei 50',
+    'gastei 50 no mercado dia 31/02',
+    'gastei 50 no mercado\nrecebi 20',
+    'gastei 50 reais hoje no mercado com a minha família toda',
+    '',
+])
+def test_leaves_unclear_messages_to_the_backend(text):
+    assert TransactionParser().parse(text, TODAY) is None
+
+
+def test_stats_count_attempts_and_hits():
+    parser = TransactionParser()
+    parser.parse('gastei 50 no mercado', TODAY)
+    parser.parse('bônus 1000', TODAY)
+
+    assert parser.get_stats() == {'attempts': 2, 'hits': 1, 'hit_rate': 0.5}
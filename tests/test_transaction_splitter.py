@@ -0,0 +1,31 @@
+import pytest
+from services.transaction_service import TransactionService
+
+split = TransactionService._split_transaction_candidates
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('gastei 50 no mercado\nrecebi 200 de freela', ['gastei 50 no mercado', 'recebi 200 de freela']),
+    ('uber 25,90; almoço 32; café R$ 8', ['uber 25,90', 'almoço 32', 'café R$ 8']),
+    ('  gastei 50 no mercado \n\n paguei 1.200 de aluguel  ', ['gastei 50 no mercado', 'paguei 1.200 de aluguel']),
+    ('gastei 50 no mercado dia 12/03\npaguei 30 reais na farmácia', [
+        'gastei 50 no mercado dia 12/03', 'paguei 30 reais na farmácia'
+    ]),
+])
+def test_splits_one_amount_per_line(text, expected):
+    assert split(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'gastei 50 no mercado',
+    # A segunda linha só tem data ou quantidade: o texto todo é uma transação
+    'gastei 50 no mercado\nno dia 12/03',
+    'paguei 3 parcelas; total 300',
+    'comprei 2 pizzas\npaguei 80',
+    # Linha com dois valores ou sem nenhum
+    'gastei 50 e 30 no mercado\nrecebi 200',
+    'mercado\ngastei 50',
+    'gastei 50 no mercado;',
+])
+def test_keeps_text_whole_unless_every_line_has_one_amount(text):
+    assert split(text) == [text]
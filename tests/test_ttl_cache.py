@@ -0,0 +1,90 @@
+import pytest
+from caches import ttl_cache
+from caches.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(fake_clock):
+    return fake_clock(ttl_cache.time, 'monotonic')
+
+
+def test_get_counts_hits_and_misses(clock):
+    cache = TTLCache(max_size=10, default_ttl=60)
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+@pytest.mark.parametrize('elapsed, ttl, expected', [
+    (59, None, 1),
+    (60, None, None),
+    (5, 10, 1),
+    (10, 10, None),
+])
+def test_entries_expire_after_ttl(clock, elapsed, ttl, expected):
+    cache = TTLCache(max_size=10, default_ttl=60)
+    cache.set('a', 1, ttl=ttl)
+
+    clock.now += elapsed
+
+    assert cache.get('a') == expected
+    assert ('a' in cache) is (expected is not None)
+
+
+def test_expired_entry_counts_as_expiration_and_miss(clock):
+    cache = TTLCache(max_size=10, default_ttl=1)
+    cache.set('a', 1)
+    clock.now += 2
+
+    cache.get('a')
+
+    stats = cache.get_stats()
+    assert (stats['misses'], stats['expirations'], stats['size']) == (1, 1, 0)
+
+
+def test_evicts_least_recently_used(clock):
+    cache = TTLCache(max_size=2, default_ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_peek_does_not_touch_stats_or_lru_order(clock):
+    cache = TTLCache(max_size=2, default_ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.peek('a') == 1
+    assert cache.peek('missing', 'default') == 'default'
+    cache.set('c', 3)
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses']) == (0, 0)
+    assert 'a' not in cache
+
+
+def test_peek_ignores_expired_entries(clock):
+    cache = TTLCache(max_size=10, default_ttl=1)
+    cache.set('a', 1)
+    clock.now += 1
+
+    assert cache.peek('a') is None
+
+
+def test_set_sweeps_expired_entries_after_interval(clock):
+    cache = TTLCache(max_size=10, default_ttl=5, sweep_interval=10)
+    cache.set('a', 1)
+    clock.now += 11
+    cache.set('b', 2)
+
+    assert len(cache) == 1
+    assert cache.get_stats()['expirations'] == 1